@@ -0,0 +1,361 @@
+import argparse
+import csv
+import io
+import json
+import os
+import platform
+import random
+import re
+import sys
+import time
+import tracemalloc
+
+from csv_batch import iter_chunks
+from input_tokenizer import iter_items
+from listing import read_listings
+from optimized_description_gpt import optimize_shopee_descriptions
+from optimized_product_optimizer import optimize_titles, optimize_descriptions
+from scrape_reader import iter_listings
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "FICHATGPT")
+DEFAULT_ROWS = (1000, 10000)
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_LATENCY_SAMPLES = 1000
+# Each timed call is repeated this many times and the fastest run counts, which filters out scheduler noise
+DEFAULT_REPEAT = 3
+# Peak memory is measured on a separate pass of at most this many rows, since tracing slows everything down
+DEFAULT_MEMORY_ROWS = 10000
+DEFAULT_THRESHOLD = 0.15
+# p99 changes smaller than this are timer noise for microsecond-scale calls, whatever the ratio
+LATENCY_SLACK_US = 5
+
+# Used when the FICHATGPT exports are not available
+FALLBACK_SHAPES = {
+    "titles": [
+        "[FAST 24/7] SciSpace Typeset Premium | AI Copilot research | ChatGPT Alternative",
+        "ChatGPT Plus 4o Private Account 1 Month Warranty",
+        "[CHEAPEST] Turnitin Instructor Account No Repository AI Detection",
+        "OFFICE PROJET VSIO PRO PLUS 365 2021 2019 2016 2013 2010 PC SOFWARE | ORlGINAL",
+        "Canva Pro Lifetime Premium Upgrade Own Account",
+    ],
+    "locations": ["Selangor", "Kuala Lumpur", "Pulau Pinang", "Johor", "Mainland China"],
+    "sales": ["7k sold/month", "20.9k Sold/Month", "1.2k sold", "356 sold", "10k+ sold"],
+    "prices": [5.99, 9.9, 12.9, 25.0, 49.0],
+    "ratings": [4.6, 4.8, 4.9, 5.0],
+    "promotions": ["Cheapest on Shopee*", "Free Gift", "Any 2 items 5% off", ""],
+}
+
+_WORD = re.compile(r"[A-Za-z0-9][A-Za-z0-9+./-]*")
+
+
+def load_shapes(data_dir=DATA_DIR):
+    """
+    Collect the value pools synthetic listings are drawn from.
+
+    Titles, locations, sales strings, prices, ratings and promotion texts
+    come from the FICHATGPT CSV and *_processed.json exports when they exist.
+
+    Parameters:
+    data_dir (str): The directory with the exports. Default is ../FICHATGPT.
+
+    Returns:
+    dict: Lists of sample values keyed like FALLBACK_SHAPES.
+    """
+    shapes = {key: [] for key in FALLBACK_SHAPES}
+    if os.path.isdir(data_dir):
+        for name in sorted(os.listdir(data_dir)):
+            path = os.path.join(data_dir, name)
+            if name.endswith("_processed.json"):
+                for listing in iter_listings(path):
+                    _add_shape(shapes, listing.title, listing.location, listing.sales, listing.price,
+                               listing.rating, listing.promotions)
+            elif name == "shopee_products.csv":
+                with open(path, newline="", encoding="utf-8") as handle:
+                    for row in csv.DictReader(handle):
+                        _add_shape(shapes, row.get("Product Title"), row.get("Seller Location"),
+                                   row.get("Sales Information"), None, None, [row.get("Promotional Texts")])
+    for key, fallback in FALLBACK_SHAPES.items():
+        if not shapes[key]:
+            shapes[key] = list(fallback)
+    return shapes
+
+
+def _add_shape(shapes, title, location, sales, price, rating, promotions):
+    if title:
+        shapes["titles"].append(title)
+    if location:
+        shapes["locations"].append(location)
+    if sales:
+        shapes["sales"].append(sales)
+    if price is not None:
+        shapes["prices"].append(price)
+    if rating is not None:
+        shapes["ratings"].append(rating)
+    shapes["promotions"].extend(promotion for promotion in promotions or () if promotion)
+
+
+def synthetic_listings(rows, seed=0, shapes=None):
+    """
+    Generate Shopee-like listing records without holding them in memory.
+
+    Records use the item-card column names of the scraped exports, plus a
+    'description' field. Titles are real titles with some words swapped,
+    dropped or re-cased, so rule hit rates and lengths stay realistic.
+
+    Parameters:
+    rows (int): The number of records to generate.
+    seed (int): The random seed; the same seed gives the same corpus. Default is 0.
+    shapes (dict): Value pools from load_shapes. Default is load_shapes().
+
+    Returns:
+    generator: Record dictionaries.
+    """
+    shapes = shapes or load_shapes()
+    rng = random.Random(seed)
+    vocabulary = sorted({word for title in shapes["titles"] for word in _WORD.findall(title)})
+    for _ in range(rows):
+        words = rng.choice(shapes["titles"]).split()
+        for _ in range(rng.randint(0, 3)):
+            position = rng.randrange(len(words) + 1)
+            if rng.random() < 0.5 and words:
+                words[min(position, len(words) - 1)] = rng.choice(vocabulary)
+            else:
+                words.insert(position, rng.choice(vocabulary))
+        title = " ".join(words)
+        if rng.random() < 0.1:
+            title = title.upper()
+
+        description_words = [rng.choice(vocabulary) for _ in range(int(rng.paretovariate(1.5) * 20))]
+        if rng.random() < 0.2:
+            description_words.insert(rng.randrange(len(description_words) + 1), "high quality")
+        if rng.random() < 0.1:
+            description_words.insert(rng.randrange(len(description_words) + 1), "easy to use")
+
+        shop_id = rng.randrange(10 ** 7, 10 ** 9)
+        item_id = rng.randrange(10 ** 9, 10 ** 11)
+        slug = "-".join(_WORD.findall(title))[:80]
+        yield {
+            "contents href": f"https://shopee.com.my/{slug}-i.{shop_id}.{item_id}",
+            "line-clamp-2": title,
+            "truncate": rng.choice(shapes["prices"]),
+            "truncate 2": rng.choice(shapes["promotions"]),
+            "truncate 3": rng.choice(shapes["promotions"]),
+            "flex-none": rng.choice(shapes["ratings"]),
+            "truncate 4": rng.choice(shapes["sales"]),
+            "ml-[3px]": rng.choice(shapes["locations"]),
+            "h-4": f"-{rng.randint(1, 60)}%" if rng.random() < 0.3 else None,
+            "description": " ".join(description_words),
+        }
+
+
+def _quoted_input(records):
+    return ", ".join('"' + record["line-clamp-2"].replace('"', '""') + '"' for record in records)
+
+
+def _parse_items(text):
+    return list(iter_items(text))
+
+
+def _parse_listings(text):
+    return list(read_listings(io.StringIO(text)))
+
+
+# name -> (build the input from a list of records, run the code under test on that input)
+BENCHMARKS = {
+    "optimize_titles": (lambda records: [record["line-clamp-2"] for record in records], optimize_titles),
+    "optimize_descriptions": (lambda records: [record["description"] for record in records], optimize_descriptions),
+    "optimize_shopee_descriptions": (
+        lambda records: [record["description"] for record in records],
+        optimize_shopee_descriptions,
+    ),
+    "iter_items": (_quoted_input, _parse_items),
+    "read_listings": (json.dumps, _parse_listings),
+}
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_benchmark(name, rows, seed=0, shapes=None, batch_size=DEFAULT_BATCH_SIZE, repeat=DEFAULT_REPEAT,
+                  latency_samples=DEFAULT_LATENCY_SAMPLES, memory_rows=DEFAULT_MEMORY_ROWS):
+    """
+    Measure one benchmark on a synthetic corpus.
+
+    Throughput comes from processing the corpus in batches (generation time
+    excluded), latency percentiles from single-item calls on the first
+    latency_samples records, and peak memory from a traced pass over at most
+    memory_rows records. Every timed call is run repeat times and the fastest
+    run counts.
+
+    Parameters:
+    name (str): A key of BENCHMARKS.
+    rows (int): The corpus size.
+    seed (int): The corpus seed. Default is 0.
+    shapes (dict): Value pools from load_shapes. Default is load_shapes().
+    batch_size (int): Records per call in the throughput pass. Default is 1000.
+    repeat (int): Timed runs per batch and per latency sample. Default is 3.
+    latency_samples (int): Single-record calls timed for the percentiles. Default is 1000.
+    memory_rows (int): Records in the traced memory pass. Default is 10000.
+
+    Returns:
+    dict: rows, seconds, rows_per_second, p50_us, p95_us, p99_us and peak_memory_bytes.
+    """
+    prepare, run = BENCHMARKS[name]
+    shapes = shapes or load_shapes()
+
+    elapsed = 0.0
+    for records in iter_chunks(synthetic_listings(rows, seed, shapes), batch_size):
+        batch = prepare(records)
+        fastest = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run(batch)
+            fastest = min(fastest, time.perf_counter() - start)
+        elapsed += fastest
+
+    latencies = []
+    for record in synthetic_listings(min(rows, latency_samples), seed, shapes):
+        single = prepare([record])
+        fastest = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run(single)
+            fastest = min(fastest, time.perf_counter() - start)
+        latencies.append(fastest)
+    latencies.sort()
+
+    peak = 0
+    for records in iter_chunks(synthetic_listings(min(rows, memory_rows), seed, shapes), batch_size):
+        batch = prepare(records)
+        # Only trace the code under test, so its input does not count
+        tracemalloc.start()
+        try:
+            run(batch)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "rows": rows,
+        "seconds": elapsed,
+        "rows_per_second": rows / elapsed if elapsed else float("inf"),
+        "p50_us": _percentile(latencies, 0.50) * 1e6,
+        "p95_us": _percentile(latencies, 0.95) * 1e6,
+        "p99_us": _percentile(latencies, 0.99) * 1e6,
+        "peak_memory_bytes": peak,
+    }
+
+
+def run_suite(names=None, row_counts=DEFAULT_ROWS, seed=0, **options):
+    """
+    Run several benchmarks at several corpus sizes.
+
+    Parameters:
+    names (list): Benchmark names. Default is all of BENCHMARKS.
+    row_counts (iterable): Corpus sizes. Default is (1000, 10000).
+    seed (int): The corpus seed. Default is 0.
+    **options: Passed to run_benchmark.
+
+    Returns:
+    dict: {"environment": {...}, "results": {"<name>@<rows>": measurement}}.
+    """
+    shapes = load_shapes()
+    results = {}
+    for name in names or BENCHMARKS:
+        for rows in row_counts:
+            results[f"{name}@{rows}"] = run_benchmark(name, rows, seed, shapes, **options)
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Find measurements that regressed against a baseline.
+
+    A benchmark regresses when its throughput drops, or its p99 latency or
+    peak memory grows, by more than threshold (a fraction). p99 changes under
+    LATENCY_SLACK_US are ignored. Benchmarks missing from either side are ignored.
+
+    Parameters:
+    results (dict): Output of run_suite.
+    baseline (dict): An earlier output of run_suite.
+    threshold (float): The tolerated relative change. Default is 0.15.
+
+    Returns:
+    list: Human-readable descriptions of each regression (empty if none).
+    """
+    regressions = []
+    for key, current in results["results"].items():
+        previous = baseline.get("results", {}).get(key)
+        if previous is None:
+            continue
+        if current["rows_per_second"] < previous["rows_per_second"] * (1 - threshold):
+            regressions.append(
+                f"{key}: throughput {current['rows_per_second']:.0f} rows/s, "
+                f"baseline {previous['rows_per_second']:.0f} rows/s"
+            )
+        if current["p99_us"] > max(previous["p99_us"] * (1 + threshold), previous["p99_us"] + LATENCY_SLACK_US):
+            regressions.append(f"{key}: p99 {current['p99_us']:.1f} us, baseline {previous['p99_us']:.1f} us")
+        if current["peak_memory_bytes"] > previous["peak_memory_bytes"] * (1 + threshold):
+            regressions.append(
+                f"{key}: peak memory {current['peak_memory_bytes']} bytes, "
+                f"baseline {previous['peak_memory_bytes']} bytes"
+            )
+    return regressions
+
+
+def format_results(results):
+    lines = [f"{'benchmark':<36}{'rows/s':>14}{'p50 us':>10}{'p95 us':>10}{'p99 us':>10}{'peak KiB':>11}"]
+    for key, result in results["results"].items():
+        lines.append(
+            f"{key:<36}{result['rows_per_second']:>14,.0f}{result['p50_us']:>10.1f}{result['p95_us']:>10.1f}"
+            f"{result['p99_us']:>10.1f}{result['peak_memory_bytes'] / 1024:>11,.0f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the optimizer on synthetic Shopee-like corpora.")
+    parser.add_argument("benchmarks", nargs="*", metavar="benchmark",
+                        help=f"benchmarks to run: {', '.join(sorted(BENCHMARKS))} (default: all)")
+    parser.add_argument("--rows", type=int, nargs="+", default=list(DEFAULT_ROWS),
+                        help="corpus sizes, e.g. --rows 1000 100000 10000000 (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="timed runs per batch")
+    parser.add_argument("--baseline", help="compare against this baseline JSON and exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="tolerated relative slowdown/growth (default: %(default)s)")
+    parser.add_argument("--save", help="write the results as a baseline JSON to this path")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark {unknown[0]!r} (choose from {', '.join(sorted(BENCHMARKS))})")
+
+    results = run_suite(args.benchmarks or None, args.rows, args.seed, batch_size=args.batch_size, repeat=args.repeat)
+    print(format_results(results))
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+            handle.write("\n")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            regressions = compare(results, json.load(handle), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
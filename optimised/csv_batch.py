@@ -0,0 +1,187 @@
+import argparse
+import csv
+import sys
+from itertools import islice
+
+from metrics import METRICS
+from optimized_product_optimizer import optimize_titles, optimize_descriptions
+
+TITLE_COLUMN = "Product Title"
+DEFAULT_CHUNK_SIZE = 1000
+
+# Scraped descriptions and titles can be far longer than csv's 128 KB default
+csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+
+
+def iter_chunks(iterable, chunk_size):
+    """
+    Split an iterable into lists of at most chunk_size items without materializing it.
+
+    Parameters:
+    iterable (iterable): The items to split.
+    chunk_size (int): The maximum number of items per chunk.
+
+    Returns:
+    generator: Lists of consecutive items.
+
+    Raises:
+    ValueError: If chunk_size is less than 1.
+    """
+    # Checked here rather than in the generator, so a bad size fails before any input is consumed
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    return _chunks(iter(iterable), chunk_size)
+
+
+def _chunks(iterator, chunk_size):
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def optimize_csv(input_file, output_file, title_column=TITLE_COLUMN, description_column=None,
+                 chunk_size=DEFAULT_CHUNK_SIZE, max_length=200, separator='|',
+                 default_word_count=1500, max_word_count=2000):
+    """
+    Stream a product CSV, rewriting the title (and optionally description) column.
+
+    Rows are read, optimized and written one chunk at a time, and the output is
+    flushed after every chunk, so memory use is bounded by chunk_size regardless
+    of the size of the input. All other columns are copied through unchanged.
+
+    Parameters:
+    input_file (file): A text file object opened for reading (newline='').
+    output_file (file): A text file object opened for writing (newline='').
+    title_column (str): The name of the title column. Default is 'Product Title'.
+    description_column (str): The name of the description column to optimize, if any. Default is None.
+    chunk_size (int): The number of rows processed and flushed at a time. Default is 1000.
+    max_length (int): Passed to optimize_titles. Default is 200.
+    separator (str): Passed to optimize_titles. Default is '|'.
+    default_word_count (int): Passed to optimize_descriptions. Default is 1500.
+    max_word_count (int): Passed to optimize_descriptions. Default is 2000.
+
+    Returns:
+    int: The number of data rows written.
+
+    Raises:
+    ValueError: If chunk_size is less than 1 or a column is missing.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    reader = csv.reader(input_file)
+    header = next(reader, None)
+    if header is None:
+        return 0
+
+    try:
+        title_index = header.index(title_column)
+    except ValueError:
+        raise ValueError(f"Column {title_column!r} not found in CSV header: {header}")
+    description_index = None
+    if description_column is not None:
+        try:
+            description_index = header.index(description_column)
+        except ValueError:
+            raise ValueError(f"Column {description_column!r} not found in CSV header: {header}")
+
+    # Match the layout of shopee_products_optimized.csv: bare header, quoted data rows
+    csv.writer(output_file).writerow(header)
+    writer = csv.writer(output_file, quoting=csv.QUOTE_ALL)
+
+    rows_written = 0
+    for rows in iter_chunks(reader, chunk_size):
+        titles = [row[title_index] if title_index < len(row) else "" for row in rows]
+        optimized_titles = optimize_titles(titles, max_length=max_length, separator=separator)
+        for row, title in zip(rows, optimized_titles):
+            if title_index < len(row):
+                row[title_index] = title
+
+        if description_index is not None:
+            descriptions = [row[description_index] if description_index < len(row) else "" for row in rows]
+            optimized = optimize_descriptions(descriptions, default_word_count, max_word_count)
+            for row, description in zip(rows, optimized):
+                if description_index < len(row):
+                    row[description_index] = description
+
+        with METRICS.time("write_csv"):
+            writer.writerows(rows)
+            output_file.flush()
+        rows_written += len(rows)
+
+    return rows_written
+
+
+def optimize_csv_file(input_path, output_path, **options):
+    """
+    Run optimize_csv on file paths, where '-' means stdin or stdout.
+
+    Parameters:
+    input_path (str): The CSV to read, or '-' for stdin.
+    output_path (str): The CSV to write, or '-' for stdout.
+    **options: Keyword arguments passed to optimize_csv.
+
+    Returns:
+    int: The number of data rows written.
+    """
+    input_file = sys.stdin if input_path == "-" else open(input_path, newline="", encoding="utf-8")
+    try:
+        output_file = sys.stdout if output_path == "-" else open(output_path, "w", newline="", encoding="utf-8")
+        try:
+            return optimize_csv(input_file, output_file, **options)
+        finally:
+            if output_file is not sys.stdout:
+                output_file.close()
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+
+
+def build_parser(prog=None):
+    parser = argparse.ArgumentParser(
+        prog=prog,
+        description="Optimize the title (and optionally description) column of a product CSV."
+    )
+    parser.add_argument("input", help="input CSV path, or - for stdin")
+    parser.add_argument("output", help="output CSV path, or - for stdout")
+    parser.add_argument("--title-column", default=TITLE_COLUMN)
+    parser.add_argument("--description-column", default=None)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--max-length", type=int, default=200)
+    parser.add_argument("--separator", default="|")
+    parser.add_argument("--default-word-count", type=int, default=1500)
+    parser.add_argument("--max-word-count", type=int, default=2000)
+    parser.add_argument("--metrics-prom", help="write run metrics in Prometheus text format to this path")
+    parser.add_argument("--metrics-json", help="write a JSON summary of run metrics to this path")
+    return parser
+
+
+def main(argv=None, prog=None):
+    parser = build_parser(prog)
+    args = parser.parse_args(argv)
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+    if args.metrics_prom or args.metrics_json:
+        METRICS.enable()
+    with METRICS.time("csv_batch"):
+        rows = optimize_csv_file(
+            args.input,
+            args.output,
+            title_column=args.title_column,
+            description_column=args.description_column,
+            chunk_size=args.chunk_size,
+            max_length=args.max_length,
+            separator=args.separator,
+            default_word_count=args.default_word_count,
+            max_word_count=args.max_word_count,
+        )
+    print(f"Optimized {rows} rows.", file=sys.stderr)
+    if args.metrics_prom:
+        METRICS.write_prometheus(args.metrics_prom)
+    if args.metrics_json:
+        METRICS.write_json(args.metrics_json)
+
+
+if __name__ == "__main__":
+    main()
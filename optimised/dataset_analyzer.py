@@ -0,0 +1,346 @@
+import argparse
+import hashlib
+import heapq
+import json
+import math
+import os
+
+from scrape_reader import iter_json_array
+
+# Fields with at most this many distinct values / numeric values are summarized exactly;
+# beyond that the unique count comes from a HyperLogLog sketch and the median from a P² estimator.
+DEFAULT_EXACT_LIMIT = 100000
+# Largest and smallest values kept per numeric field as outlier candidates
+DEFAULT_OUTLIER_CANDIDATES = 100
+Z_SCORE_THRESHOLD = 3
+
+
+class HyperLogLog:
+    """Approximate distinct counter (about 0.8% standard error with the default precision)."""
+
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(self.size)
+
+    def add(self, value):
+        digest = hashlib.blake2b(value.encode("utf-8", "surrogatepass"), digest_size=8).digest()
+        hashed = int.from_bytes(digest, "big")
+        index = hashed >> (64 - self.precision)
+        remainder = hashed & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - remainder.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self):
+        alpha = 0.7213 / (1 + 1.079 / self.size)
+        estimate = alpha * self.size * self.size / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.size and zeros:
+            # Small-range correction (linear counting)
+            estimate = self.size * math.log(self.size / zeros)
+        return int(round(estimate))
+
+
+class P2Quantile:
+    """Single-pass P² estimator of one quantile (Jain & Chlamtac) using five markers."""
+
+    def __init__(self, quantile=0.5):
+        self.quantile = quantile
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * quantile, 1 + 4 * quantile, 3 + 2 * quantile, 5]
+        self.increments = [0, quantile / 2, quantile, (1 + quantile) / 2, 1]
+
+    def add(self, value):
+        heights = self.heights
+        if len(heights) < 5:
+            heights.append(value)
+            heights.sort()
+            return
+
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = 0
+            while value >= heights[cell + 1]:
+                cell += 1
+
+        positions = self.positions
+        for index in range(cell + 1, 5):
+            positions[index] += 1
+        for index in range(5):
+            self.desired[index] += self.increments[index]
+
+        for index in range(1, 4):
+            delta = self.desired[index] - positions[index]
+            if (delta >= 1 and positions[index + 1] - positions[index] > 1) or \
+                    (delta <= -1 and positions[index - 1] - positions[index] < -1):
+                step = 1 if delta > 0 else -1
+                candidate = self._parabolic(index, step)
+                if not heights[index - 1] < candidate < heights[index + 1]:
+                    candidate = self._linear(index, step)
+                heights[index] = candidate
+                positions[index] += step
+
+    def _parabolic(self, index, step):
+        heights, positions = self.heights, self.positions
+        return heights[index] + step / (positions[index + 1] - positions[index - 1]) * (
+            (positions[index] - positions[index - 1] + step) * (heights[index + 1] - heights[index])
+            / (positions[index + 1] - positions[index])
+            + (positions[index + 1] - positions[index] - step) * (heights[index] - heights[index - 1])
+            / (positions[index] - positions[index - 1])
+        )
+
+    def _linear(self, index, step):
+        heights, positions = self.heights, self.positions
+        return heights[index] + step * (heights[index + step] - heights[index]) / (
+            positions[index + step] - positions[index]
+        )
+
+    def value(self):
+        if not self.heights:
+            return None
+        if len(self.heights) < 5:
+            return _exact_median(self.heights)
+        return self.heights[2]
+
+
+def _exact_median(values):
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) / 2
+
+
+def _value_type(value):
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, (int, float)):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, list):
+        return "array"
+    return "object"
+
+
+class FieldSummary:
+    """Streaming accumulator for the statistics of one field."""
+
+    def __init__(self, exact_limit, outlier_candidates):
+        self.exact_limit = exact_limit
+        self.outlier_candidates = outlier_candidates
+        self.count = 0
+        self.types = set()
+        self.distinct = set()
+        self.sketch = None
+        # Numeric statistics (Welford)
+        self.numeric_count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.values = []
+        self.median_estimator = P2Quantile(0.5)
+        self.largest = []
+        self.smallest = []
+
+    def add(self, value, row_index):
+        self.count += 1
+        value_type = _value_type(value)
+        self.types.add(value_type)
+
+        key = value if value_type == "string" else json.dumps(value, sort_keys=True)
+        if self.sketch is None:
+            self.distinct.add(key)
+            if len(self.distinct) > self.exact_limit:
+                self.sketch = HyperLogLog()
+                for item in self.distinct:
+                    self.sketch.add(item)
+                self.distinct = None
+        else:
+            self.sketch.add(key)
+
+        if value_type == "number":
+            self._add_number(value, row_index)
+
+    def _add_number(self, value, row_index):
+        self.numeric_count += 1
+        delta = value - self.mean
+        self.mean += delta / self.numeric_count
+        self.m2 += delta * (value - self.mean)
+        self.total += value
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+
+        self.median_estimator.add(value)
+        if self.values is not None:
+            self.values.append(value)
+            if len(self.values) > self.exact_limit:
+                self.values = None
+
+        # Keep the most extreme values on both sides as outlier candidates
+        if len(self.largest) < self.outlier_candidates:
+            heapq.heappush(self.largest, (value, -row_index))
+            heapq.heappush(self.smallest, (-value, -row_index))
+        else:
+            if value > self.largest[0][0]:
+                heapq.heapreplace(self.largest, (value, -row_index))
+            if -value > self.smallest[0][0]:
+                heapq.heapreplace(self.smallest, (-value, -row_index))
+
+    @property
+    def field_type(self):
+        if len(self.types) == 1:
+            return next(iter(self.types))
+        return "string" if self.types else "null"
+
+    def summary(self, records):
+        summary = {
+            "type": self.field_type,
+            "count": self.count,
+            "missing": records - self.count,
+            "unique": len(self.distinct) if self.sketch is None else self.sketch.count(),
+        }
+        if summary["type"] == "number" and self.numeric_count:
+            median = _exact_median(self.values) if self.values is not None else self.median_estimator.value()
+            summary.update({
+                "min": self.minimum,
+                "max": self.maximum,
+                "sum": self.total,
+                "mean": self.total / self.numeric_count,
+                "median": median,
+                "stdDev": self.std_dev(),
+            })
+        return summary
+
+    def std_dev(self):
+        return math.sqrt(self.m2 / self.numeric_count) if self.numeric_count else 0.0
+
+    def outliers(self, field, threshold=Z_SCORE_THRESHOLD):
+        std_dev = self.std_dev()
+        if self.field_type != "number" or not std_dev:
+            return []
+        candidates = {}
+        for value, negative_index in self.largest:
+            candidates[-negative_index] = value
+        for negative_value, negative_index in self.smallest:
+            candidates[-negative_index] = -negative_value
+        mean = self.total / self.numeric_count
+        outliers = []
+        for row_index, value in candidates.items():
+            z_score = abs(value - mean) / std_dev
+            if z_score > threshold:
+                outliers.append({"field": field, "value": value, "zScore": z_score, "rowIndex": row_index})
+        return outliers
+
+
+def analyze_records(records, exact_limit=DEFAULT_EXACT_LIMIT, outlier_candidates=DEFAULT_OUTLIER_CANDIDATES):
+    """
+    Summarize a stream of records in a single pass.
+
+    Parameters:
+    records (iterable): Dictionaries, e.g. the elements of a *_processed.json file.
+    exact_limit (int): Per-field limit for exact unique counts and medians. Default is 100000.
+    outlier_candidates (int): Extreme values kept per side of each numeric field. Default is 100.
+
+    Returns:
+    dict: A report with the summary/correlations/trends/outliers/insights schema of the
+        *_analysis.json files.
+    """
+    fields = {}
+    total = 0
+    for row_index, record in enumerate(records):
+        total += 1
+        for field, value in record.items():
+            summary = fields.get(field)
+            if summary is None:
+                summary = fields[field] = FieldSummary(exact_limit, outlier_candidates)
+            if value is not None and value != "":
+                summary.add(value, row_index)
+
+    summaries = {field: summary.summary(total) for field, summary in fields.items()}
+
+    outliers = []
+    for field, summary in fields.items():
+        outliers.extend(summary.outliers(field))
+    outliers.sort(key=lambda outlier: (-outlier["zScore"], outlier["rowIndex"]))
+
+    insights = [f"This dataset contains {total} records with {len(fields)} fields."]
+    missing = [f"{field} ({summary['missing']} missing)" for field, summary in summaries.items() if summary["missing"]]
+    if missing:
+        insights.append(f"Fields with missing data: {', '.join(missing)}.")
+    if outliers:
+        insights.append(
+            f"Found {len(outliers)} outliers in the dataset, with the most significant in the "
+            f"{outliers[0]['field']} field."
+        )
+
+    return {
+        "summary": summaries,
+        "correlations": [],
+        "trends": [],
+        "outliers": outliers,
+        "insights": insights,
+    }
+
+
+def analyze_file(path, **options):
+    """
+    Analyze a JSON-array dataset file without loading it into memory.
+
+    Parameters:
+    path (str): The dataset path, e.g. 'TopSales_DigitalProduct_shopee_processed.json'.
+    **options: Passed to analyze_records.
+
+    Returns:
+    dict: The analysis report.
+    """
+    with open(path, encoding="utf-8") as handle:
+        return analyze_records(iter_json_array(handle), **options)
+
+
+def _js_numbers(value):
+    # Match the JavaScript-produced reports, where integral floats are written without '.0'
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, dict):
+        return {key: _js_numbers(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_js_numbers(item) for item in value]
+    return value
+
+
+def write_report(report, output_file):
+    json.dump(_js_numbers(report), output_file, indent=2, ensure_ascii=False)
+
+
+def default_report_path(path):
+    root, _ = os.path.splitext(path)
+    return f"{root}_analysis.json"
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog,
+                                     description="Write a *_analysis.json report for a processed dataset.")
+    parser.add_argument("input", help="a JSON array of records, e.g. *_processed.json")
+    parser.add_argument("-o", "--output", help="report path (default: <input>_analysis.json)")
+    parser.add_argument("--exact-limit", type=int, default=DEFAULT_EXACT_LIMIT)
+    args = parser.parse_args(argv)
+
+    report = analyze_file(args.input, exact_limit=args.exact_limit)
+    with open(args.output or default_report_path(args.input), "w", encoding="utf-8") as handle:
+        write_report(report, handle)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+import asyncio
+import json
+import random
+import ssl
+import time
+from urllib.parse import urlsplit
+
+from optimized_product_optimizer import compose_description
+
+DEFAULT_MAX_CONCURRENCY = 16
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+DEFAULT_MAX_BACKOFF = 20.0
+# Statuses worth retrying: rate limited, or the backend is temporarily unavailable
+RETRYABLE_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+SYSTEM_PROMPT = (
+    "You write product descriptions for Shopee listings. Keep every fact from the seller's text, "
+    "do not invent features, and answer with the description only."
+)
+
+
+class BackendError(Exception):
+    """Raised by a backend for a failed generation request."""
+
+    def __init__(self, message, status=None, retryable=False):
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+
+
+def build_prompt(description, title=None):
+    """
+    Build the user prompt for one listing.
+
+    Parameters:
+    description (str): The seller's description.
+    title (str): The listing title, if known. Default is None.
+
+    Returns:
+    str: The prompt text.
+    """
+    lines = []
+    if title:
+        lines.append(f"Product title: {title.strip()}")
+    lines.append("Seller description:")
+    lines.append(description.strip())
+    lines.append("")
+    lines.append("Rewrite this as an SEO-friendly product description.")
+    return "\n".join(lines)
+
+
+class DescriptionBackend:
+    """Interface for description backends; subclasses implement generate."""
+
+    async def generate(self, prompt, description):
+        """
+        Generate one description.
+
+        Parameters:
+        prompt (str): The prompt built by build_prompt.
+        description (str): The original description, for backends that do not use prompts.
+
+        Returns:
+        str: The generated description.
+        """
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class TemplateBackend(DescriptionBackend):
+    """Offline backend that uses the built-in filler template (compose_description)."""
+
+    def __init__(self, default_word_count=1500, max_word_count=2000):
+        self.default_word_count = default_word_count
+        self.max_word_count = max_word_count
+
+    async def generate(self, prompt, description):
+        return compose_description(description, self.default_word_count, self.max_word_count)
+
+
+class ChatCompletionsBackend(DescriptionBackend):
+    """
+    Backend for an OpenAI-style /chat/completions HTTP endpoint.
+
+    Uses a plain asyncio connection per request, so no HTTP client library is
+    needed. Works against hosted APIs and against description_stub_server.py.
+    """
+
+    def __init__(self, url, model="gpt-4o-mini", api_key=None, temperature=0.7, max_tokens=1024,
+                 system_prompt=SYSTEM_PROMPT):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"unsupported URL scheme: {url}")
+        self.url = url
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self.ssl = ssl.create_default_context() if parts.scheme == "https" else None
+        self.model = model
+        self.api_key = api_key
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.system_prompt = system_prompt
+
+    async def generate(self, prompt, description):
+        body = json.dumps({
+            "model": self.model,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "messages": [
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": prompt},
+            ],
+        }).encode("utf-8")
+        status, payload = await self._post(body)
+        if status != 200:
+            raise BackendError(f"backend returned HTTP {status}", status, status in RETRYABLE_STATUSES)
+        try:
+            return json.loads(payload)["choices"][0]["message"]["content"].strip()
+        except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+            raise BackendError("malformed backend response", status) from None
+
+    async def _post(self, body):
+        headers = [
+            f"POST {self.path} HTTP/1.1",
+            f"Host: {self.host}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            "Connection: close",
+        ]
+        if self.api_key:
+            headers.append(f"Authorization: Bearer {self.api_key}")
+        reader, writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+        try:
+            writer.write("\r\n".join(headers).encode("latin-1") + b"\r\n\r\n" + body)
+            await writer.drain()
+            return await _read_response(reader)
+        finally:
+            writer.close()
+
+
+async def _read_response(reader):
+    status_line = await reader.readline()
+    try:
+        status = int(status_line.split()[1])
+    except (IndexError, ValueError):
+        raise BackendError("malformed HTTP response", retryable=True) from None
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        parts = []
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            if not size:
+                break
+            parts.append(await reader.readexactly(size))
+            await reader.readline()
+        return status, b"".join(parts)
+    if "content-length" in headers:
+        return status, await reader.readexactly(int(headers["content-length"]))
+    return status, await reader.read()
+
+
+class TokenBucket:
+    """
+    Async token-bucket rate limiter.
+
+    Tokens refill continuously at rate per second up to capacity; acquire
+    waits until a token is available.
+    """
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        # The lock keeps waiters in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class DescriptionGenerator:
+    """
+    Generate descriptions concurrently through a backend.
+
+    At most max_concurrency requests are in flight, requests are started no
+    faster than rate per second (when set), identical inputs in flight at the
+    same time share one backend call, and failed calls are retried with
+    exponential backoff and full jitter. Each attempt is bounded by timeout.
+    """
+
+    def __init__(self, backend, max_concurrency=DEFAULT_MAX_CONCURRENCY, rate=None, burst=None,
+                 timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF,
+                 max_backoff=DEFAULT_MAX_BACKOFF, fallback=None):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.backend = backend
+        self.max_concurrency = max_concurrency
+        self.rate = rate
+        self.burst = burst
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.fallback = fallback
+        self.stats = {"requests": 0, "backend_calls": 0, "coalesced": 0, "retries": 0, "failures": 0}
+        self._semaphore = None
+        self._bucket = None
+        self._in_flight = {}
+
+    def _limits(self):
+        # Created lazily so they bind to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            if self.rate:
+                self._bucket = TokenBucket(self.rate, self.burst)
+        return self._semaphore, self._bucket
+
+    async def generate(self, description, title=None):
+        """
+        Generate the description for one listing.
+
+        Parameters:
+        description (str): The seller's description.
+        title (str): The listing title, if known. Default is None.
+
+        Returns:
+        str: The generated description, or the fallback's result if every attempt failed
+            and a fallback is set.
+
+        Raises:
+        BackendError, asyncio.TimeoutError, OSError: If every attempt failed and there is no fallback.
+        """
+        self.stats["requests"] += 1
+        prompt = build_prompt(description, title)
+        task = self._in_flight.get(prompt)
+        if task is None:
+            task = asyncio.ensure_future(self._generate_once(prompt, description))
+            self._in_flight[prompt] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(prompt, None))
+        else:
+            self.stats["coalesced"] += 1
+        # Shielded so one cancelled caller does not cancel the call shared with the others
+        return await asyncio.shield(task)
+
+    async def _generate_once(self, prompt, description):
+        semaphore, bucket = self._limits()
+        attempt = 0
+        while True:
+            try:
+                async with semaphore:
+                    if bucket is not None:
+                        await bucket.acquire()
+                    self.stats["backend_calls"] += 1
+                    return await asyncio.wait_for(self.backend.generate(prompt, description), self.timeout)
+            except (BackendError, asyncio.TimeoutError, OSError, asyncio.IncompleteReadError) as error:
+                retryable = not isinstance(error, BackendError) or error.retryable
+                if not retryable or attempt >= self.retries:
+                    self.stats["failures"] += 1
+                    if self.fallback is not None:
+                        return self.fallback(description)
+                    raise
+            attempt += 1
+            self.stats["retries"] += 1
+            # Full jitter keeps retrying clients from hitting the backend in lockstep
+            await asyncio.sleep(random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt)))
+
+    async def generate_many(self, descriptions, titles=None):
+        """
+        Generate descriptions for many listings concurrently.
+
+        Parameters:
+        descriptions (iterable): The seller descriptions.
+        titles (iterable): Matching listing titles, if known. Default is None.
+
+        Returns:
+        list: The generated descriptions, in input order.
+        """
+        descriptions = list(descriptions)
+        titles = list(titles) if titles is not None else [None] * len(descriptions)
+        return await asyncio.gather(*(
+            self.generate(description, title) for description, title in zip(descriptions, titles)
+        ))
+
+
+def generate_descriptions(descriptions, backend=None, titles=None, **options):
+    """
+    Synchronous entry point: generate descriptions for a list of listings.
+
+    Parameters:
+    descriptions (iterable): The seller descriptions.
+    backend (DescriptionBackend): The backend to use. Default is the offline TemplateBackend.
+    titles (iterable): Matching listing titles, if known. Default is None.
+    **options: Passed to DescriptionGenerator (max_concurrency, rate, timeout, retries, fallback, ...).
+
+    Returns:
+    list: The generated descriptions, in input order.
+    """
+    backend = backend or TemplateBackend()
+
+    async def run():
+        try:
+            return await DescriptionGenerator(backend, **options).generate_many(descriptions, titles)
+        finally:
+            await backend.close()
+
+    return asyncio.run(run())
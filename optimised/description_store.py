@@ -0,0 +1,184 @@
+import json
+
+from optimized_product_optimizer import FILLER_FRAGMENTS, plan_description, render_description
+from result_cache import DESCRIPTION_VERSION
+
+FORMAT = "compact-descriptions"
+
+
+class BlockTable:
+    """
+    The shared filler blocks descriptions refer to, plus interned block sequences.
+
+    Almost every padded description uses one of a handful of block sequences,
+    so each distinct sequence is stored once and shared by all descriptions
+    that use it.
+    """
+
+    def __init__(self, fragments=FILLER_FRAGMENTS, version=DESCRIPTION_VERSION):
+        self.fragments = list(fragments)
+        self.version = version
+        self._sequences = {}
+
+    @classmethod
+    def from_texts(cls, texts, version=None):
+        fragments = []
+        for text in texts:
+            words = tuple(text.split())
+            fragments.append((text, len(words), words))
+        return cls(fragments, version)
+
+    @property
+    def texts(self):
+        return [text for text, _, _ in self.fragments]
+
+    def intern(self, blocks):
+        # Block indexes fit in a byte, so a sequence is a small immutable bytes object
+        sequence = bytes(blocks)
+        return self._sequences.setdefault(sequence, sequence)
+
+
+DEFAULT_TABLE = BlockTable()
+
+
+class CompactDescription:
+    """
+    An optimized description stored as the product's own text plus references to filler blocks.
+
+    The full text is only built by render() (or str()), which returns exactly
+    what compose_description would have.
+    """
+
+    __slots__ = ("text", "blocks", "word_limit", "table")
+
+    def __init__(self, text, blocks, word_limit=None, table=DEFAULT_TABLE):
+        self.text = text
+        self.blocks = table.intern(blocks)
+        self.word_limit = word_limit
+        self.table = table
+
+    def render(self):
+        return render_description(self.text, self.blocks, self.word_limit, self.table.fragments)
+
+    __str__ = render
+
+    def __eq__(self, other):
+        if not isinstance(other, CompactDescription):
+            return NotImplemented
+        return self.render() == other.render()
+
+    def __hash__(self):
+        return hash(self.render())
+
+    def __repr__(self):
+        return f"CompactDescription({self.text!r}, blocks={list(self.blocks)}, word_limit={self.word_limit})"
+
+
+def compact_description(description, default_word_count=1500, max_word_count=2000, table=DEFAULT_TABLE):
+    """
+    Optimize a description into its compact form.
+
+    Parameters:
+    description (str): The product description to optimize.
+    default_word_count (int): Passed to plan_description. Default is 1500.
+    max_word_count (int): Passed to plan_description. Default is 2000.
+    table (BlockTable): The table holding the interned block sequences. Default is DEFAULT_TABLE.
+
+    Returns:
+    CompactDescription: The optimized description, rendered on demand.
+    """
+    text, blocks, word_limit = plan_description(description, default_word_count, max_word_count)
+    return CompactDescription(text, blocks, word_limit, table)
+
+
+def compact_descriptions(descriptions, default_word_count=1500, max_word_count=2000, table=DEFAULT_TABLE):
+    """
+    Compact counterpart of optimize_descriptions.
+
+    Parameters:
+    descriptions (iterable): The product descriptions to optimize.
+    default_word_count (int): Passed to plan_description. Default is 1500.
+    max_word_count (int): Passed to plan_description. Default is 2000.
+    table (BlockTable): The table holding the interned block sequences. Default is DEFAULT_TABLE.
+
+    Returns:
+    list: CompactDescription objects; str() of each equals the optimize_descriptions output.
+    """
+    return [
+        compact_description(description, default_word_count, max_word_count, table)
+        for description in descriptions
+    ]
+
+
+def write_compact(descriptions, output_file, table=DEFAULT_TABLE):
+    """
+    Serialize compact descriptions as JSON lines without rendering them.
+
+    The first line holds the block texts. Each distinct block sequence is
+    written once, as a {"sequence": [...]} line before its first use, and
+    each description is a [text, sequence number, word limit] line.
+
+    Parameters:
+    descriptions (iterable): CompactDescription objects built with table.
+    output_file (file): A text file object opened for writing.
+    table (BlockTable): The table the descriptions refer to. Default is DEFAULT_TABLE.
+
+    Returns:
+    int: The number of descriptions written.
+    """
+    header = {"format": FORMAT, "version": table.version, "blocks": table.texts}
+    output_file.write(json.dumps(header, ensure_ascii=False) + "\n")
+    sequence_ids = {}
+    count = 0
+    for description in descriptions:
+        if description.table is not table:
+            raise ValueError("description refers to a different block table")
+        sequence_id = sequence_ids.get(description.blocks)
+        if sequence_id is None:
+            sequence_id = sequence_ids[description.blocks] = len(sequence_ids)
+            output_file.write(json.dumps({"sequence": list(description.blocks)}) + "\n")
+        record = [description.text, sequence_id, description.word_limit]
+        output_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        count += 1
+    return count
+
+
+def read_compact(input_file):
+    """
+    Lazily read descriptions written by write_compact.
+
+    The block texts come from the file itself, so files stay readable after
+    the fillers in optimized_product_optimizer.py change.
+
+    Parameters:
+    input_file (file): A text file object opened for reading.
+
+    Returns:
+    generator: CompactDescription objects.
+    """
+    header = json.loads(input_file.readline() or "null")
+    if not isinstance(header, dict) or header.get("format") != FORMAT:
+        raise ValueError("not a compact description file")
+    table = BlockTable.from_texts(header["blocks"], header.get("version"))
+    sequences = []
+    for line in input_file:
+        record = json.loads(line)
+        if isinstance(record, dict):
+            sequences.append(record["sequence"])
+            continue
+        text, sequence_id, word_limit = record
+        yield CompactDescription(text, sequences[sequence_id], word_limit, table)
+
+
+def export_descriptions(descriptions):
+    """
+    Render compact descriptions to plain text, one at a time.
+
+    Parameters:
+    descriptions (iterable): CompactDescription objects.
+
+    Returns:
+    generator: The full description strings.
+    """
+    for description in descriptions:
+        yield description.render()
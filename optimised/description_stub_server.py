@@ -0,0 +1,116 @@
+import argparse
+import asyncio
+import json
+
+from optimized_product_optimizer import compose_description
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8766
+
+
+class StubServer:
+    """
+    Local stand-in for an OpenAI-style /chat/completions endpoint.
+
+    Answers every request with the built-in template applied to the seller
+    description found in the prompt. latency delays each answer and
+    fail_first makes the first requests fail with 503, to exercise timeouts
+    and retries without network access.
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=0, latency=0.0, fail_first=0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.fail_first = fail_first
+        self.requests = 0
+        self._server = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/v1/chat/completions"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _handle(self, reader, writer):
+        try:
+            await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.strip().lower() == "content-length":
+                    length = int(value)
+            body = await reader.readexactly(length)
+
+            self.requests += 1
+            if self.requests <= self.fail_first:
+                status, payload = 503, {"error": {"message": "stub backend unavailable"}}
+            else:
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                status, payload = 200, self._completion(json.loads(body))
+
+            data = json.dumps(payload).encode("utf-8")
+            writer.write(
+                f"HTTP/1.1 {status} {'OK' if status == 200 else 'Service Unavailable'}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                "Connection: close\r\n\r\n".encode("latin-1") + data
+            )
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _completion(self, request):
+        prompt = request["messages"][-1]["content"]
+        # The seller description sits between build_prompt's header and closing instruction
+        description = prompt.split("Seller description:\n", 1)[-1].rsplit("\n\n", 1)[0]
+        return {
+            "object": "chat.completion",
+            "model": request.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": compose_description(description)},
+                "finish_reason": "stop",
+            }],
+        }
+
+
+async def _serve(host, port, latency, fail_first):
+    async with StubServer(host, port, latency, fail_first) as server:
+        print(f"Stub backend listening on {server.url}")
+        await server._server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local stub of a chat-completions backend.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to wait before each answer")
+    parser.add_argument("--fail-first", type=int, default=0, help="answer the first N requests with 503")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_serve(args.host, args.port, args.latency, args.fail_first))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
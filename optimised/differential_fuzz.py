@@ -0,0 +1,312 @@
+import argparse
+import importlib
+import json
+import random
+import sys
+import time
+from functools import partial
+
+from title_rules import TITLE_RULES, compile_rules
+
+# Known implementations of optimize_titles, as "module:function"
+IMPLEMENTATIONS = {
+    "product_optimizer": "optimized_product_optimizer:optimize_titles",
+    "refactored": "Refactored:optimize_titles",
+    "desc": "Desc:optimize_titles",
+    "titles_gpt": "optimized_titles_gpt:optimize_titles",
+    "description_gpt": "optimized_description_gpt:optimize_titles",
+}
+
+DEFAULT_CASES = 100000
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_MAX_DIVERGENCES = 10
+# Predicate evaluations allowed while minimizing one divergence
+DEFAULT_MINIMIZE_BUDGET = 5000
+
+SEED_TITLES = [
+    "[FAST 24/7] SciSpace Typeset Premium | AI Copilot research | ChatGPT Alternative",
+    "Private ChatGPT Plus Account + Warranty",
+    "3u ChatGPT 4 Plus Sharing",
+    "ChatGPT Masterclass - Beginner to Pro",
+    "[CHEAPEST] Turnitin Instructor Account - No Repository",
+    "Turnitin AI Detection Checker",
+    "OFFICE PROJET VSIO PRO PLUS 365 2021 2019 2016 2013 2010 PC SOFWARE | ORlGINAL",
+    "Canva Pro Lifetime Premium Upgrade Own Account",
+]
+KEYWORDS = sorted({rule["pattern"] for rule in TITLE_RULES} | {"CHEAPEST", "Plus", "Premium", "GPT-4"})
+SEPARATOR_PIECES = ["|", " | ", "-", " - ", "+", "[", "]", ",", " ", "  ", "/", "&"]
+# Characters that stress normalization: styled and full-width letters, look-alikes,
+# invisible and combining characters, emoji, bidi controls and whitespace variants
+UNICODE_PIECES = [
+    "𝘾𝙝𝙖𝙩𝙂𝙋𝙏", "ＣｈａｔＧＰＴ", "Сhаt", "Тurnitin", "​", "‍", "﻿", "­", "é", "é",
+    "ß", "İ", "ﬁ", "🔥", "✅", "‮", " ", "\t", "\n", "ا", "中文",
+]
+MAX_LENGTHS = [0, 1, 2, 3, 4, 5, 10, 20, 50, 60, 80, 100, 150, 199, 200, 201, 255]
+SEPARATORS = ["/", "-", "", " ", "||", "—", "\\", "{sep}"]
+
+
+def load_implementation(spec):
+    """
+    Resolve an implementation name or "module:function" spec to a callable.
+
+    'product_optimizer:exact' selects optimize_titles with plain substring
+    matching (no normalization or fuzzy fallback), the closest match to the
+    legacy copies.
+
+    Parameters:
+    spec (str): A key of IMPLEMENTATIONS, 'product_optimizer:exact', or 'module:function'.
+
+    Returns:
+    callable: A function with the optimize_titles(titles, max_length, separator) signature.
+    """
+    if spec == "product_optimizer:exact":
+        optimize_titles = load_implementation("product_optimizer")
+        return partial(optimize_titles, matcher=compile_rules(normalize=False, fuzzy_threshold=None))
+    module_name, _, function_name = IMPLEMENTATIONS.get(spec, spec).partition(":")
+    if not function_name:
+        raise ValueError(f"Unknown implementation {spec!r}; expected one of {sorted(IMPLEMENTATIONS)} or module:function")
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def generate_cases(count, seed=0, titles=SEED_TITLES):
+    """
+    Generate (title, max_length, separator) cases for differential testing.
+
+    Titles are real-looking titles, keyword soups, Unicode-heavy strings and
+    titles padded to within a few characters of max_length, each then
+    mutated a few times (inserted, deleted and duplicated characters, case
+    changes, injected keywords and separators). Most cases use the default
+    max_length and separator; the rest cover boundary values.
+
+    Parameters:
+    count (int): The number of cases.
+    seed (int): The random seed. Default is 0.
+    titles (list): Seed titles. Default is SEED_TITLES.
+
+    Returns:
+    generator: (title, max_length, separator) tuples.
+    """
+    rng = random.Random(seed)
+    for _ in range(count):
+        max_length = 200 if rng.random() < 0.7 else rng.choice(MAX_LENGTHS)
+        separator = "|" if rng.random() < 0.85 else rng.choice(SEPARATORS)
+
+        kind = rng.random()
+        if kind < 0.35:
+            title = rng.choice(titles)
+        elif kind < 0.6:
+            pieces = KEYWORDS + SEPARATOR_PIECES + ["Account", "Warranty", "1 Month", "Shared"]
+            title = "".join(rng.choice(pieces) + rng.choice(["", " "]) for _ in range(rng.randint(0, 8)))
+        elif kind < 0.75:
+            title = "".join(rng.choice(UNICODE_PIECES + KEYWORDS + [" "]) for _ in range(rng.randint(1, 10)))
+        else:
+            # Inputs whose length straddles max_length exercise the truncation branches
+            title = rng.choice(titles)
+            target = max(0, max_length + rng.randint(-4, 4))
+            title = (title * (target // max(1, len(title)) + 1))[:target]
+
+        for _ in range(rng.randint(0, 3)):
+            title = _mutate(title, rng)
+        yield title, max_length, separator
+
+
+def _mutate(title, rng):
+    position = rng.randint(0, len(title))
+    operation = rng.randrange(6)
+    if operation == 0:
+        return title[:position] + rng.choice(UNICODE_PIECES) + title[position:]
+    if operation == 1:
+        return title[:position] + rng.choice(SEPARATOR_PIECES) + title[position:]
+    if operation == 2:
+        return title[:position] + rng.choice(KEYWORDS) + title[position:]
+    if operation == 3 and title:
+        end = min(len(title), position + rng.randint(1, 5))
+        return title[:position] + title[end:]
+    if operation == 4:
+        end = min(len(title), position + rng.randint(1, 10))
+        return title[:position] + title[position:end].swapcase() + title[end:]
+    end = min(len(title), position + rng.randint(1, 10))
+    return title[:end] + title[position:end] + title[end:]
+
+
+def _outputs(func, titles, max_length, separator):
+    # An exception is an output too; fall back to one call per title to attribute it
+    try:
+        return func(titles, max_length, separator)
+    except Exception:
+        results = []
+        for title in titles:
+            try:
+                results.append(func([title], max_length, separator)[0])
+            except Exception as error:
+                results.append(f"<{type(error).__name__}>")
+        return results
+
+
+def minimize(title, diverges, budget=DEFAULT_MINIMIZE_BUDGET):
+    """
+    Shrink a diverging title with delta debugging (ddmin) over its characters.
+
+    Parameters:
+    title (str): A title for which diverges(title) is True.
+    diverges (callable): Returns True while the implementations still disagree.
+    budget (int): The maximum number of diverges calls. Default is 5000.
+
+    Returns:
+    str: A 1-minimal diverging title (removing any single character makes the
+        divergence disappear), unless the budget ran out first.
+    """
+    calls = 0
+    granularity = 2
+    while len(title) >= 2 and calls < budget:
+        chunk = max(1, len(title) // granularity)
+        reduced = False
+        for start in range(0, len(title), chunk):
+            candidate = title[:start] + title[start + chunk:]
+            calls += 1
+            if diverges(candidate):
+                title = candidate
+                granularity = max(granularity - 1, 2)
+                reduced = True
+                break
+            if calls >= budget:
+                break
+        if not reduced:
+            if chunk == 1:
+                break
+            granularity = min(len(title), granularity * 2)
+    if len(title) == 1 and calls < budget and diverges(""):
+        title = ""
+    return title
+
+
+def run_differential(reference, candidate, cases, batch_size=DEFAULT_BATCH_SIZE,
+                     max_divergences=DEFAULT_MAX_DIVERGENCES, minimize_budget=DEFAULT_MINIMIZE_BUDGET):
+    """
+    Compare two optimize_titles implementations over many cases.
+
+    Cases are run in batches through both sides (grouped by max_length and
+    separator, so both sides see the batched API), and every divergence is
+    minimized to a short reproducer. Reproducers giving the same pair of
+    outputs are reported once, with a count.
+
+    Parameters:
+    reference (callable): The trusted implementation.
+    candidate (callable): The implementation under test.
+    cases (iterable): (title, max_length, separator) tuples, e.g. from generate_cases.
+    batch_size (int): Cases per batch. Default is 1000.
+    max_divergences (int): Stop after this many distinct reproducers (0 for no limit). Default is 10.
+    minimize_budget (int): Predicate calls allowed per minimization. Default is 5000.
+
+    Returns:
+    dict: cases, seconds and titles_per_second for each side, and divergences (reproducer,
+        original title, parameters, both outputs and the number of occurrences).
+    """
+    timings = {"reference": 0.0, "candidate": 0.0}
+    divergences = {}
+    total = 0
+    batch = []
+    iterator = iter(cases)
+    while True:
+        batch.clear()
+        for case in iterator:
+            batch.append(case)
+            if len(batch) >= batch_size:
+                break
+        if not batch:
+            break
+        total += len(batch)
+
+        groups = {}
+        for title, max_length, separator in batch:
+            groups.setdefault((max_length, separator), []).append(title)
+        for (max_length, separator), titles in groups.items():
+            start = time.perf_counter()
+            expected = _outputs(reference, titles, max_length, separator)
+            timings["reference"] += time.perf_counter() - start
+            start = time.perf_counter()
+            actual = _outputs(candidate, titles, max_length, separator)
+            timings["candidate"] += time.perf_counter() - start
+
+            for title, left, right in zip(titles, expected, actual):
+                if left == right:
+                    continue
+                diverges = partial(_diverges, reference, candidate, max_length, separator)
+                reproducer = minimize(title, diverges, minimize_budget)
+                reference_output = _outputs(reference, [reproducer], max_length, separator)[0]
+                candidate_output = _outputs(candidate, [reproducer], max_length, separator)[0]
+                # Reproducers that yield the same pair of outputs are the same bug
+                key = (max_length, separator, reference_output, candidate_output)
+                if key in divergences:
+                    divergences[key]["occurrences"] += 1
+                    continue
+                divergences[key] = {
+                    "reproducer": reproducer,
+                    "title": title,
+                    "max_length": max_length,
+                    "separator": separator,
+                    "reference": reference_output,
+                    "candidate": candidate_output,
+                    "occurrences": 1,
+                }
+                if max_divergences and len(divergences) >= max_divergences:
+                    return _report(total, timings, divergences)
+    return _report(total, timings, divergences)
+
+
+def _diverges(reference, candidate, max_length, separator, title):
+    return _outputs(reference, [title], max_length, separator) != _outputs(candidate, [title], max_length, separator)
+
+
+def _report(total, timings, divergences):
+    return {
+        "cases": total,
+        "reference": _throughput(total, timings["reference"]),
+        "candidate": _throughput(total, timings["candidate"]),
+        "divergences": list(divergences.values()),
+    }
+
+
+def _throughput(total, seconds):
+    return {"seconds": seconds, "titles_per_second": total / seconds if seconds else float("inf")}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Differentially fuzz two optimize_titles implementations.")
+    parser.add_argument("--reference", default="refactored",
+                        help=f"one of {sorted(IMPLEMENTATIONS)}, product_optimizer:exact or module:function "
+                             "(default: %(default)s)")
+    parser.add_argument("--candidate", default="product_optimizer:exact")
+    parser.add_argument("--cases", type=int, default=DEFAULT_CASES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--max-divergences", type=int, default=DEFAULT_MAX_DIVERGENCES,
+                        help="stop after this many distinct reproducers, 0 for no limit (default: %(default)s)")
+    parser.add_argument("--json", action="store_true", help="print the full report as JSON")
+    args = parser.parse_args(argv)
+
+    report = run_differential(
+        load_implementation(args.reference),
+        load_implementation(args.candidate),
+        generate_cases(args.cases, args.seed),
+        batch_size=args.batch_size,
+        max_divergences=args.max_divergences,
+    )
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print(f"{report['cases']} cases")
+        for side in ("reference", "candidate"):
+            print(f"{side:<10} {report[side]['titles_per_second']:>12,.0f} titles/s")
+        for divergence in report["divergences"]:
+            print(
+                f"DIVERGENCE x{divergence['occurrences']} max_length={divergence['max_length']} "
+                f"separator={divergence['separator']!r} title={divergence['reproducer']!r}\n"
+                f"  reference: {divergence['reference']!r}\n"
+                f"  candidate: {divergence['candidate']!r}"
+            )
+    return 1 if report["divergences"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+import re
+from collections import defaultdict
+
+from text_normalization import normalize_for_matching
+
+DEFAULT_THRESHOLD = 0.85
+# Names shorter than this are too easy to hit by accident and are only matched exactly
+DEFAULT_MIN_LENGTH = 5
+
+_NON_ALNUM = re.compile(r"[\W_]+")
+_NUMBER = re.compile(r"\d+")
+
+
+def squeeze(text):
+    """
+    Reduce text to its normalized letters and digits, so 'Chat Gpt-4' and 'chatgpt4' compare equal.
+
+    Parameters:
+    text (str): The text to squeeze.
+
+    Returns:
+    str: The normalized text with all spacing and punctuation removed.
+    """
+    return _NON_ALNUM.sub("", normalize_for_matching(text))
+
+
+def numbers(text):
+    """
+    Return the digit runs of normalized text, so 'GPT4.0' gives {'4', '0'}.
+
+    Parameters:
+    text (str): The text to scan.
+
+    Returns:
+    set: The numbers written in the text.
+    """
+    return set(_NUMBER.findall(normalize_for_matching(text)))
+
+
+def trigrams(text):
+    return {text[index:index + 3] for index in range(len(text) - 2)}
+
+
+def substring_distance(pattern, text):
+    """
+    Smallest edit distance between pattern and any substring of text.
+
+    Uses Myers' bit-parallel algorithm, which is linear in the length of the
+    text for patterns of any length.
+
+    Parameters:
+    pattern (str): The pattern to look for.
+    text (str): The text to search in.
+
+    Returns:
+    int: The minimum number of insertions, deletions and substitutions.
+    """
+    length = len(pattern)
+    if not length:
+        return 0
+    peq = {}
+    for index, char in enumerate(pattern):
+        peq[char] = peq.get(char, 0) | (1 << index)
+
+    full = (1 << length) - 1
+    high = 1 << (length - 1)
+    pv = full
+    mv = 0
+    score = best = length
+    for char in text:
+        eq = peq.get(char, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = (mv | ~(xh | pv)) & full
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        # A match may start anywhere in the text, so no carry is shifted in
+        ph = (ph << 1) & full
+        mh = (mh << 1) & full
+        pv = (mh | ~(xv | ph)) & full
+        mv = ph & xv
+        if score < best:
+            best = score
+            if not best:
+                break
+    return best
+
+
+class FuzzyClassifier:
+    """
+    Approximate matcher of titles against a set of canonical names.
+
+    Names are indexed by character trigram. A title only looks up its own
+    trigrams, so the cost depends on the title and on the names sharing
+    trigrams with it, not on the total number of names. Candidates that pass
+    the q-gram count filter are verified with a bounded edit distance. A name
+    containing numbers ('3u ChatGPT') only matches titles that write those
+    numbers, since one edited digit changes the product ('5u ChatGPT').
+    """
+
+    def __init__(self, names, threshold=DEFAULT_THRESHOLD, min_length=DEFAULT_MIN_LENGTH):
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+        self.names = list(names)
+        self.threshold = threshold
+        self.min_length = min_length
+        self._squeezed = [squeeze(name) for name in self.names]
+        self._numbers = [numbers(name) for name in self.names]
+        self._index = defaultdict(list)
+        self._required_grams = []
+        for name_id, name in enumerate(self._squeezed):
+            max_edits = int(len(name) * (1 - threshold))
+            # q-gram lemma: k edits destroy at most 3k of the name's trigrams
+            self._required_grams.append(max(1, len(name) - 2 - 3 * max_edits))
+            if len(name) >= min_length:
+                for gram in trigrams(name):
+                    self._index[gram].append(name_id)
+
+    def scores(self, title):
+        """
+        Return the confidence of every name that approximately occurs in the title.
+
+        Parameters:
+        title (str): The product title.
+
+        Returns:
+        dict: Name index to confidence (1 - edits / name length) for names at or above the threshold.
+        """
+        text = squeeze(title)
+        shared = defaultdict(int)
+        for gram in trigrams(text):
+            for name_id in self._index.get(gram, ()):
+                shared[name_id] += 1
+
+        results = {}
+        title_numbers = None
+        for name_id, count in shared.items():
+            if count < self._required_grams[name_id]:
+                continue
+            if self._numbers[name_id]:
+                if title_numbers is None:
+                    title_numbers = numbers(title)
+                if not self._numbers[name_id] <= title_numbers:
+                    continue
+            name = self._squeezed[name_id]
+            confidence = 1 - substring_distance(name, text) / len(name)
+            if confidence >= self.threshold:
+                results[name_id] = confidence
+        return results
+
+    def classify(self, title):
+        """
+        Return the best-matching canonical name for a title.
+
+        Parameters:
+        title (str): The product title.
+
+        Returns:
+        tuple or None: (name, confidence) for the highest-confidence (then longest) name, or None.
+        """
+        scores = self.scores(title)
+        if not scores:
+            return None
+        best = max(scores, key=lambda name_id: (scores[name_id], len(self._squeezed[name_id])))
+        return self.names[best], scores[best]
@@ -0,0 +1,497 @@
+import argparse
+import hashlib
+import http.client
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlsplit
+
+from image_codec import ImageError, open_image
+from listing import read_records
+from parallel_optimizer import parallel_optimize
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_TIMEOUT = 30
+DEFAULT_THUMBNAIL_SIZE = 128
+MAX_REDIRECTS = 5
+# Thumbnails are only decoded in worker processes when there are at least this many to make
+THUMBNAIL_INLINE_THRESHOLD = 4
+# Ask CDNs for formats image_codec can decode (Shopee serves WebP to clients that accept it)
+ACCEPT = "image/jpeg,image/png;q=0.9"
+USER_AGENT = "product-optimizer-image-cache/1.0"
+IMAGE_FIELDS = {"thumbnail": ("thumbnail_url",), "image": ("image_url",), "both": ("thumbnail_url", "image_url")}
+_REDIRECT_STATUSES = frozenset((301, 302, 303, 307, 308))
+
+
+class FetchError(Exception):
+    """Raised when an image cannot be downloaded."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+def is_remote(url):
+    return url.startswith(("http://", "https://"))
+
+
+def index_key(url):
+    """
+    Return the key under which an image source is indexed.
+
+    URLs are their own key. Local paths also carry the file's modification
+    time and size, so a file overwritten in place is read again.
+
+    Parameters:
+    url (str): An image URL or a local path.
+
+    Returns:
+    str or None: The key, or None for a local file that cannot be stat'ed.
+    """
+    if is_remote(url):
+        return url
+    try:
+        status = os.stat(url)
+    except OSError:
+        return None
+    return f"{url}\0{status.st_mtime_ns}:{status.st_size}"
+
+
+def listing_image_urls(source, fields=IMAGE_FIELDS["both"], profile="auto"):
+    """
+    Stream the image URLs of a listings file, each distinct URL once.
+
+    Parameters:
+    source (str): A .csv export or a scraped JSON array (see listing.read_records).
+    fields (tuple): The Listing attributes to read. Default is thumbnail_url and image_url.
+    profile (str or dict): The scrape profile for JSON files. Default is 'auto'.
+
+    Returns:
+    generator: Image URLs in first-seen order.
+    """
+    seen = set()
+    for listing, _ in read_records(source, profile):
+        for field in fields:
+            url = getattr(listing, field)
+            if url and url not in seen:
+                seen.add(url)
+                yield url
+
+
+def make_thumbnails(jobs, size=DEFAULT_THUMBNAIL_SIZE):
+    """
+    Decode images and write their thumbnails; the unit of work sent to pool workers.
+
+    Parameters:
+    jobs (list): (image path, thumbnail path) pairs.
+    size (int): The longest side of a thumbnail. Default is 128.
+
+    Returns:
+    list: None for each thumbnail written, or the error message for images that cannot be decoded.
+    """
+    results = []
+    for source, target in jobs:
+        try:
+            # Draft decoding lets JPEGs skip straight to 1/2, 1/4 or 1/8 scale
+            image = open_image(source, draft=(size, size))
+        except ImageError as error:
+            results.append(str(error))
+            continue
+        _write_atomic(target, image.fit(size).to_png())
+        results.append(None)
+    return results
+
+
+def _write_atomic(path, data):
+    fd, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+class ImageCache:
+    """
+    Content-addressed on-disk store of listing images and their thumbnails.
+
+    Images are kept once per SHA-256 digest under objects/, whatever URLs they
+    were fetched from, and a SQLite index maps each URL to its digest so a URL
+    is downloaded once across runs. Downloads run on a bounded thread pool whose
+    threads keep one keep-alive connection per host. Thumbnails are made on
+    first request and kept under thumbs/.
+    """
+
+    def __init__(self, directory, max_workers=DEFAULT_MAX_WORKERS, timeout=DEFAULT_TIMEOUT):
+        self.directory = directory
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.stats = {"downloaded": 0, "url_hits": 0, "duplicates": 0, "failed": 0, "connections": 0,
+                      "thumbnails": 0, "thumbnail_hits": 0}
+        self.errors = {}
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(directory, "thumbs"), exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(directory, "index.sqlite"))
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, digest TEXT NOT NULL, fetched REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS hashes ("
+            "digest TEXT NOT NULL, algorithm TEXT NOT NULL, value TEXT NOT NULL, PRIMARY KEY (digest, algorithm))"
+        )
+        self._db.commit()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+        self._executor = None
+
+    def object_path(self, digest):
+        return os.path.join(self.directory, "objects", digest[:2], digest)
+
+    def thumbnail_path(self, digest, size=DEFAULT_THUMBNAIL_SIZE):
+        return os.path.join(self.directory, "thumbs", f"{digest}-{size}.png")
+
+    def lookup_many(self, urls):
+        """
+        Find the cached digests of several URLs.
+
+        Parameters:
+        urls (list): Image URLs or local paths.
+
+        Returns:
+        dict: The digest of each URL that is already cached.
+        """
+        return self._lookup({url: index_key(url) for url in urls})
+
+    def _lookup(self, keys):
+        urls_by_key = {key: url for url, key in keys.items() if key is not None}
+        indexed = list(urls_by_key)
+        found = {}
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(indexed), 500):
+            batch = indexed[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            for key, digest in self._db.execute(f"SELECT url, digest FROM urls WHERE url IN ({placeholders})", batch):
+                found[urls_by_key[key]] = digest
+        return found
+
+    def load_hashes(self, digests, algorithm):
+        """
+        Find stored perceptual hashes (see image_hashes.py).
+
+        Parameters:
+        digests (list): Image digests.
+        algorithm (str): The hash algorithm name.
+
+        Returns:
+        dict: The hash of each digest that has one, as an int.
+        """
+        digests = list(dict.fromkeys(digests))
+        found = {}
+        for start in range(0, len(digests), 500):
+            batch = digests[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._db.execute(
+                f"SELECT digest, value FROM hashes WHERE algorithm = ? AND digest IN ({placeholders})",
+                [algorithm] + batch
+            )
+            found.update((digest, int(value, 16)) for digest, value in rows)
+        return found
+
+    def store_hashes(self, values, algorithm):
+        """
+        Keep perceptual hashes so later runs need not decode the images again.
+
+        Parameters:
+        values (dict): A mapping of image digest to hash.
+        algorithm (str): The hash algorithm name.
+        """
+        # Hex text, as SQLite integers are signed 64-bit
+        self._db.executemany(
+            "INSERT OR REPLACE INTO hashes (digest, algorithm, value) VALUES (?, ?, ?)",
+            [(digest, algorithm, format(value, "x")) for digest, value in values.items()]
+        )
+        self._db.commit()
+
+    def add_bytes(self, data):
+        """
+        Store image data under its digest, unless the same content is already stored.
+
+        Parameters:
+        data (bytes): The image file.
+
+        Returns:
+        str: The hex SHA-256 digest.
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.object_path(digest)
+        if os.path.exists(path):
+            with self._lock:
+                self.stats["duplicates"] += 1
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _write_atomic(path, data)
+        return digest
+
+    def fetch_many(self, urls):
+        """
+        Make sure every image is in the cache, downloading each missing URL once.
+
+        Local paths are read instead of downloaded, and read again once their
+        modification time or size changes. Failures are left out of the result
+        and their messages recorded in self.errors.
+
+        Parameters:
+        urls (iterable): Image URLs or local paths; repeats are fetched once.
+
+        Returns:
+        dict: The digest of each URL that is cached.
+        """
+        urls = list(dict.fromkeys(url for url in urls if url))
+        # Local files are stat'ed before they are read, so a later change is never hidden
+        keys = {url: index_key(url) for url in urls}
+        found = self._lookup(keys)
+        self.stats["url_hits"] += len(found)
+        missing = [url for url in urls if url not in found]
+        if not missing:
+            return found
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="image-fetch")
+        fetched = {}
+        for url, future in [(url, self._executor.submit(self._fetch, url)) for url in missing]:
+            try:
+                fetched[url] = future.result()
+            except (FetchError, OSError, http.client.HTTPException) as error:
+                self.errors[url] = str(error) or type(error).__name__
+                self.stats["failed"] += 1
+        if fetched:
+            now = time.time()
+            self._db.executemany(
+                "INSERT OR REPLACE INTO urls (url, digest, fetched) VALUES (?, ?, ?)",
+                [(keys[url], digest, now) for url, digest in fetched.items() if keys[url] is not None]
+            )
+            self._db.commit()
+        found.update(fetched)
+        return found
+
+    def fetch(self, url):
+        """
+        Cache one image; see fetch_many.
+
+        Parameters:
+        url (str): An image URL or a local path.
+
+        Returns:
+        str or None: The digest, or None if it could not be fetched.
+        """
+        return self.fetch_many([url]).get(url)
+
+    def _fetch(self, url):
+        if not is_remote(url):
+            with open(url, "rb") as handle:
+                return self.add_bytes(handle.read())
+        for _ in range(MAX_REDIRECTS + 1):
+            status, location, body = self._get(url)
+            if status in _REDIRECT_STATUSES and location:
+                url = urljoin(url, location)
+                continue
+            if status != 200:
+                raise FetchError(f"HTTP {status}", status)
+            with self._lock:
+                self.stats["downloaded"] += 1
+            return self.add_bytes(body)
+        raise FetchError("too many redirects")
+
+    def _get(self, url):
+        parts = urlsplit(url)
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+        headers = {"Accept": ACCEPT, "User-Agent": USER_AGENT}
+        connections = getattr(self._local, "connections", None)
+        if connections is None:
+            connections = self._local.connections = {}
+        key = (parts.scheme, parts.netloc)
+        # A reused connection may have been closed by the server while idle; retry once on a fresh one
+        for attempt in range(2):
+            connection = connections.get(key)
+            reused = connection is not None
+            if connection is None:
+                connection = self._connect(parts)
+                connections[key] = connection
+            try:
+                connection.request("GET", target, headers=headers)
+                response = connection.getresponse()
+                body = response.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                connection.close()
+                del connections[key]
+                if reused and attempt == 0:
+                    continue
+                raise
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                del connections[key]
+                raise
+            if response.will_close:
+                connection.close()
+                del connections[key]
+            return response.status, response.getheader("Location"), body
+
+    def _connect(self, parts):
+        if parts.scheme == "https":
+            connection = http.client.HTTPSConnection(parts.netloc, timeout=self.timeout)
+        else:
+            connection = http.client.HTTPConnection(parts.netloc, timeout=self.timeout)
+        with self._lock:
+            self.stats["connections"] += 1
+            self._connections.append(connection)
+        return connection
+
+    def thumbnails(self, keys, size=DEFAULT_THUMBNAIL_SIZE, max_workers=None):
+        """
+        Get thumbnails, decoding only the images that have none at this size yet.
+
+        Each distinct image is decoded at most once, in worker processes when
+        there are many. Keys that are neither cached URLs nor digests, and images
+        that cannot be decoded, are left out and recorded in self.errors.
+
+        Parameters:
+        keys (iterable): Cached URLs or local paths, or image digests.
+        size (int): The longest side of a thumbnail. Default is 128.
+        max_workers (int): Worker processes for decoding. Default is os.cpu_count().
+
+        Returns:
+        dict: The thumbnail PNG path of each key.
+        """
+        keys = list(dict.fromkeys(keys))
+        digests = self.lookup_many(keys)
+        for key in keys:
+            if key not in digests and os.path.exists(self.object_path(key)):
+                digests[key] = key
+
+        pending = {}
+        for digest in dict.fromkeys(digests.values()):
+            path = self.thumbnail_path(digest, size)
+            if os.path.exists(path):
+                self.stats["thumbnail_hits"] += 1
+            else:
+                pending[digest] = path
+        jobs = [(self.object_path(digest), path) for digest, path in pending.items()]
+        failed = {}
+        results = parallel_optimize(make_thumbnails, jobs, chunk_size=1, max_workers=max_workers,
+                                    inline_threshold=THUMBNAIL_INLINE_THRESHOLD, size=size)
+        for digest, error in zip(pending, results):
+            if error is None:
+                self.stats["thumbnails"] += 1
+            else:
+                failed[digest] = error
+
+        found = {}
+        for key in keys:
+            digest = digests.get(key)
+            if digest is None:
+                self.errors[key] = "not in the cache"
+            elif digest in failed:
+                self.errors[key] = failed[digest]
+            else:
+                found[key] = self.thumbnail_path(digest, size)
+        return found
+
+    def thumbnail(self, key, size=DEFAULT_THUMBNAIL_SIZE):
+        """
+        Get one thumbnail; see thumbnails.
+
+        Parameters:
+        key (str): A cached URL or local path, or an image digest.
+        size (int): The longest side of the thumbnail. Default is 128.
+
+        Returns:
+        str or None: The thumbnail PNG path, or None if there is none.
+        """
+        return self.thumbnails([key], size, max_workers=1).get(key)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def collect_sources(sources, fields):
+    """
+    Expand command-line sources into image URLs and paths.
+
+    Parameters:
+    sources (list): Listing files (.csv or .json), image files, or directories of images.
+    fields (tuple): The Listing attributes read from listing files.
+
+    Returns:
+    list: Distinct URLs and paths in first-seen order.
+    """
+    urls = {}
+    for source in sources:
+        if os.path.isdir(source):
+            for name in sorted(os.listdir(source)):
+                path = os.path.join(source, name)
+                if os.path.isfile(path):
+                    urls[path] = None
+        elif source.lower().endswith((".csv", ".json")):
+            urls.update(dict.fromkeys(listing_image_urls(source, fields)))
+        else:
+            urls[source] = None
+    return list(urls)
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog,
+                                     description="Fetch listing images into a shared cache and make thumbnails.")
+    parser.add_argument("sources", nargs="+",
+                        help="listing files (.csv or scraped .json), image files, or directories of images")
+    parser.add_argument("--cache", default="image_cache", help="cache directory (default: %(default)s)")
+    parser.add_argument("--fields", choices=sorted(IMAGE_FIELDS), default="both",
+                        help="image columns read from listing files (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS,
+                        help="concurrent downloads (default: %(default)s)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="seconds per request (default: %(default)s)")
+    parser.add_argument("--thumbnails", type=int, metavar="SIZE", help="also make thumbnails of at most SIZE pixels")
+    args = parser.parse_args(argv)
+
+    urls = collect_sources(args.sources, IMAGE_FIELDS[args.fields])
+    with ImageCache(args.cache, args.workers, args.timeout) as cache:
+        digests = cache.fetch_many(urls)
+        stats = cache.stats
+        print(f"{len(digests)} of {len(urls)} images cached as {len(set(digests.values()))} files "
+              f"({stats['downloaded']} downloaded over {stats['connections']} connections, "
+              f"{stats['url_hits']} already cached, {stats['duplicates']} duplicate contents).", file=sys.stderr)
+        if args.thumbnails:
+            thumbnails = cache.thumbnails(digests, args.thumbnails)
+            print(f"{len(thumbnails)} thumbnails ({stats['thumbnails']} made, {stats['thumbnail_hits']} existing).",
+                  file=sys.stderr)
+        for url, error in cache.errors.items():
+            print(f"{url}: {error}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
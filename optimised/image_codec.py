@@ -0,0 +1,639 @@
+import math
+import re
+import struct
+import zlib
+from itertools import accumulate
+
+# Pure-Python decoding of the listing images (baseline JPEG and PNG) and PNG
+# encoding of thumbnails. JPEGs can be decoded at 1/2, 1/4 or 1/8 scale straight
+# from their DCT coefficients, which is what makes thumbnails and perceptual
+# hashes of full-size product photos affordable without an imaging library.
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+JPEG_SCALES = (8, 4, 2, 1)
+# Natural (row-major) position of each coefficient in JPEG zig-zag order
+ZIGZAG = (
+    0, 1, 8, 16, 9, 2, 3, 10, 17, 24, 32, 25, 18, 11, 4, 5, 12, 19, 26, 33, 40, 48, 41, 34, 27, 20, 13, 6, 7, 14, 21,
+    28, 35, 42, 49, 56, 57, 50, 43, 36, 29, 22, 15, 23, 30, 37, 44, 51, 58, 59, 52, 45, 38, 31, 39, 46, 53, 60, 61,
+    54, 47, 55, 62, 63,
+)
+_SCAN_END = re.compile(rb"\xff(?!\x00)(?![\xd0-\xd7])")
+_RESTART = re.compile(rb"\xff[\xd0-\xd7]")
+_UNSUPPORTED_FRAMES = {
+    0xC2: "progressive", 0xC3: "lossless", 0xC5: "hierarchical", 0xC6: "hierarchical", 0xC7: "hierarchical",
+    0xC9: "arithmetic-coded", 0xCA: "arithmetic-coded", 0xCB: "arithmetic-coded", 0xCD: "arithmetic-coded",
+    0xCE: "arithmetic-coded", 0xCF: "arithmetic-coded",
+}
+
+
+class ImageError(ValueError):
+    """Raised for image data this module cannot decode."""
+
+
+class Image:
+    """
+    Decoded pixels, row-major, one byte per channel.
+
+    mode is 'L' (grayscale) or 'RGB'. Transparent PNG pixels are composited on
+    white, as product photos are shown on a white page.
+    """
+
+    __slots__ = ("width", "height", "mode", "pixels")
+
+    def __init__(self, width, height, mode, pixels):
+        if mode not in ("L", "RGB"):
+            raise ValueError(f"unsupported mode {mode!r}")
+        self.width = width
+        self.height = height
+        self.mode = mode
+        self.pixels = bytes(pixels)
+
+    @property
+    def channels(self):
+        return 1 if self.mode == "L" else 3
+
+    def __repr__(self):
+        return f"<Image {self.mode} {self.width}x{self.height}>"
+
+    def convert(self, mode):
+        """
+        Convert between 'RGB' and 'L' (ITU-R 601 luma).
+
+        Parameters:
+        mode (str): The target mode.
+
+        Returns:
+        Image: The converted image (self if already in that mode).
+        """
+        if mode == self.mode:
+            return self
+        if mode == "L":
+            pixels = self.pixels
+            red, green, blue = pixels[0::3], pixels[1::3], pixels[2::3]
+            return Image(self.width, self.height, "L",
+                         bytes((299 * r + 587 * g + 114 * b + 500) // 1000 for r, g, b in zip(red, green, blue)))
+        if mode == "RGB":
+            pixels = bytearray(len(self.pixels) * 3)
+            for channel in range(3):
+                pixels[channel::3] = self.pixels
+            return Image(self.width, self.height, "RGB", pixels)
+        raise ValueError(f"unsupported mode {mode!r}")
+
+    def resize(self, width, height):
+        """
+        Resample with a box filter: each output pixel is the mean of the source pixels it covers.
+
+        Parameters:
+        width (int): The output width.
+        height (int): The output height.
+
+        Returns:
+        Image: The resized image.
+        """
+        if (width, height) == (self.width, self.height):
+            return self
+        if width < 1 or height < 1:
+            raise ValueError("width and height must be positive")
+        channels = self.channels
+        columns = _spans(self.width, width)
+        row_length = self.width * channels
+        # Horizontal pass: per source row, the sum of every output pixel's columns
+        summed = []
+        for y in range(self.height):
+            row = self.pixels[y * row_length:(y + 1) * row_length]
+            sums = []
+            for start, end in columns:
+                for channel in range(channels):
+                    sums.append(sum(row[start * channels + channel:end * channels:channels]))
+            summed.append(sums)
+        pixels = bytearray()
+        for start, end in _spans(self.height, height):
+            block = [sum(values) for values in zip(*summed[start:end])]
+            rows = end - start
+            for index, total in enumerate(block):
+                count = rows * (columns[index // channels][1] - columns[index // channels][0])
+                pixels.append((total + count // 2) // count)
+        return Image(width, height, self.mode, pixels)
+
+    def fit(self, size):
+        """
+        Shrink to fit in a size x size square, keeping the aspect ratio; smaller images are returned as they are.
+
+        Parameters:
+        size (int): The longest side of the result.
+
+        Returns:
+        Image: The shrunk image.
+        """
+        if self.width <= size and self.height <= size:
+            return self
+        scale = size / max(self.width, self.height)
+        return self.resize(max(1, round(self.width * scale)), max(1, round(self.height * scale)))
+
+    def to_png(self, level=6):
+        """
+        Encode as PNG.
+
+        Parameters:
+        level (int): The zlib compression level. Default is 6.
+
+        Returns:
+        bytes: The PNG file.
+        """
+        color_type = 0 if self.mode == "L" else 2
+        row_length = self.width * self.channels
+        raw = b"".join(
+            b"\x00" + self.pixels[y * row_length:(y + 1) * row_length] for y in range(self.height)
+        )
+        header = struct.pack(">IIBBBBB", self.width, self.height, 8, color_type, 0, 0, 0)
+        return PNG_SIGNATURE + _chunk(b"IHDR", header) + _chunk(b"IDAT", zlib.compress(raw, level)) + _chunk(b"IEND", b"")
+
+
+def _spans(source, target):
+    # Source index ranges covered by each target index; never empty, so enlarging repeats pixels
+    spans = []
+    for index in range(target):
+        start = index * source // target
+        end = max((index + 1) * source // target, start + 1)
+        spans.append((start, end))
+    return spans
+
+
+def _chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def image_format(data):
+    """
+    Identify image data by its signature.
+
+    Parameters:
+    data (bytes): The start of the file (12 bytes are enough).
+
+    Returns:
+    str or None: 'jpeg', 'png', 'gif' or 'webp', or None if unrecognized.
+    """
+    if data.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if data.startswith(PNG_SIGNATURE):
+        return "png"
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def decode(data, draft=None, mode=None):
+    """
+    Decode a baseline JPEG or a PNG.
+
+    Parameters:
+    data (bytes): The file contents.
+    draft (tuple): (width, height) the caller needs at least; JPEGs are then decoded at the
+        smallest of 1/8, 1/4 or 1/2 scale that is still that large. Default is None (full size).
+    mode (str): 'L' or 'RGB' to convert to, or None for the file's own. Default is None.
+
+    Returns:
+    Image: The decoded image.
+    """
+    kind = image_format(data)
+    if kind == "jpeg":
+        image = _decode_jpeg(data, draft, mode == "L")
+    elif kind == "png":
+        image = _decode_png(data)
+    elif kind is None:
+        raise ImageError("unrecognized image data")
+    else:
+        raise ImageError(f"{kind.upper()} images are not supported")
+    return image.convert(mode) if mode else image
+
+
+def open_image(path, draft=None, mode=None):
+    """
+    Decode an image file; see decode.
+
+    Parameters:
+    path (str): The file.
+    draft (tuple): The smallest useful (width, height), or None. Default is None.
+    mode (str): 'L' or 'RGB', or None. Default is None.
+
+    Returns:
+    Image: The decoded image.
+    """
+    with open(path, "rb") as handle:
+        return decode(handle.read(), draft, mode)
+
+
+# ---- PNG ----
+
+def _decode_png(data):
+    position = len(PNG_SIGNATURE)
+    header = palette = None
+    compressed = []
+    while position + 8 <= len(data):
+        length, kind = struct.unpack(">I4s", data[position:position + 8])
+        body = data[position + 8:position + 8 + length]
+        position += 12 + length
+        if kind == b"IHDR":
+            header = struct.unpack(">IIBBBBB", body)
+        elif kind == b"PLTE":
+            palette = body
+        elif kind == b"IDAT":
+            compressed.append(body)
+        elif kind == b"IEND":
+            break
+    if header is None or not compressed:
+        raise ImageError("truncated PNG")
+    width, height, depth, color_type, _, _, interlace = header
+    if interlace:
+        raise ImageError("interlaced PNG images are not supported")
+    samples = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}.get(color_type)
+    if samples is None or depth not in (1, 2, 4, 8, 16) or depth < 8 and color_type not in (0, 3):
+        raise ImageError(f"unsupported PNG color type {color_type} at depth {depth}")
+    try:
+        raw = zlib.decompress(b"".join(compressed))
+    except zlib.error as error:
+        raise ImageError(f"corrupt PNG data: {error}") from None
+
+    row_length = (width * samples * depth + 7) // 8
+    step = max(1, samples * depth // 8)
+    rows = []
+    previous = bytes(row_length)
+    for y in range(height):
+        start = y * (row_length + 1)
+        if start + row_length + 1 > len(raw):
+            raise ImageError("truncated PNG data")
+        row = _unfilter(raw[start], raw[start + 1:start + 1 + row_length], previous, step)
+        rows.append(row)
+        previous = row
+    pixels = b"".join(rows)
+
+    if depth == 16:
+        pixels = pixels[0::2]
+    elif depth < 8:
+        pixels = _unpack_bits(rows, width, depth)
+        if color_type == 0:
+            pixels = bytes(value * 255 // ((1 << depth) - 1) for value in pixels)
+    if color_type == 3:
+        if palette is None:
+            raise ImageError("PNG palette is missing")
+        table = palette.ljust(768, b"\x00")
+        rgb = bytearray(len(pixels) * 3)
+        for channel in range(3):
+            rgb[channel::3] = pixels.translate(bytes(table[index * 3 + channel] for index in range(256)))
+        return Image(width, height, "RGB", rgb)
+    if color_type == 0:
+        return Image(width, height, "L", pixels)
+    if color_type == 2:
+        return Image(width, height, "RGB", pixels)
+    colors = samples - 1
+    alpha = pixels[colors::samples]
+    flattened = bytearray(width * height * colors)
+    for channel in range(colors):
+        flattened[channel::colors] = bytes(
+            (value * opacity + 255 * (255 - opacity) + 127) // 255
+            for value, opacity in zip(pixels[channel::samples], alpha)
+        )
+    return Image(width, height, "L" if colors == 1 else "RGB", flattened)
+
+
+def _unfilter(kind, row, previous, step):
+    if kind == 0:
+        return row
+    if kind == 2:
+        return _add_bytes(row, previous)
+    if kind == 1:
+        result = bytearray(row)
+        for offset in range(step):
+            result[offset::step] = bytes(accumulate(row[offset::step], lambda left, value: (left + value) & 255))
+        return bytes(result)
+    result = bytearray(row)
+    if kind == 3:
+        for index in range(len(result)):
+            left = result[index - step] if index >= step else 0
+            result[index] = (result[index] + ((left + previous[index]) >> 1)) & 255
+        return bytes(result)
+    if kind == 4:
+        for index in range(len(result)):
+            if index >= step:
+                left, corner = result[index - step], previous[index - step]
+            else:
+                left = corner = 0
+            up = previous[index]
+            estimate = left + up - corner
+            distance_left, distance_up, distance_corner = abs(estimate - left), abs(estimate - up), abs(estimate - corner)
+            if distance_left <= distance_up and distance_left <= distance_corner:
+                predictor = left
+            elif distance_up <= distance_corner:
+                predictor = up
+            else:
+                predictor = corner
+            result[index] = (result[index] + predictor) & 255
+        return bytes(result)
+    raise ImageError(f"unknown PNG filter {kind}")
+
+
+def _add_bytes(first, second):
+    # Bytewise addition modulo 256 over whole rows at once (SIMD within a big integer)
+    length = len(first)
+    low = int.from_bytes(b"\x7f" * length, "big")
+    high = int.from_bytes(b"\x80" * length, "big")
+    a =int.from_bytes(first, "big")
+    b = int.from_bytes(second, "big")
+    return (((a & low) + (b & low)) ^ ((a ^ b) & high)).to_bytes(length, "big")
+
+
+def _unpack_bits(rows, width, depth):
+    per_byte = 8 // depth
+    mask = (1 << depth) - 1
+    pixels = bytearray()
+    for row in rows:
+        values = []
+        for byte in row:
+            for shift in range(8 - depth, -1, -depth):
+                values.append(byte >> shift & mask)
+        pixels += bytes(values[:width])
+    return bytes(pixels)
+
+
+# ---- JPEG ----
+
+def _build_huffman(counts, symbols):
+    # 16-bit lookup table: entry = code length << 8 | symbol, 0 for invalid codes
+    table = [0] * 65536
+    code = 0
+    index = 0
+    for length in range(1, 17):
+        for _ in range(counts[length - 1]):
+            entry = length << 8 | symbols[index]
+            start = code << (16 - length)
+            end = (code + 1) << (16 - length)
+            table[start:end] = [entry] * (end - start)
+            code += 1
+            index += 1
+        code <<= 1
+    return table
+
+
+def _idct_table(size):
+    # T[x][u] = C(u) cos((2x + 1) u pi / 2N) / 2; reduced sizes reuse the low-frequency coefficients
+    return [
+        [(math.sqrt(0.5) if u == 0 else 1.0) * math.cos((2 * x + 1) * u * math.pi / (2 * size)) / 2
+         for u in range(size)]
+        for x in range(size)
+    ]
+
+
+class _Component:
+    __slots__ = ("id", "h", "v", "quant", "blocks_wide", "blocks_high", "plane", "stride", "prediction",
+                 "dc_table", "ac_table")
+
+    def __init__(self, component_id, h, v, quant):
+        self.id = component_id
+        self.h = h
+        self.v = v
+        self.quant = quant
+
+
+def _decode_jpeg(data, draft, luma_only):
+    quant_tables = {}
+    huffman = {}
+    components = []
+    frame = None
+    restart_interval = 0
+    size = 8
+    position = 2
+    while position < len(data):
+        if data[position] != 0xFF:
+            raise ImageError("corrupt JPEG marker")
+        marker = data[position + 1]
+        if marker == 0xFF:
+            position += 1
+            continue
+        if marker == 0xD9:
+            break
+        if 0xD0 <= marker <= 0xD7 or marker == 0x01:
+            position += 2
+            continue
+        (length,) = struct.unpack(">H", data[position + 2:position + 4])
+        segment = data[position + 4:position + 2 + length]
+        position += 2 + length
+        if marker == 0xDB:
+            offset = 0
+            while offset < len(segment):
+                precision, table_id = segment[offset] >> 4, segment[offset] & 15
+                if precision:
+                    values = struct.unpack(">64H", segment[offset + 1:offset + 129])
+                    offset += 129
+                else:
+                    values = tuple(segment[offset + 1:offset + 65])
+                    offset += 65
+                quant_tables[table_id] = values
+        elif marker == 0xC4:
+            offset = 0
+            while offset < len(segment):
+                table_class, table_id = segment[offset] >> 4, segment[offset] & 15
+                counts = segment[offset + 1:offset + 17]
+                total = sum(counts)
+                symbols = segment[offset + 17:offset + 17 + total]
+                huffman[table_class, table_id] = _build_huffman(counts, symbols)
+                offset += 17 + total
+        elif marker in (0xC0, 0xC1):
+            precision, height, width, count = struct.unpack(">BHHB", segment[:6])
+            if precision != 8:
+                raise ImageError(f"{precision}-bit JPEG images are not supported")
+            if count not in (1, 3):
+                raise ImageError(f"JPEG images with {count} components are not supported")
+            for index in range(count):
+                component_id, sampling, table_id = segment[6 + 3 * index:9 + 3 * index]
+                components.append(_Component(component_id, sampling >> 4, sampling & 15, table_id))
+            frame = (width, height)
+            if draft:
+                for scale in JPEG_SCALES:
+                    if math.ceil(width / scale) >= draft[0] and math.ceil(height / scale) >= draft[1]:
+                        size = 8 // scale
+                        break
+            _allocate_planes(components, width, height, size)
+        elif marker in _UNSUPPORTED_FRAMES:
+            raise ImageError(f"{_UNSUPPORTED_FRAMES[marker]} JPEG images are not supported")
+        elif marker == 0xDD:
+            (restart_interval,) = struct.unpack(">H", segment[:2])
+        elif marker == 0xDA:
+            if frame is None:
+                raise ImageError("JPEG scan before frame header")
+            match = _SCAN_END.search(data, position)
+            end = match.start() if match else len(data)
+            _decode_scan(segment, data[position:end], components, quant_tables, huffman, restart_interval, size)
+            position = end
+    if frame is None:
+        raise ImageError("JPEG frame header is missing")
+    return _assemble(components, frame, size, luma_only)
+
+
+def _allocate_planes(components, width, height, size):
+    h_max = max(component.h for component in components)
+    v_max = max(component.v for component in components)
+    mcus_wide = math.ceil(width / (8 * h_max))
+    mcus_high = math.ceil(height / (8 * v_max))
+    for component in components:
+        component.blocks_wide = mcus_wide * component.h
+        component.blocks_high = mcus_high * component.v
+        component.stride = component.blocks_wide * size
+        component.plane = bytearray(component.stride * component.blocks_high * size)
+
+
+def _decode_scan(header, data, components, quant_tables, huffman, restart_interval, size):
+    count = header[0]
+    by_id = {component.id: component for component in components}
+    scan = []
+    for index in range(count):
+        component_id, tables = header[1 + 2 * index:3 + 2 * index]
+        component = by_id.get(component_id)
+        if component is None:
+            raise ImageError("JPEG scan names an unknown component")
+        if component.quant not in quant_tables:
+            raise ImageError("JPEG quantization table is missing")
+        try:
+            component.dc_table = huffman[0, tables >> 4]
+            component.ac_table = huffman[1, tables & 15]
+        except KeyError:
+            raise ImageError("JPEG Huffman table is missing") from None
+        scan.append(component)
+
+    if count == 1:
+        # A non-interleaved scan codes the component's blocks one at a time, in raster order
+        component = scan[0]
+        h_max = max(c.h for c in components)
+        v_max = max(c.v for c in components)
+        wide = math.ceil(math.ceil(component.blocks_wide * 8 * h_max / component.h / h_max) / 8)
+        high = math.ceil(math.ceil(component.blocks_high * 8 * v_max / component.v / v_max) / 8)
+        units = [[(component, row, column)] for row in range(high) for column in range(wide)]
+    else:
+        mcus_wide = scan[0].blocks_wide // scan[0].h
+        mcus_high = scan[0].blocks_high // scan[0].v
+        units = [
+            [(component, mcu_row * component.v + v, mcu_column * component.h + h)
+             for component in scan for v in range(component.v) for h in range(component.h)]
+            for mcu_row in range(mcus_high) for mcu_column in range(mcus_wide)
+        ]
+
+    intervals = _RESTART.split(data)
+    per_interval = restart_interval or len(units)
+    idct = _idct_table(size)
+    needed = [ZIGZAG[k] // 8 < size and ZIGZAG[k] % 8 < size for k in range(64)]
+    quants = {component.id: quant_tables[component.quant] for component in scan}
+    for number, start in enumerate(range(0, len(units), per_interval)):
+        if number >= len(intervals):
+            break
+        segment = intervals[number].replace(b"\xff\x00", b"\xff") + b"\x00\x00\x00\x00"
+        for component in scan:
+            component.prediction = 0
+        position = 0
+        for unit in units[start:start + per_interval]:
+            for component, row, column in unit:
+                position = _decode_block(segment, position, component, quants[component.id], row, column,
+                                         size, idct, needed)
+
+
+def _decode_block(segment, position, component, quant, row, column, size, idct, needed):
+    # Coefficients in natural order, only the size x size low-frequency corner is kept
+    coefficients = [0] * 64
+    table = component.dc_table
+    entry = table[(int.from_bytes(segment[position >> 3:(position >> 3) + 3], "big") >> (8 - (position & 7))) & 0xFFFF]
+    if not entry:
+        raise ImageError("corrupt JPEG Huffman code")
+    position += entry >> 8
+    bits = entry & 0xFF
+    if bits:
+        value = (int.from_bytes(segment[position >> 3:(position >> 3) + 3], "big") >> (24 - (position & 7) - bits)) \
+            & ((1 << bits) - 1)
+        position += bits
+        if value < 1 << (bits - 1):
+            value -= (1 << bits) - 1
+        component.prediction += value
+    coefficients[0] = component.prediction * quant[0]
+
+    table = component.ac_table
+    k = 1
+    while k < 64:
+        entry = table[(int.from_bytes(segment[position >> 3:(position >> 3) + 3], "big") >> (8 - (position & 7)))
+                      & 0xFFFF]
+        if not entry:
+            raise ImageError("corrupt JPEG Huffman code")
+        position += entry >> 8
+        run, bits = entry >> 4 & 15, entry & 15
+        if not bits:
+            if run != 15:
+                break
+            k += 16
+            continue
+        k += run
+        if k > 63:
+            break
+        if needed[k]:
+            value = (int.from_bytes(segment[position >> 3:(position >> 3) + 3], "big")
+                     >> (24 - (position & 7) - bits)) & ((1 << bits) - 1)
+            if value < 1 << (bits - 1):
+                value -= (1 << bits) - 1
+            coefficients[ZIGZAG[k]] = value * quant[k]
+        position += bits
+        k += 1
+
+    if row >= component.blocks_high or column >= component.blocks_wide:
+        return position
+    plane = component.plane
+    stride = component.stride
+    origin = row * size * stride + column * size
+    if size == 1:
+        plane[origin] = min(255, max(0, round(coefficients[0] / 8) + 128))
+        return position
+    # Separable inverse DCT over the low-frequency corner: rows of coefficients, then columns
+    partial = []
+    for v in range(size):
+        line = coefficients[v * 8:v * 8 + size]
+        if any(line):
+            partial.append([sum(t * c for t, c in zip(weights, line)) for weights in idct])
+        else:
+            partial.append(None)
+    for y in range(size):
+        weights = idct[y]
+        offset = origin + y * stride
+        for x in range(size):
+            total = 0.0
+            for v in range(size):
+                if partial[v] is not None:
+                    total += weights[v] * partial[v][x]
+            plane[offset + x] = min(255, max(0, round(total) + 128))
+    return position
+
+
+def _assemble(components, frame, size, luma_only):
+    width = math.ceil(frame[0] * size / 8)
+    height = math.ceil(frame[1] * size / 8)
+    h_max = max(component.h for component in components)
+    v_max = max(component.v for component in components)
+    planes = []
+    for component in components[:1] if luma_only else components:
+        x_factor, y_factor = h_max // component.h, v_max // component.v
+        rows = []
+        for y in range(height):
+            source = component.plane[(y // y_factor) * component.stride:]
+            if x_factor == 1:
+                rows.append(source[:width])
+            else:
+                rows.append(bytes(source[x // x_factor] for x in range(width)))
+        planes.append(b"".join(rows))
+    if len(planes) == 1:
+        return Image(width, height, "L", planes[0])
+    luma, blue, red = planes
+    pixels = bytearray(width * height * 3)
+    index = 0
+    for y, cb, cr in zip(luma, blue, red):
+        cb -= 128
+        cr -= 128
+        pixels[index] = min(255, max(0, round(y + 1.402 * cr)))
+        pixels[index + 1] = min(255, max(0, round(y - 0.344136 * cb - 0.714136 * cr)))
+        pixels[index + 2] = min(255, max(0, round(y + 1.772 * cb)))
+        index += 3
+    return Image(width, height, "RGB", pixels)
@@ -0,0 +1,348 @@
+import argparse
+import math
+import os
+import sys
+from itertools import combinations
+from statistics import median
+
+from image_cache import IMAGE_FIELDS, ImageCache, collect_sources
+from image_codec import ImageError, open_image
+from listing import read_records
+from listing_reports import write_json_array
+from parallel_optimizer import parallel_optimize
+
+HASH_BITS = 64
+DEFAULT_ALGORITHM = "phash"
+# Hamming distance (of 64 bits) under which two images count as near-duplicates
+DEFAULT_RADIUS = 10
+DEFAULT_CHUNK_SIZE = 16
+# Fewer images than this are hashed without starting worker processes
+DEFAULT_INLINE_THRESHOLD = 32
+_PHASH_SIZE = 32
+# DCT-II basis for the 8 lowest frequencies over 32 samples: _DCT[u][x] = cos((2x + 1) u pi / 64)
+_DCT = [[math.cos((2 * x + 1) * u * math.pi / (2 * _PHASH_SIZE)) for x in range(_PHASH_SIZE)] for u in range(8)]
+
+
+def _bits(flags):
+    value = 0
+    for flag in flags:
+        value = value << 1 | flag
+    return value
+
+
+def average_hash(image):
+    """
+    aHash: which pixels of an 8x8 grayscale reduction are brighter than its mean.
+
+    Parameters:
+    image (Image): The decoded image.
+
+    Returns:
+    int: A 64-bit hash.
+    """
+    pixels = image.convert("L").resize(8, 8).pixels
+    mean = sum(pixels) / 64
+    return _bits(pixel > mean for pixel in pixels)
+
+
+def difference_hash(image):
+    """
+    dHash: whether each pixel of a 9x8 grayscale reduction is brighter than its left neighbour.
+
+    Parameters:
+    image (Image): The decoded image.
+
+    Returns:
+    int: A 64-bit hash.
+    """
+    pixels = image.convert("L").resize(9, 8).pixels
+    return _bits(pixels[row * 9 + column + 1] > pixels[row * 9 + column] for row in range(8) for column in range(8))
+
+
+def perceptual_hash(image):
+    """
+    pHash: which of the 8x8 lowest 2D DCT frequencies of a 32x32 grayscale reduction are above their median.
+
+    Parameters:
+    image (Image): The decoded image.
+
+    Returns:
+    int: A 64-bit hash.
+    """
+    size = _PHASH_SIZE
+    pixels = image.convert("L").resize(size, size).pixels
+    # Separable DCT: the 8 low frequencies of every row, then of every column of those
+    rows = [[sum(w * p for w, p in zip(basis, pixels[y * size:(y + 1) * size])) for basis in _DCT] for y in range(size)]
+    columns = list(zip(*rows))
+    low = [sum(w * c for w, c in zip(_DCT[v], columns[u])) for v in range(8) for u in range(8)]
+    threshold = median(low)
+    return _bits(value > threshold for value in low)
+
+
+ALGORITHMS = {"ahash": average_hash, "dhash": difference_hash, "phash": perceptual_hash}
+# Smallest decode each hash needs (JPEGs are then decoded at 1/8 scale or larger)
+_DRAFT_SIZES = {"ahash": (8, 8), "dhash": (9, 8), "phash": (_PHASH_SIZE, _PHASH_SIZE)}
+
+
+def hamming(first, second):
+    return (first ^ second).bit_count()
+
+
+def hash_paths(paths, algorithm=DEFAULT_ALGORITHM):
+    """
+    Hash image files; the unit of work sent to pool workers.
+
+    Parameters:
+    paths (list): Image files.
+    algorithm (str): 'ahash', 'dhash' or 'phash'. Default is 'phash'.
+
+    Returns:
+    list: The hash of each file, or None for files that cannot be decoded.
+    """
+    function = ALGORITHMS[algorithm]
+    draft = _DRAFT_SIZES[algorithm]
+    hashes = []
+    for path in paths:
+        try:
+            # Only luma is decoded, at the smallest scale that still covers the reduction
+            image = open_image(path, draft=draft, mode="L")
+        except (ImageError, OSError):
+            hashes.append(None)
+            continue
+        hashes.append(function(image))
+    return hashes
+
+
+def hash_files(paths, algorithm=DEFAULT_ALGORITHM, max_workers=None, chunk_size=DEFAULT_CHUNK_SIZE,
+               inline_threshold=DEFAULT_INLINE_THRESHOLD):
+    """
+    Hash a batch of image files across a process pool.
+
+    Parameters:
+    paths (iterable): Image files.
+    algorithm (str): 'ahash', 'dhash' or 'phash'. Default is 'phash'.
+    max_workers (int): Worker processes. Default is os.cpu_count().
+    chunk_size (int): Files sent to a worker at a time. Default is 16.
+    inline_threshold (int): Batches with fewer files are hashed in this process. Default is 32.
+
+    Returns:
+    generator: The hash of each file (None if it cannot be decoded), in input order.
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"unknown hash algorithm {algorithm!r}")
+    return parallel_optimize(hash_paths, paths, chunk_size, max_workers, inline_threshold=inline_threshold,
+                             algorithm=algorithm)
+
+
+class HashIndex:
+    """
+    Multi-index hash table over 64-bit hashes for Hamming-radius queries.
+
+    Hashes are split into `chunks` substrings, each indexed in its own table.
+    Two hashes within distance r must be close on at least one substring
+    (pigeonhole), so a query only probes the buckets of substrings that close
+    to its own and verifies the hashes found there, instead of scanning
+    everything. A BK-tree degenerates to a near-linear scan on 64-bit hashes
+    at useful radii, as almost all distances lie around 32.
+    """
+
+    def __init__(self, radius=DEFAULT_RADIUS, chunks=4, bits=HASH_BITS):
+        self.radius = radius
+        width = bits // chunks
+        # Substring i holds the bits from shifts[i] up; the first absorbs any remainder
+        self._widths = [bits - width * (chunks - 1)] + [width] * (chunks - 1)
+        self._shifts = [bits - sum(self._widths[:index + 1]) for index in range(chunks)]
+        # Hashes within radius differ by at most limits[i] bits on some substring i, as long as
+        # the limits add up to radius - chunks + 1 (radius // chunks each would probe more)
+        share, extra = divmod(max(radius - chunks + 1, 0), chunks)
+        limits = [share + 1 if index < extra else share for index in range(chunks)]
+        self._masks = [_flip_masks(width, limit) for width, limit in zip(self._widths, limits)]
+        self._tables = [{} for _ in range(chunks)]
+        self._items = {}
+
+    def __len__(self):
+        return sum(len(items) for items in self._items.values())
+
+    def add(self, value, item=None):
+        """
+        Insert a hash.
+
+        Parameters:
+        value (int): The hash.
+        item: What to return for it from search. Default is the hash itself.
+        """
+        items = self._items.get(value)
+        if items is None:
+            items = self._items[value] = []
+            for table, shift, width in zip(self._tables, self._shifts, self._widths):
+                table.setdefault(value >> shift & ((1 << width) - 1), []).append(value)
+        items.append(value if item is None else item)
+
+    def search(self, value, radius=None):
+        """
+        Find the hashes within a Hamming distance.
+
+        Parameters:
+        value (int): The query hash.
+        radius (int): The largest distance to report, at most the index's radius. Default is the index's radius.
+
+        Returns:
+        list: (distance, item) pairs, nearest first.
+        """
+        radius = self.radius if radius is None else radius
+        if radius > self.radius:
+            raise ValueError(f"radius {radius} exceeds the index radius {self.radius}")
+        candidates = set()
+        for table, shift, width, masks in zip(self._tables, self._shifts, self._widths, self._masks):
+            key = value >> shift & ((1 << width) - 1)
+            # Probing every nearby substring with map keeps the loop out of the interpreter
+            buckets = filter(None, map(table.get, [key ^ mask for mask in masks]))
+            candidates.update(*buckets)
+        found = []
+        for candidate in candidates:
+            distance = (candidate ^ value).bit_count()
+            if distance <= radius:
+                found.extend((distance, item) for item in self._items[candidate])
+        found.sort(key=lambda pair: pair[0])
+        return found
+
+
+def _flip_masks(width, count):
+    # Every XOR mask flipping at most count of width bits, fewest flips first
+    return [sum(1 << bit for bit in positions)
+            for flips in range(count + 1) for positions in combinations(range(width), flips)]
+
+
+def duplicate_clusters(hashes, radius=DEFAULT_RADIUS):
+    """
+    Group images whose hashes are chained within a Hamming radius.
+
+    Parameters:
+    hashes (dict): A mapping of image key to hash.
+    radius (int): The largest distance between neighbours in a cluster. Default is 10.
+
+    Returns:
+    list: Clusters of two or more keys (each in input order), largest first.
+    """
+    by_value = {}
+    for key, value in hashes.items():
+        by_value.setdefault(value, []).append(key)
+    # Union-find over the distinct hashes
+    parent = {value: value for value in by_value}
+
+    def root(value):
+        while parent[value] != value:
+            parent[value] = parent[parent[value]]
+            value = parent[value]
+        return value
+
+    # Each hash is looked up before it is added, so every close pair is found once
+    index = HashIndex(radius)
+    for value in by_value:
+        for _, neighbour in index.search(value):
+            first, second = root(value), root(neighbour)
+            if first != second:
+                parent[second] = first
+        index.add(value)
+
+    groups = {}
+    for key, value in hashes.items():
+        groups.setdefault(root(value), []).append(key)
+    clusters = [keys for keys in groups.values() if len(keys) > 1]
+    clusters.sort(key=len, reverse=True)
+    return clusters
+
+
+def cached_hashes(cache, digests, algorithm=DEFAULT_ALGORITHM, max_workers=None):
+    """
+    Hash cached images, decoding only those with no stored hash for this algorithm.
+
+    Parameters:
+    cache (ImageCache): The cache holding the images.
+    digests (iterable): Image digests.
+    algorithm (str): 'ahash', 'dhash' or 'phash'. Default is 'phash'.
+    max_workers (int): Worker processes. Default is os.cpu_count().
+
+    Returns:
+    dict: The hash of each decodable image.
+    """
+    digests = list(dict.fromkeys(digests))
+    found = cache.load_hashes(digests, algorithm)
+    missing = [digest for digest in digests if digest not in found]
+    computed = {}
+    paths = (cache.object_path(digest) for digest in missing)
+    for digest, value in zip(missing, hash_files(paths, algorithm, max_workers)):
+        if value is not None:
+            computed[digest] = value
+    cache.store_hashes(computed, algorithm)
+    found.update(computed)
+    return found
+
+
+def listing_pages(sources, fields):
+    """
+    Map each image URL in listing files to the listings that show it.
+
+    Parameters:
+    sources (list): Command-line sources; only .csv and .json files are read.
+    fields (tuple): The Listing image attributes to read.
+
+    Returns:
+    dict: Listing URLs (or titles, when a listing has no URL) per image URL.
+    """
+    pages = {}
+    for source in sources:
+        if os.path.isdir(source) or not source.lower().endswith((".csv", ".json")):
+            continue
+        for listing, _ in read_records(source):
+            for field in fields:
+                url = getattr(listing, field)
+                if url:
+                    pages.setdefault(url, {})[listing.url or listing.title] = None
+    return {url: list(listings) for url, listings in pages.items()}
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog,
+                                     description="Find near-duplicate listing images with perceptual hashes.")
+    parser.add_argument("sources", nargs="+",
+                        help="listing files (.csv or scraped .json), image files, or directories of images")
+    parser.add_argument("-o", "--output", default="-", help="output path, or - for stdout (default)")
+    parser.add_argument("--cache", default="image_cache", help="image cache directory (default: %(default)s)")
+    parser.add_argument("--fields", choices=sorted(IMAGE_FIELDS), default="both",
+                        help="image columns read from listing files (default: %(default)s)")
+    parser.add_argument("--algorithm", choices=sorted(ALGORITHMS), default=DEFAULT_ALGORITHM)
+    parser.add_argument("--radius", type=int, default=DEFAULT_RADIUS,
+                        help="largest Hamming distance between near-duplicates (default: %(default)s)")
+    parser.add_argument("--workers", type=int, help="worker processes for hashing (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    fields = IMAGE_FIELDS[args.fields]
+    urls = collect_sources(args.sources, fields)
+    with ImageCache(args.cache) as cache:
+        digests = cache.fetch_many(urls)
+        values = cached_hashes(cache, digests.values(), args.algorithm, args.workers)
+        failed = dict(cache.errors)
+    hashes = {url: values[digest] for url, digest in digests.items() if digest in values}
+    pages = listing_pages(args.sources, fields)
+
+    clusters = duplicate_clusters(hashes, args.radius)
+    records = (
+        [{"image": url, "hash": format(hashes[url], "016x"), "listings": pages.get(url, [])} for url in cluster]
+        for cluster in clusters
+    )
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        write_json_array(records, output)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    for url in urls:
+        if url not in hashes:
+            print(f"{url}: {failed.get(url, 'cannot be decoded')}", file=sys.stderr)
+    print(f"{len(clusters)} clusters of near-duplicates among {len(hashes)} images "
+          f"({len(set(hashes.values()))} distinct hashes).", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
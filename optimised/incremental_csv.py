@@ -0,0 +1,316 @@
+import argparse
+import csv
+import hashlib
+import json
+import sqlite3
+import sys
+from urllib.parse import urlsplit
+
+from csv_batch import DEFAULT_CHUNK_SIZE, TITLE_COLUMN, iter_chunks
+from optimized_product_optimizer import optimize_titles, optimize_descriptions
+from result_cache import DESCRIPTION_VERSION
+from title_rules import default_matcher, load_rules, rules_version
+
+KEY_COLUMN = "Product URL"
+
+
+def row_key(value):
+    """
+    Derive a stable row key from a product URL by dropping volatile tracking parameters.
+
+    Parameters:
+    value (str): The key column value, usually a product URL.
+
+    Returns:
+    str: The URL without its query string and fragment.
+    """
+    parts = urlsplit(value.strip())
+    return f"{parts.scheme}://{parts.netloc}{parts.path}" if parts.netloc else value.strip()
+
+
+def row_fingerprint(row, key_index=None):
+    """
+    Fingerprint the source values of a CSV row.
+
+    Parameters:
+    row (list): The CSV fields.
+    key_index (int): The key column, fingerprinted as its row_key() so tracking parameters are ignored. Default is None.
+
+    Returns:
+    str: A hex SHA-1 digest of the fields.
+    """
+    if key_index is not None and key_index < len(row):
+        row = row[:key_index] + [row_key(row[key_index])] + row[key_index + 1:]
+    payload = "\x1f".join(row).encode("utf-8", "surrogatepass")
+    return hashlib.sha1(payload).hexdigest()
+
+
+class Manifest:
+    """
+    SQLite record of the source fingerprint, rule-set version and optimized output of every row.
+    """
+
+    def __init__(self, path):
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS rows ("
+            "key TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, version TEXT NOT NULL, output TEXT NOT NULL)"
+        )
+        self._db.execute("CREATE TEMP TABLE seen (key TEXT PRIMARY KEY)")
+        self._db.execute("CREATE TEMP TABLE occurrences (key TEXT PRIMARY KEY, count INTEGER NOT NULL)")
+
+    def lookup(self, keys):
+        found = {}
+        keys = list(dict.fromkeys(keys))
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            for key, fingerprint, version, output in self._db.execute(
+                f"SELECT key, fingerprint, version, output FROM rows WHERE key IN ({placeholders})", batch
+            ):
+                found[key] = (fingerprint, version, output)
+        return found
+
+    def number_occurrences(self, keys):
+        counts = {}
+        distinct = list(dict.fromkeys(keys))
+        for start in range(0, len(distinct), 500):
+            batch = distinct[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            counts.update(self._db.execute(f"SELECT key, count FROM occurrences WHERE key IN ({placeholders})", batch))
+        numbers = []
+        for key in keys:
+            counts[key] = counts.get(key, 0) + 1
+            numbers.append(counts[key])
+        self._db.executemany("INSERT OR REPLACE INTO occurrences (key, count) VALUES (?, ?)",
+                             [(key, counts[key]) for key in distinct])
+        return numbers
+
+    def mark_seen(self, keys):
+        self._db.executemany("INSERT OR IGNORE INTO seen (key) VALUES (?)", [(key,) for key in keys])
+
+    def upsert(self, entries):
+        self._db.executemany(
+            "INSERT OR REPLACE INTO rows (key, fingerprint, version, output) VALUES (?, ?, ?, ?)", entries
+        )
+
+    def unseen_keys(self):
+        return [key for key, in self._db.execute("SELECT key FROM rows WHERE key NOT IN (SELECT key FROM seen)")]
+
+    def delete(self, keys):
+        self._db.executemany("DELETE FROM rows WHERE key = ?", [(key,) for key in keys])
+
+    def commit(self):
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+
+def incremental_optimize(input_file, manifest_path, feed_file, output_file=None, title_column=TITLE_COLUMN,
+                         description_column=None, key_column=KEY_COLUMN, chunk_size=DEFAULT_CHUNK_SIZE,
+                         max_length=200, separator='|', default_word_count=1500, max_word_count=2000,
+                         matcher=None):
+    """
+    Re-optimize only the rows of a product CSV that changed since the previous run.
+
+    Every row is keyed (by its product URL without tracking parameters) and
+    fingerprinted; a key repeated in the CSV is numbered by occurrence
+    ('<url>#2'), so duplicates are tracked separately in file order. Rows
+    whose key is new, whose fingerprint changed, or whose stored result was
+    produced by a different rule-set version or different parameters are
+    optimized again; everything else is reused from the manifest. Upserts and
+    deletes are written to feed_file as JSON lines.
+
+    Parameters:
+    input_file (file): The source CSV, opened for reading (newline='').
+    manifest_path (str): The SQLite manifest kept between runs.
+    feed_file (file): A text file receiving the JSONL change feed.
+    output_file (file): If given, the full optimized CSV is also written here. Default is None.
+    title_column (str): The title column. Default is 'Product Title'.
+    description_column (str): An optional description column to optimize. Default is None.
+    key_column (str): The column identifying a listing. Default is 'Product URL'.
+    chunk_size (int): The number of rows compared and optimized at a time. Default is 1000.
+    max_length (int): Passed to optimize_titles. Default is 200.
+    separator (str): Passed to optimize_titles. Default is '|'.
+    default_word_count (int): Passed to optimize_descriptions. Default is 1500.
+    max_word_count (int): Passed to optimize_descriptions. Default is 2000.
+    matcher (RuleMatcher): Passed to optimize_titles. Default is the built-in rule table.
+
+    Returns:
+    dict: Counts of added, changed, unchanged and deleted rows. An empty input
+        (no header row) counts nothing and leaves the manifest untouched.
+
+    Raises:
+    ValueError: If chunk_size is less than 1 or a column is missing.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    stats = {"added": 0, "changed": 0, "unchanged": 0, "deleted": 0}
+    reader = csv.reader(input_file)
+    header = next(reader, None)
+    if header is None:
+        return stats
+    if matcher is None:
+        matcher = default_matcher()
+
+    def column_index(name):
+        try:
+            return header.index(name)
+        except ValueError:
+            raise ValueError(f"Column {name!r} not found in CSV header: {header}")
+
+    title_index = column_index(title_column)
+    key_index = column_index(key_column)
+    description_index = column_index(description_column) if description_column is not None else None
+
+    version = rules_version([
+        matcher.version,
+        DESCRIPTION_VERSION if description_index is not None else None,
+        header,
+        [title_column, description_column, max_length, separator, default_word_count, max_word_count],
+    ])
+
+    writer = None
+    if output_file is not None:
+        csv.writer(output_file).writerow(header)
+        writer = csv.writer(output_file, quoting=csv.QUOTE_ALL)
+
+    manifest = Manifest(manifest_path)
+    try:
+        for rows in iter_chunks(reader, chunk_size):
+            keys = []
+            fingerprints = []
+            for row in rows:
+                fingerprint = row_fingerprint(row, key_index)
+                key = row_key(row[key_index]) if key_index < len(row) and row[key_index].strip() else fingerprint
+                keys.append(key)
+                fingerprints.append(fingerprint)
+            keys = [key if number == 1 else f"{key}#{number}"
+                    for key, number in zip(keys, manifest.number_occurrences(keys))]
+
+            previous = manifest.lookup(keys)
+            manifest.mark_seen(keys)
+
+            stale = []
+            for position, (key, fingerprint) in enumerate(zip(keys, fingerprints)):
+                entry = previous.get(key)
+                if entry is None:
+                    stats["added"] += 1
+                    stale.append(position)
+                elif entry[0] != fingerprint or entry[1] != version:
+                    stats["changed"] += 1
+                    stale.append(position)
+                else:
+                    stats["unchanged"] += 1
+
+            outputs = [previous[key][2] if key in previous else None for key in keys]
+            if stale:
+                stale_rows = [list(rows[position]) for position in stale]
+                _optimize_rows(stale_rows, title_index, description_index, max_length, separator,
+                               matcher, default_word_count, max_word_count)
+                entries = []
+                for position, row in zip(stale, stale_rows):
+                    outputs[position] = json.dumps(row, ensure_ascii=False)
+                    entries.append((keys[position], fingerprints[position], version, outputs[position]))
+                    feed_file.write(json.dumps(
+                        {"op": "upsert", "key": keys[position], "row": dict(zip(header, row))},
+                        ensure_ascii=False
+                    ) + "\n")
+                manifest.upsert(entries)
+
+            if writer is not None:
+                for row, output in zip(rows, outputs):
+                    output = json.loads(output)
+                    # Reused rows keep this run's tracking parameters
+                    if key_index < len(row) and key_index < len(output):
+                        output[key_index] = row[key_index]
+                    writer.writerow(output)
+            manifest.commit()
+
+        deleted = manifest.unseen_keys()
+        for key in deleted:
+            feed_file.write(json.dumps({"op": "delete", "key": key}, ensure_ascii=False) + "\n")
+        manifest.delete(deleted)
+        manifest.commit()
+        stats["deleted"] = len(deleted)
+    finally:
+        manifest.close()
+
+    feed_file.flush()
+    return stats
+
+
+def _optimize_rows(rows, title_index, description_index, max_length, separator, matcher,
+                   default_word_count, max_word_count):
+    titles = [row[title_index] if title_index < len(row) else "" for row in rows]
+    for row, title in zip(rows, optimize_titles(titles, max_length, separator, matcher)):
+        if title_index < len(row):
+            row[title_index] = title
+    if description_index is not None:
+        descriptions = [row[description_index] if description_index < len(row) else "" for row in rows]
+        for row, description in zip(rows, optimize_descriptions(descriptions, default_word_count, max_word_count)):
+            if description_index < len(row):
+                row[description_index] = description
+
+
+def build_parser(prog=None):
+    parser = argparse.ArgumentParser(
+        prog=prog,
+        description="Re-optimize only the changed rows of a product CSV and emit a JSONL change feed."
+    )
+    parser.add_argument("input", help="input CSV path, or - for stdin")
+    parser.add_argument("--manifest", required=True, help="SQLite manifest kept between runs")
+    parser.add_argument("--feed", default="-", help="JSONL change feed path, or - for stdout (default)")
+    parser.add_argument("--output", default=None, help="also write the full optimized CSV here")
+    parser.add_argument("--title-column", default=TITLE_COLUMN)
+    parser.add_argument("--description-column", default=None)
+    parser.add_argument("--key-column", default=KEY_COLUMN)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--max-length", type=int, default=200)
+    parser.add_argument("--separator", default="|")
+    parser.add_argument("--default-word-count", type=int, default=1500)
+    parser.add_argument("--max-word-count", type=int, default=2000)
+    parser.add_argument("--rules", help="a JSON file holding a rule table to use instead of the built-in one")
+    return parser
+
+
+def main(argv=None, prog=None):
+    parser = build_parser(prog)
+    args = parser.parse_args(argv)
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+    matcher = load_rules(args.rules) if args.rules else None
+    input_file = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8")
+    feed_file = sys.stdout if args.feed == "-" else open(args.feed, "w", encoding="utf-8")
+    output_file = open(args.output, "w", newline="", encoding="utf-8") if args.output else None
+    try:
+        stats = incremental_optimize(
+            input_file,
+            args.manifest,
+            feed_file,
+            output_file,
+            title_column=args.title_column,
+            description_column=args.description_column,
+            key_column=args.key_column,
+            chunk_size=args.chunk_size,
+            max_length=args.max_length,
+            separator=args.separator,
+            default_word_count=args.default_word_count,
+            max_word_count=args.max_word_count,
+            matcher=matcher,
+        )
+    finally:
+        for handle in (input_file, feed_file, output_file):
+            if handle is not None and handle not in (sys.stdin, sys.stdout):
+                handle.close()
+    print(
+        f"Added {stats['added']}, changed {stats['changed']}, "
+        f"unchanged {stats['unchanged']}, deleted {stats['deleted']} rows.",
+        file=sys.stderr
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import re
+
+DEFAULT_SEPARATOR_PATTERN = r'[,\|]'
+READ_SIZE = 1 << 16
+
+_LEADING_WHITESPACE = re.compile(r"\s*")
+
+
+class InvalidInputError(ValueError):
+    """Raised (or passed to the error sink) for an empty or malformed input item."""
+
+    def __init__(self, message, item_index=None):
+        super().__init__(message)
+        self.item_index = item_index
+
+
+def _iter_text(source, read_size):
+    if isinstance(source, str):
+        yield source
+    elif hasattr(source, "read"):
+        while True:
+            chunk = source.read(read_size)
+            if not chunk:
+                return
+            yield chunk
+    else:
+        for chunk in source:
+            yield chunk
+
+
+def iter_items(source, separator_pattern=DEFAULT_SEPARATOR_PATTERN, input_type="titles", quotechar='"',
+               on_error=None, read_size=READ_SIZE):
+    """
+    Lazily split pasted or streamed input into items.
+
+    Items are separated by separator_pattern. An item that starts with
+    quotechar runs until the matching closing quote, so separators inside it
+    are kept ('"Plus | Pro", Basic' gives two items); a doubled quote inside
+    quotes stands for one quote character. Only the current item and one read
+    buffer are held in memory.
+
+    Parameters:
+    source (str, file or iterable): The input text, a text file object, or an iterable of text chunks.
+    separator_pattern (str): The regex matching a separator. Default is '[,\\|]'.
+    input_type (str): The kind of items ('titles' or 'descriptions'), used in error messages.
+    quotechar (str): The quote character, or None to disable quoting. Default is '"'.
+    on_error (callable): Called with an InvalidInputError for each bad item, which is then skipped.
+        If None, the error is raised instead. Default is None.
+    read_size (int): The number of characters read at a time from file objects. Default is 65536.
+
+    Returns:
+    generator: The stripped items.
+    """
+    separator = re.compile(separator_pattern)
+    item_name = input_type[:-1] if input_type.endswith("s") else input_type
+    chunks = _iter_text(source, read_size)
+    buffer = ""
+    position = 0
+    eof = False
+    index = 0
+
+    def refill():
+        # Called whenever the current item may continue past the end of the buffer
+        nonlocal buffer, position, eof
+        chunk = next(chunks, None)
+        if chunk is None:
+            eof = True
+        else:
+            buffer = buffer[position:] + chunk
+            position = 0
+
+    def report(message):
+        error = InvalidInputError(message, index)
+        if on_error is None:
+            raise error
+        on_error(error)
+
+    while True:
+        start = _LEADING_WHITESPACE.match(buffer, position).end()
+        if start == len(buffer) and not eof:
+            refill()
+            continue
+
+        value = None
+        if quotechar and buffer.startswith(quotechar, start):
+            value, start = _scan_quoted(buffer, start + 1, quotechar, eof)
+            if value is None:
+                if not eof:
+                    refill()
+                    continue
+                report(f"Unterminated quoted {item_name} in input.")
+                return
+
+        match = separator.search(buffer, start)
+        if not eof and (match is None or match.end() == len(buffer)):
+            refill()
+            continue
+
+        end = match.start() if match is not None else len(buffer)
+        # Anything between a closing quote and the separator is kept as written
+        text = buffer[start:end].strip()
+        value = text if value is None else value + text
+
+        if value:
+            yield value
+        else:
+            report(f"Invalid input. Please enter at least one {item_name} separated by commas or pipes.")
+        index += 1
+
+        if match is None:
+            return
+        position = match.end()
+
+
+def _scan_quoted(buffer, cursor, quotechar, eof):
+    # Returns (value, index after the closing quote), or (None, None) if the closing quote is not buffered yet
+    parts = []
+    while True:
+        closing = buffer.find(quotechar, cursor)
+        if closing == -1 or (closing + 1 == len(buffer) and not eof):
+            return None, None
+        if buffer.startswith(quotechar, closing + 1):
+            # A doubled quote inside quotes stands for one quote character
+            parts.append(buffer[cursor:closing + 1])
+            cursor = closing + 2
+            continue
+        parts.append(buffer[cursor:closing])
+        return "".join(parts), closing + 1
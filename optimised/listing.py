@@ -0,0 +1,337 @@
+import csv
+import math
+import re
+import sys
+from array import array
+from urllib.parse import parse_qs, urlsplit
+
+from scrape_reader import PROFILES, detect_profile, iter_json_array, iter_listings, to_listing
+
+# The suffix must end its word, so the 'm' of '107 monthly sold' is not read as millions
+_SALES_PATTERN = re.compile(r"([\d][\d,]*(?:\.\d+)?)\s*(?:([kKmM])\b)?")
+_PRICE_PATTERN = re.compile(r"\d[\d,]*(?:\.\d+)?")
+_ITEM_PATTERN = re.compile(r"-i\.(\d+)\.(\d+)")
+_MULTIPLIERS = {"": 1, "k": 1000, "K": 1000, "m": 1000000, "M": 1000000}
+
+# Missing values in the integer columns of a ListingBatch
+MISSING_INT = -1
+
+
+def parse_sales(value):
+    """
+    Parse a sales string such as '20.9k Sold/Month', '107 sold/month' or '9.7k sold'.
+
+    Parameters:
+    value (str or int): The raw sales value.
+
+    Returns:
+    int or None: The number of units, or None if it cannot be parsed.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = _SALES_PATTERN.search(value)
+    if match is None:
+        return None
+    number = float(match.group(1).replace(",", ""))
+    return int(round(number * _MULTIPLIERS[match.group(2) or ""]))
+
+
+def parse_price(value):
+    """
+    Parse a price such as 5.99, '12.90', 'RM1,299.00' or 'RM5 - RM10' (lower bound).
+
+    Parameters:
+    value (str or float): The raw price.
+
+    Returns:
+    float or None: The price, or None if it cannot be parsed.
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _PRICE_PATTERN.search(value)
+    return float(match.group(0).replace(",", "")) if match else None
+
+
+def parse_rating(value):
+    """
+    Parse a star rating between 0 and 5.
+
+    Parameters:
+    value (str or float): The raw rating.
+
+    Returns:
+    float or None: The rating, or None if it is missing or out of range.
+    """
+    rating = parse_price(value)
+    return rating if rating is not None and 0 <= rating <= 5 else None
+
+
+def parse_discount(value):
+    """
+    Parse a discount badge such as '-80%' into a percentage.
+
+    Parameters:
+    value (str): The raw discount.
+
+    Returns:
+    float or None: The discount percentage (80.0 for '-80%'), or None.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return abs(float(value))
+    match = _PRICE_PATTERN.search(value)
+    return float(match.group(0)) if match and "%" in value else None
+
+
+def parse_item_ids(url):
+    """
+    Extract the (shop id, item id) pair from a Shopee product or find-similar URL.
+
+    Parameters:
+    url (str): The URL, e.g. '...-i.1367151879.26777790023?sp_atk=...'.
+
+    Returns:
+    tuple: (shop_id, item_id) as ints, or (None, None) if the URL has no ids.
+    """
+    if not url:
+        return None, None
+    match = _ITEM_PATTERN.search(url)
+    if match:
+        return int(match.group(1)), int(match.group(2))
+    query = parse_qs(urlsplit(url).query)
+    try:
+        return int(query["shopid"][0]), int(query["itemid"][0])
+    except (KeyError, ValueError):
+        return None, None
+
+
+def canonical_url(url):
+    """
+    Reduce a product URL to a form that is the same in every scrape of the listing.
+
+    Parameters:
+    url (str): A product or find-similar URL, possibly carrying tracking parameters.
+
+    Returns:
+    str or None: 'https://<host>/product/<shop id>/<item id>' when the URL has ids,
+        otherwise the URL without its query string and fragment; None for an empty URL.
+    """
+    if not url or not url.strip():
+        return None
+    parts = urlsplit(url.strip())
+    shop_id, item_id = parse_item_ids(url)
+    if shop_id is not None and parts.netloc:
+        return f"https://{parts.netloc.lower()}/product/{shop_id}/{item_id}"
+    return f"{parts.scheme}://{parts.netloc}{parts.path}" if parts.netloc else url.strip()
+
+
+class Listing:
+    """A single marketplace listing with numeric fields parsed once at ingest."""
+
+    __slots__ = (
+        "title", "url", "shop_id", "item_id", "price", "rating", "sales",
+        "location", "discount", "promotions", "thumbnail_url", "image_url", "category",
+    )
+
+    def __init__(self, title="", url=None, shop_id=None, item_id=None, price=None, rating=None, sales=None,
+                 location=None, discount=None, promotions=(), thumbnail_url=None, image_url=None, category=None):
+        self.title = title
+        self.url = url
+        self.shop_id = shop_id
+        self.item_id = item_id
+        self.price = price
+        self.rating = rating
+        self.sales = sales
+        self.location = sys.intern(location) if location else location
+        self.discount = discount
+        self.promotions = tuple(promotions)
+        self.thumbnail_url = thumbnail_url
+        self.image_url = image_url
+        self.category = sys.intern(category) if category else category
+
+    @classmethod
+    def from_scraped(cls, scraped):
+        """Build a Listing from a scrape_reader.ScrapedListing."""
+        shop_id, item_id = parse_item_ids(scraped.url)
+        return cls(
+            title=scraped.title,
+            url=scraped.url,
+            shop_id=shop_id,
+            item_id=item_id,
+            price=scraped.price,
+            rating=parse_rating(scraped.rating),
+            sales=parse_sales(scraped.sales),
+            location=scraped.location,
+            discount=parse_discount(scraped.discount),
+            promotions=scraped.promotions or (),
+            thumbnail_url=scraped.thumbnail_url,
+            image_url=scraped.image_url,
+            category=scraped.category,
+        )
+
+    @classmethod
+    def from_csv_row(cls, row):
+        """Build a Listing from a shopee_products.csv row given as a dict (csv.DictReader)."""
+        url = row.get("Product URL")
+        shop_id, item_id = parse_item_ids(url)
+        promotions = row.get("Promotional Texts") or ""
+        return cls(
+            title=row.get("Product Title") or "",
+            url=url,
+            shop_id=shop_id,
+            item_id=item_id,
+            price=parse_price(row.get("Price")),
+            rating=parse_rating(row.get("Rating")),
+            sales=parse_sales(row.get("Sales Information")),
+            location=row.get("Seller Location"),
+            discount=parse_discount(row.get("Discount")),
+            promotions=[text.strip() for text in promotions.split(";") if text.strip()],
+            thumbnail_url=row.get("Thumbnail Image URL"),
+            image_url=row.get("Full Image URL"),
+            category=row.get("Category"),
+        )
+
+    @property
+    def key(self):
+        return (self.shop_id, self.item_id)
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other):
+        if not isinstance(other, Listing):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return f"Listing(title={self.title!r}, shop_id={self.shop_id}, item_id={self.item_id})"
+
+
+class ListingBatch:
+    """
+    Columnar store of many listings.
+
+    Numeric fields live in typed arrays ('d' floats with NaN for missing
+    values, 'q' integers with MISSING_INT for missing values) and repeated
+    strings such as seller locations are interned, which keeps millions of
+    listings far smaller than the equivalent list of dicts.
+    """
+
+    FLOAT_COLUMNS = ("price", "rating", "discount")
+    INT_COLUMNS = ("shop_id", "item_id", "sales")
+    TEXT_COLUMNS = ("title", "url", "location", "thumbnail_url", "image_url", "category")
+
+    def __init__(self, listings=()):
+        self.columns = {}
+        for name in self.FLOAT_COLUMNS:
+            self.columns[name] = array("d")
+        for name in self.INT_COLUMNS:
+            self.columns[name] = array("q")
+        for name in self.TEXT_COLUMNS:
+            self.columns[name] = []
+        self.columns["promotions"] = []
+        self.extend(listings)
+
+    def append(self, listing):
+        columns = self.columns
+        for name in self.FLOAT_COLUMNS:
+            value = getattr(listing, name)
+            columns[name].append(math.nan if value is None else value)
+        for name in self.INT_COLUMNS:
+            value = getattr(listing, name)
+            columns[name].append(MISSING_INT if value is None else value)
+        for name in self.TEXT_COLUMNS:
+            columns[name].append(getattr(listing, name))
+        columns["promotions"].append(listing.promotions)
+
+    def extend(self, listings):
+        for listing in listings:
+            self.append(listing)
+
+    def __len__(self):
+        return len(self.columns["title"])
+
+    def __getitem__(self, index):
+        values = {}
+        for name in self.FLOAT_COLUMNS:
+            value = self.columns[name][index]
+            values[name] = None if math.isnan(value) else value
+        for name in self.INT_COLUMNS:
+            value = self.columns[name][index]
+            values[name] = None if value == MISSING_INT else value
+        for name in self.TEXT_COLUMNS:
+            values[name] = self.columns[name][index]
+        values["promotions"] = self.columns["promotions"][index]
+        return Listing(**values)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def column(self, name):
+        return self.columns[name]
+
+    def to_numpy(self):
+        """
+        Return zero-copy NumPy views of the numeric columns.
+
+        Returns:
+        dict: Column name to numpy.ndarray (requires numpy).
+        """
+        import numpy as np
+
+        views = {}
+        for name in self.FLOAT_COLUMNS:
+            views[name] = np.frombuffer(self.columns[name], dtype=np.float64)
+        for name in self.INT_COLUMNS:
+            views[name] = np.frombuffer(self.columns[name], dtype=np.int64)
+        return views
+
+
+def read_listings(source, profile="auto"):
+    """
+    Stream a scraped JSON export as parsed Listing objects.
+
+    Parameters:
+    source (str or file): A file path or open text file (see scrape_reader.iter_listings).
+    profile (str or dict): The column-mapping profile. Default is 'auto'.
+
+    Returns:
+    generator: Listing objects in file order.
+    """
+    for scraped in iter_listings(source, profile):
+        yield Listing.from_scraped(scraped)
+
+
+def read_records(source, profile="auto"):
+    """
+    Stream parsed listings together with the records they came from.
+
+    Parameters:
+    source (str): A .csv export (shopee_products.csv) or a scraped JSON array.
+    profile (str or dict): The scrape profile for JSON files (see scrape_reader.PROFILES). Default is 'auto'.
+
+    Returns:
+    generator: (Listing, record) pairs in file order, where record is the original row or JSON object.
+    """
+    if source.lower().endswith(".csv"):
+        with open(source, newline="", encoding="utf-8") as handle:
+            for row in csv.DictReader(handle):
+                yield Listing.from_csv_row(row), row
+        return
+
+    mapping = profile if isinstance(profile, dict) else None
+    if mapping is None and profile != "auto":
+        mapping = PROFILES[profile]
+    with open(source, encoding="utf-8") as handle:
+        for record in iter_json_array(handle):
+            if not isinstance(record, dict):
+                raise ValueError(f"Expected JSON objects in the array, found {type(record).__name__}")
+            if mapping is None:
+                mapping = PROFILES[detect_profile(record)]
+            yield Listing.from_scraped(to_listing(record, mapping)), record
@@ -0,0 +1,257 @@
+import argparse
+import heapq
+import json
+import os
+import pickle
+import sys
+import tempfile
+from itertools import count, islice
+from operator import attrgetter
+
+from listing import read_records
+
+# Listing attributes that reports can rank by, all parsed to numbers at ingest
+RANK_METRICS = ("sales", "price", "rating", "discount")
+# Listing attributes that reports can group by
+GROUP_FIELDS = ("location", "category")
+DEFAULT_RUN_SIZE = 100000
+DEFAULT_FAN_IN = 64
+
+
+def _getter(spec):
+    return attrgetter(spec) if isinstance(spec, str) else spec
+
+
+def top_k(items, k, metric="sales", largest=True, group_by=None):
+    """
+    Select the k best items by a metric while holding at most k items per group.
+
+    Items whose metric is None are skipped. Ties keep the item that came first.
+
+    Parameters:
+    items (iterable): Listing objects, or anything metric and group_by can be applied to.
+    k (int): The number of items to keep (per group).
+    metric (str or callable): A Listing attribute name or a function of an item. Default is 'sales'.
+    largest (bool): Keep the largest values (True) or the smallest. Default is True.
+    group_by (str or callable): A Listing attribute name or a function of an item, or None. Default is None.
+
+    Returns:
+    list or dict: The selected items, best first; with group_by, a dict of such lists keyed by group.
+    """
+    value_of = _getter(metric)
+    group_of = _getter(group_by) if group_by is not None else None
+    sign = 1 if largest else -1
+    heaps = {}
+    if k <= 0:
+        return {} if group_of is not None else []
+    # Min-heaps of (signed value, -position, item): the root is the entry to evict next
+    for position, item in enumerate(items):
+        value = value_of(item)
+        if value is None:
+            continue
+        heap = heaps.setdefault(group_of(item) if group_of is not None else None, [])
+        entry = (sign * value, -position, item)
+        if len(heap) < k:
+            heapq.heappush(heap, entry)
+        elif entry[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, entry)
+
+    ranked = {
+        group: [entry[2] for entry in sorted(heap, key=lambda entry: entry[:2], reverse=True)]
+        for group, heap in heaps.items()
+    }
+    if group_of is None:
+        return ranked.get(None, [])
+    return ranked
+
+
+def rank_key(metric="sales", largest=True, group_by=None):
+    """
+    Build a sort key ordering items by group, then best metric first, with missing values last.
+
+    Parameters:
+    metric (str or callable): A Listing attribute name or a function of an item. Default is 'sales'.
+    largest (bool): Put the largest values first. Default is True.
+    group_by (str or callable): A Listing attribute name or a function of an item, or None. Default is None.
+
+    Returns:
+    callable: A key function for sorted() or external_sort().
+    """
+    value_of = _getter(metric)
+    group_of = _getter(group_by) if group_by is not None else None
+    sign = -1 if largest else 1
+
+    def key(item):
+        value = value_of(item)
+        ranked = (1, 0) if value is None else (0, sign * value)
+        if group_of is None:
+            return ranked
+        group = group_of(item)
+        # Listings without a group sort after every named group
+        return (group is None, group or "") + ranked
+
+    return key
+
+
+def external_sort(items, key, run_size=DEFAULT_RUN_SIZE, fan_in=DEFAULT_FAN_IN, directory=None):
+    """
+    Sort an iterable that may not fit in memory.
+
+    Items are read run_size at a time, sorted, and spilled to temporary
+    files as pickled runs; the runs are then merged (fan_in at a time, in
+    several passes if needed) while streaming. Input that fits in a single
+    run is sorted in memory without touching the disk. The sort is stable.
+
+    Parameters:
+    items (iterable): Picklable items.
+    key (callable): The sort key of an item; see rank_key.
+    run_size (int): Items held in memory per run. Default is 100000.
+    fan_in (int): Runs merged at once, which bounds open files. Default is 64.
+    directory (str): Where runs are spilled. Default is the system temporary directory.
+
+    Returns:
+    generator: The items in sorted order. Spill files are removed when it finishes or is closed.
+
+    Raises:
+    ValueError: If run_size is less than 1 or fan_in less than 2.
+    """
+    if run_size < 1:
+        raise ValueError("run_size must be at least 1")
+    if fan_in < 2:
+        raise ValueError("fan_in must be at least 2")
+    items = iter(items)
+    first = list(islice(items, run_size))
+    if len(first) < run_size:
+        first.sort(key=key)
+        yield from first
+        return
+
+    sequence = count()
+    with tempfile.TemporaryDirectory(prefix="listing-sort-", dir=directory) as spill_dir:
+        runs = []
+        chunk = first
+        while chunk:
+            # Keys are stored with the items so merging never recomputes them; the
+            # sequence number keeps the sort stable and items from being compared
+            chunk = sorted(((key(item), next(sequence), item) for item in chunk), key=_entry_order)
+            runs.append(_write_run(spill_dir, len(runs), chunk))
+            chunk = list(islice(items, run_size))
+        del first, chunk
+
+        while len(runs) > fan_in:
+            merged = []
+            for start in range(0, len(runs), fan_in):
+                group = runs[start:start + fan_in]
+                merged.append(_write_run(spill_dir, f"m{len(merged)}-{len(runs)}", _merge_runs(group)))
+                for path in group:
+                    os.unlink(path)
+            runs = merged
+
+        for entry in _merge_runs(runs):
+            yield entry[2]
+
+
+def _entry_order(entry):
+    return entry[0], entry[1]
+
+
+def _write_run(directory, name, entries):
+    path = os.path.join(directory, f"run-{name}.pickle")
+    with open(path, "wb") as handle:
+        pickler = pickle.Pickler(handle, pickle.HIGHEST_PROTOCOL)
+        for entry in entries:
+            pickler.dump(entry)
+            # The memo would otherwise keep every item of the run alive
+            pickler.clear_memo()
+    return path
+
+
+def _read_run(path):
+    with open(path, "rb") as handle:
+        while True:
+            # A fresh unpickler per entry, as a long-lived one would remember every item it loaded
+            try:
+                yield pickle.load(handle)
+            except EOFError:
+                return
+
+
+def _merge_runs(paths):
+    return heapq.merge(*(_read_run(path) for path in paths), key=_entry_order)
+
+
+def write_json_array(records, output_file):
+    """
+    Write records as a JSON array one element at a time, in the layout of the *_processed.json files.
+
+    Parameters:
+    records (iterable): JSON-serializable records.
+    output_file (file): A text file opened for writing.
+
+    Returns:
+    int: The number of records written.
+    """
+    written = 0
+    output_file.write("[")
+    for record in records:
+        output_file.write(",\n  " if written else "\n  ")
+        output_file.write(json.dumps(record, ensure_ascii=False))
+        written += 1
+    output_file.write("\n]\n" if written else "]\n")
+    return written
+
+
+def _pair_field(name):
+    def get(pair):
+        return getattr(pair[0], name)
+    return get
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(
+        prog=prog,
+        description="Rank scraped listings by a metric, keeping memory bounded however large the input is."
+    )
+    parser.add_argument("mode", choices=("top", "sort"),
+                        help="top: the k best listings (per group); sort: every listing in order")
+    parser.add_argument("input", help="a scraped JSON array or a CSV export")
+    parser.add_argument("-o", "--output", default="-", help="output path, or - for stdout (default)")
+    parser.add_argument("--metric", choices=RANK_METRICS, default="sales")
+    parser.add_argument("--smallest", action="store_true", help="rank the smallest values first")
+    parser.add_argument("--group-by", choices=GROUP_FIELDS, help="rank within each seller location or category")
+    parser.add_argument("-k", type=int, default=100, help="listings kept by top (per group) (default: %(default)s)")
+    parser.add_argument("--run-size", type=int, default=DEFAULT_RUN_SIZE,
+                        help="listings sorted in memory per spilled run (default: %(default)s)")
+    parser.add_argument("--spill-dir", help="directory for sort runs (default: the system temporary directory)")
+    args = parser.parse_args(argv)
+    if args.k < 1:
+        parser.error("-k must be at least 1")
+    if args.run_size < 1:
+        parser.error("--run-size must be at least 1")
+
+    metric = _pair_field(args.metric)
+    group_by = _pair_field(args.group_by) if args.group_by else None
+    pairs = read_records(args.input)
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        if args.mode == "top":
+            ranked = top_k(pairs, args.k, metric, not args.smallest, group_by)
+            if group_by is None:
+                written = write_json_array((record for _, record in ranked), output)
+            else:
+                report = {str(group): [record for _, record in group_pairs] for group, group_pairs in ranked.items()}
+                json.dump(report, output, ensure_ascii=False, indent=2)
+                output.write("\n")
+                written = sum(len(group_pairs) for group_pairs in report.values())
+        else:
+            key = rank_key(metric, not args.smallest, group_by)
+            ordered = external_sort(pairs, key, args.run_size, directory=args.spill_dir)
+            written = write_json_array((record for _, record in ordered), output)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f"Wrote {written} listings.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import os
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+
+# Seconds; suits both per-call stage timings and whole batch runs
+TIME_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 60)
+LENGTH_BUCKETS = (25, 50, 75, 100, 125, 150, 175, 200, 300)
+COUNT_BUCKETS = (0, 1, 2, 3, 4, 6, 8, 10, 15)
+
+# Metric name -> (type, help text); names are written with the registry prefix
+METRIC_HELP = {
+    "stage_seconds": ("histogram", "Time spent in each optimizer stage per call."),
+    "titles_total": ("counter", "Titles optimized."),
+    "rule_hits_total": ("counter", "Titles matched by each title rule."),
+    "titles_unmatched_total": ("counter", "Titles that matched no rule and were kept as written."),
+    "titles_truncated_total": ("counter", "Titles cut to max_length."),
+    "title_length_chars": ("histogram", "Length of optimized titles in characters."),
+    "descriptions_total": ("counter", "Descriptions optimized."),
+    "descriptions_expanded_total": ("counter", "Descriptions that received filler blocks."),
+    "descriptions_truncated_total": ("counter", "Descriptions cut to max_word_count."),
+    "filler_blocks": ("histogram", "Filler blocks appended per description."),
+}
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense (each bucket counts values <= its bound)."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            yield bound, total
+
+
+class _Timer:
+    __slots__ = ("metrics", "stage", "start")
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe("stage_seconds", time.perf_counter() - self.start, TIME_BUCKETS, stage=self.stage)
+
+
+_DISABLED_TIMER = nullcontext()
+
+
+class Metrics:
+    """
+    In-process registry of optimizer counters and histograms.
+
+    Disabled by default. Instrumented code checks enabled once per call and
+    skips all bookkeeping when it is False, so the disabled cost is a single
+    attribute read per batch. Metrics recorded in worker processes (see
+    parallel_optimizer.py) stay in those processes.
+    """
+
+    def __init__(self, enabled=False, prefix="optimizer"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self.counters = {}
+        self.histograms = {}
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        self.counters.clear()
+        self.histograms.clear()
+
+    def increment(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=TIME_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram(buckets)
+        histogram.observe(value)
+
+    def time(self, stage):
+        """
+        Time a block into the stage_seconds histogram.
+
+        Parameters:
+        stage (str): The stage label.
+
+        Returns:
+        context manager: Does nothing while the registry is disabled.
+        """
+        if not self.enabled:
+            return _DISABLED_TIMER
+        return _Timer(self, stage)
+
+    def to_prometheus(self):
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Returns:
+        str: The exposition text, suitable for the node_exporter textfile collector.
+        """
+        names = sorted({name for name, _ in self.counters} | {name for name, _ in self.histograms})
+        lines = []
+        for name in names:
+            kind, help_text = METRIC_HELP.get(name, ("untyped", name))
+            full_name = f"{self.prefix}_{name}"
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} {kind}")
+            for (metric, labels), value in sorted(self.counters.items()):
+                if metric == name:
+                    lines.append(f"{full_name}{_labels(labels)} {_number(value)}")
+            for (metric, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+                if metric != name:
+                    continue
+                for bound, count in histogram.cumulative():
+                    bucket_labels = labels + (("le", "+Inf" if bound == float("inf") else _number(bound)),)
+                    lines.append(f"{full_name}_bucket{_labels(bucket_labels)} {count}")
+                lines.append(f"{full_name}_sum{_labels(labels)} {_number(histogram.sum)}")
+                lines.append(f"{full_name}_count{_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def to_dict(self):
+        """
+        Summarize all metrics as plain data.
+
+        Returns:
+        dict: {"counters": {name: {label string: value}}, "histograms": {name: {label string:
+            {"count", "sum", "mean", "buckets"}}}}, where the label string is e.g. 'rule=ChatGPT'.
+        """
+        counters = {}
+        for (name, labels), value in sorted(self.counters.items()):
+            counters.setdefault(name, {})[_label_key(labels)] = value
+        histograms = {}
+        for (name, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+            histograms.setdefault(name, {})[_label_key(labels)] = {
+                "count": histogram.count,
+                "sum": histogram.sum,
+                "mean": histogram.sum / histogram.count if histogram.count else 0.0,
+                "buckets": {
+                    "+Inf" if bound == float("inf") else _number(bound): count
+                    for bound, count in histogram.cumulative()
+                },
+            }
+        return {"counters": counters, "histograms": histograms}
+
+    def write_prometheus(self, path):
+        _write_atomic(path, self.to_prometheus())
+
+    def write_json(self, path):
+        import json
+
+        _write_atomic(path, json.dumps(self.to_dict(), indent=2) + "\n")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    parts = []
+    for name, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{name}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _label_key(labels):
+    return ",".join(f"{name}={value}" for name, value in labels)
+
+
+def _number(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _write_atomic(path, text):
+    # Scrapers must never see a half-written file, so write a sibling and rename it into place.
+    # json and tempfile are imported where used: they are slow to import and only exports need them
+    import tempfile
+
+    directory = os.path.dirname(os.path.abspath(path))
+    handle, temporary = tempfile.mkstemp(dir=directory, prefix=".metrics-")
+    try:
+        with os.fdopen(handle, "w", encoding="utf-8") as output:
+            output.write(text)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+# The registry the optimizer functions record into
+METRICS = Metrics()
@@ -1,3 +1,5 @@
+from input_tokenizer import InvalidInputError, iter_items
+
 def optimize_titles(titles, max_length=200, separator='|'):
     """
     Optimize product titles for SEO and e-commerce platforms.
@@ -78,37 +80,39 @@ def optimize_shopee_descriptions(descriptions, max_length=500):
     
     return optimized_descriptions
 
-def validate_titles_input(titles_input):
+def validate_titles_input(titles_input, on_error=None):
     """
     Validate the input for product titles and return a list of titles.
     
     Parameters:
     titles_input (str): The input string containing product titles separated by commas.
+    on_error (callable): Called with an InvalidInputError for each bad title, which is then skipped.
+        If None, the error is raised instead. Default is None.
     
     Returns:
     list: A list of validated product titles.
+
+    Raises:
+    InvalidInputError: If a title is empty and no on_error is given.
     """
-    titles = [title.strip() for title in titles_input.split(',')]
-    if len(titles) < 1 or any(title == "" for title in titles):
-        print("Invalid input. Please enter at least one product title separated by commas.")
-        return validate_titles_input(input("Enter product titles to optimize (separated by commas): "))
-    return titles
+    return list(iter_items(titles_input, ',', "titles", on_error=on_error))
 
-def validate_descriptions_input(descriptions_input):
+def validate_descriptions_input(descriptions_input, on_error=None):
     """
     Validate the input for product descriptions and return a list of descriptions.
     
     Parameters:
     descriptions_input (str): The input string containing product descriptions separated by commas.
+    on_error (callable): Called with an InvalidInputError for each bad description, which is then skipped.
+        If None, the error is raised instead. Default is None.
     
     Returns:
     list: A list of validated product descriptions.
+
+    Raises:
+    InvalidInputError: If a description is empty and no on_error is given.
     """
-    descriptions = [desc.strip() for desc in descriptions_input.split(',')]
-    if len(descriptions) < 1 or any(desc == "" for desc in descriptions):
-        print("Invalid input. Please enter at least one product description separated by commas.")
-        return validate_descriptions_input(input("Enter product descriptions to optimize (separated by commas): "))
-    return descriptions
+    return list(iter_items(descriptions_input, ',', "descriptions", on_error=on_error))
 
 def ensure_titles_list(titles):
     """
@@ -119,14 +123,17 @@ def ensure_titles_list(titles):
     
     Returns:
     list: A list of product titles.
+
+    Raises:
+    InvalidInputError: If a string input contains an empty title.
+    TypeError: If the input is neither a string nor a list.
     """
     if isinstance(titles, str):
         return validate_titles_input(titles)
     elif isinstance(titles, list):
         return [title.strip() for title in titles if title.strip()]  # Clean up whitespace and filter out empty titles
     else:
-        print("Invalid input type. Please provide a string or a list of product titles.")
-        return []
+        raise TypeError("Invalid input type. Please provide a string or a list of product titles.")
 
 def ensure_descriptions_list(descriptions):
     """
@@ -137,20 +144,27 @@ def ensure_descriptions_list(descriptions):
     
     Returns:
     list: A list of product descriptions.
+
+    Raises:
+    InvalidInputError: If a string input contains an empty description.
+    TypeError: If the input is neither a string nor a list.
     """
     if isinstance(descriptions, str):
         return validate_descriptions_input(descriptions)
     elif isinstance(descriptions, list):
         return [desc.strip() for desc in descriptions if desc.strip()]  # Clean up whitespace and filter out empty descriptions
     else:
-        print("Invalid input type. Please provide a string or a list of product descriptions.")
-        return []
+        raise TypeError("Invalid input type. Please provide a string or a list of product descriptions.")
 
 def main():
     while True:
         # Ask for new titles
         new_titles_input = input("Enter product titles to optimize (separated by commas): ")
-        new_titles = ensure_titles_list(new_titles_input)  # Ensure input is a list
+        try:
+            new_titles = ensure_titles_list(new_titles_input)  # Ensure input is a list
+        except InvalidInputError:
+            print("Invalid input. Please enter at least one product title separated by commas.")
+            continue
         
         if not new_titles:  # If the list is empty, prompt again
             continue
@@ -163,9 +177,14 @@ def main():
         for title in optimized_product_titles:
             print(title)
         
-        # Ask for descriptions
-        new_descriptions_input = input("\nEnter product descriptions to optimize (separated by commas): ")
-        new_descriptions = ensure_descriptions_list(new_descriptions_input)  # Ensure input is a list
+        # Ask for descriptions until they are valid
+        while True:
+            new_descriptions_input = input("\nEnter product descriptions to optimize (separated by commas): ")
+            try:
+                new_descriptions = ensure_descriptions_list(new_descriptions_input)  # Ensure input is a list
+                break
+            except InvalidInputError:
+                print("Invalid input. Please enter at least one product description separated by commas.")
         
         if not new_descriptions:  # If the list is empty, prompt again
             continue
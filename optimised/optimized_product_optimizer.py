@@ -1,6 +1,10 @@
-import re
+import time
 
-def optimize_titles(titles, max_length=200, separator='|'):
+from input_tokenizer import InvalidInputError, iter_items
+from metrics import COUNT_BUCKETS, LENGTH_BUCKETS, METRICS
+from title_rules import default_matcher
+
+def optimize_titles(titles, max_length=200, separator='|', matcher=None):
     """
     Optimize product titles for SEO and e-commerce platforms.
 
@@ -8,6 +12,7 @@ def optimize_titles(titles, max_length=200, separator='|'):
     titles (list): A list of product titles to optimize.
     max_length (int): The maximum length of the optimized title. Default is 200.
     separator (str): The character used to separate parts of the title. Default is '|'.
+    matcher (RuleMatcher): Compiled title rules (see title_rules.py). Default is the built-in rule table.
 
     Returns:
     list: A list of optimized product titles.
@@ -16,27 +21,22 @@ def optimize_titles(titles, max_length=200, separator='|'):
     >>> optimize_titles(["ChatGPT Product"])
     ["ChatGPT Plus Premium - 24/7 Access to Turbo GPT-4 Vision"]
     """
+    if matcher is None:
+        matcher = default_matcher()
+    # Bound once per call so that, with metrics disabled, each title only pays a local None check
+    metrics = METRICS if METRICS.enabled else None
+    if metrics is not None:
+        started = time.perf_counter()
+
     optimized_titles = []
     for title in titles:
         # Remove special characters and unnecessary formatting
         title = title.replace("[", "").replace("]", "").replace("|", "-").replace("+", "and").strip()
         
         # Standardize the title format and optimize for SEO
-        if "SciSpace" in title:
-            optimized_title = "SciSpace Typeset Premium | AI Copilot | ChatGPT Alternative"
-        elif "ChatGPT" in title:
-            optimized_title = "ChatGPT Plus Premium | 24/7 Access to Turbo GPT-4 Vision"
-        elif "Turnitin" in title:
-            if "CHEAPEST" in title:
-                optimized_title = "Affordable Turnitin Plagiarism Checker & AI Writing Detection Tool | No Repository"
-            else:
-                optimized_title = "Turnitin Plagiarism Checker & AI Writing Detection Tool | No Repository"
-        elif "Private ChatGPT" in title:
-            optimized_title = "Private ChatGPT Plus | Warranty Included"
-        elif "3u ChatGPT" in title:
-            optimized_title = "3u ChatGPT 4 Plus | Warranty Provided"
-        elif "ChatGPT Masterclass" in title:
-            optimized_title = "ChatGPT Masterclass: Ultimate Beginner's Guide"
+        rule = matcher.match(title)
+        if rule is not None:
+            optimized_title = rule.render(title, separator)
         else:
             optimized_title = title  # Fallback to original if no match
         
@@ -45,13 +45,160 @@ def optimize_titles(titles, max_length=200, separator='|'):
         optimized_title = optimized_title.strip()  # Remove any leading/trailing whitespace
         
         # Ensure the title is within a reasonable length for SEO (only need to do this once)
-        if len(optimized_title) > max_length:
+        truncated = len(optimized_title) > max_length
+        if truncated:
             optimized_title = optimized_title[:max_length - 3] + "..."  # Truncate if too long
         
+        if metrics is not None:
+            _record_title(metrics, rule, truncated, len(optimized_title))
         optimized_titles.append(optimized_title)
     
+    if metrics is not None:
+        metrics.increment("titles_total", len(optimized_titles))
+        metrics.observe("stage_seconds", time.perf_counter() - started, stage="optimize_titles")
     return optimized_titles
 
+
+def _record_title(metrics, rule, truncated, length):
+    if rule is None:
+        metrics.increment("titles_unmatched_total")
+    else:
+        metrics.increment("rule_hits_total", rule=rule.name)
+    if truncated:
+        metrics.increment("titles_truncated_total")
+    metrics.observe("title_length_chars", length, LENGTH_BUCKETS)
+
+QUALITY_PHRASE = " This product is made from high-quality materials."
+EASE_PHRASE = " It is designed for easy use, making it perfect for everyone."
+
+# Filler sentences appended (in order) to descriptions shorter than the target word count.
+# Every sentence ends with a space, so word counts of consecutive fragments simply add up.
+INTRO_FILLERS = [
+    " Our product has been tested and proven effective by thousands of satisfied customers. ",
+    "You'll enjoy premium quality and exceptional performance compared to competitors. ",
+    "We stand behind our product with excellent customer service and a satisfaction guarantee. ",
+    "Whether you're a beginner or an expert, you'll find this product intuitive and valuable. ",
+]
+
+ADDITIONAL_FILLERS = [
+    "Each product is carefully inspected before shipping to ensure the highest quality. ",
+    "Our dedicated team has spent years perfecting this design. ",
+    "Customers consistently rate this product 5 stars for its reliability and performance. ",
+    "Unlike similar products on the market, ours features premium materials that last longer. ",
+    "You'll notice the difference in quality from the moment you unbox our product. ",
+    "We've thought of everything you need for a seamless experience. ",
+    "This product solves problems you didn't even know you had. ",
+    "The attention to detail in this product is what sets it apart from competitors. ",
+    "We've optimized every aspect of this product for maximum efficiency and user satisfaction. ",
+    "Backed by extensive research and development, this product represents the pinnacle of innovation. ",
+]
+
+
+def _fragment(text):
+    # Pre-split once so composing a description never re-tokenizes a filler
+    words = tuple(text.split())
+    return text, len(words), words
+
+
+_QUALITY_FRAGMENT = _fragment(QUALITY_PHRASE)
+_EASE_FRAGMENT = _fragment(EASE_PHRASE)
+_INTRO_FRAGMENTS = [_fragment(text) for text in INTRO_FILLERS]
+_ADDITIONAL_FRAGMENTS = [_fragment(text) for text in ADDITIONAL_FILLERS]
+
+# Every block a description can be padded with, addressed by index in plan_description
+FILLER_FRAGMENTS = [_QUALITY_FRAGMENT, _EASE_FRAGMENT] + _INTRO_FRAGMENTS + _ADDITIONAL_FRAGMENTS
+_QUALITY_BLOCK = 0
+_EASE_BLOCK = 1
+_INTRO_BLOCKS = range(2, 2 + len(_INTRO_FRAGMENTS))
+_ADDITIONAL_BLOCKS = range(_INTRO_BLOCKS.stop, len(FILLER_FRAGMENTS))
+
+
+def plan_description(description, default_word_count=1500, max_word_count=2000):
+    """
+    Decide how a description is composed without building its text.
+
+    Parameters:
+    description (str): The product description to optimize.
+    default_word_count (int): The target word count. Default is 1500 words.
+    max_word_count (int): The maximum allowed word count. Default is 2000 words.
+
+    Returns:
+    tuple: (stripped description, indexes into FILLER_FRAGMENTS appended in order,
+        word limit if the result is truncated or None).
+    """
+    # Remove unnecessary whitespace
+    description = description.strip()
+    word_count = len(description.split())
+    blocks = []
+
+    # Enhance the description with SEO-friendly phrases
+    lowered = description.lower()
+    if "high quality" not in lowered:
+        blocks.append(_QUALITY_BLOCK)
+        word_count += _QUALITY_FRAGMENT[1]
+    if "easy to use" not in lowered:
+        blocks.append(_EASE_BLOCK)
+        word_count += _EASE_FRAGMENT[1]
+
+    # Add generic filler content if the description is too short, stopping once the target is reached
+    if word_count < default_word_count:
+        for block in _INTRO_BLOCKS:
+            blocks.append(block)
+            word_count += FILLER_FRAGMENTS[block][1]
+        for block in _ADDITIONAL_BLOCKS:
+            if word_count >= default_word_count:
+                break
+            blocks.append(block)
+            word_count += FILLER_FRAGMENTS[block][1]
+
+    # Ensure the description is within the specified word limit
+    word_limit = max_word_count if word_count > max_word_count else None
+    return description, blocks, word_limit
+
+
+def render_description(description, blocks, word_limit=None, fragments=FILLER_FRAGMENTS):
+    """
+    Build the text of a planned description.
+
+    Parameters:
+    description (str): The stripped product description.
+    blocks (iterable): Indexes into fragments, in order.
+    word_limit (int): Truncate to this many words and append '...', or None. Default is None.
+    fragments (list): The (text, word count, words) blocks. Default is FILLER_FRAGMENTS.
+
+    Returns:
+    str: The optimized description.
+    """
+    if word_limit is None:
+        return "".join([description] + [fragments[block][0] for block in blocks])
+
+    kept = description.split()[:word_limit]
+    for block in blocks:
+        if len(kept) >= word_limit:
+            break
+        kept.extend(fragments[block][2][:word_limit - len(kept)])
+    return " ".join(kept) + "..."
+
+
+def compose_description(description, default_word_count=1500, max_word_count=2000):
+    """
+    Build a single optimized description in time linear in its length.
+
+    The input is tokenized once; every appended fragment carries a precomputed
+    word count, the text is assembled with a single join, and truncation only
+    re-joins the words that are kept.
+
+    Parameters:
+    description (str): The product description to optimize.
+    default_word_count (int): The target word count. Default is 1500 words.
+    max_word_count (int): The maximum allowed word count. Default is 2000 words.
+
+    Returns:
+    str: The optimized description.
+    """
+    return render_description(*plan_description(description, default_word_count, max_word_count))
+
+
 def optimize_descriptions(descriptions, default_word_count=1500, max_word_count=2000):
     """
     Optimize product descriptions for e-commerce listings.
@@ -68,61 +215,24 @@ def optimize_descriptions(descriptions, default_word_count=1500, max_word_count=
     >>> optimize_descriptions(["Basic product description"])
     ["Basic product description This product is made from high-quality materials. It is designed for easy use, making it perfect for everyone."]
     """
-    optimized_descriptions = []
-    
-    for description in descriptions:
-        # Remove unnecessary whitespace
-        description = description.strip()
-        
-        # Count initial words
-        word_count = len(description.split())
-        
-        # Enhance the description with SEO-friendly phrases
-        if "high quality" not in description.lower():
-            description += " This product is made from high-quality materials."
-        
-        if "easy to use" not in description.lower():
-            description += " It is designed for easy use, making it perfect for everyone."
-        
-        # Add more content if the description is too short (less than default_word_count)
-        current_word_count = len(description.split())
-        if current_word_count < default_word_count:
-            # Add generic filler content to reach the target word count
-            words_to_add = default_word_count - current_word_count
-            if words_to_add > 0:
-                description += f" Our product has been tested and proven effective by thousands of satisfied customers. "
-                description += f"You'll enjoy premium quality and exceptional performance compared to competitors. "
-                description += f"We stand behind our product with excellent customer service and a satisfaction guarantee. "
-                description += f"Whether you're a beginner or an expert, you'll find this product intuitive and valuable. "
-                
-                # Continue adding filler as needed to approach target word count
-                additional_fillers = [
-                    "Each product is carefully inspected before shipping to ensure the highest quality. ",
-                    "Our dedicated team has spent years perfecting this design. ",
-                    "Customers consistently rate this product 5 stars for its reliability and performance. ",
-                    "Unlike similar products on the market, ours features premium materials that last longer. ",
-                    "You'll notice the difference in quality from the moment you unbox our product. ",
-                    "We've thought of everything you need for a seamless experience. ",
-                    "This product solves problems you didn't even know you had. ",
-                    "The attention to detail in this product is what sets it apart from competitors. ",
-                    "We've optimized every aspect of this product for maximum efficiency and user satisfaction. ",
-                    "Backed by extensive research and development, this product represents the pinnacle of innovation. "
-                ]
-                
-                filler_index = 0
-                current_word_count = len(description.split())
-                while current_word_count < default_word_count and filler_index < len(additional_fillers):
-                    description += additional_fillers[filler_index]
-                    filler_index += 1
-                    current_word_count = len(description.split())
-        
-        # Ensure the description is within the specified word limit
-        words = description.split()
-        if len(words) > max_word_count:
-            description = " ".join(words[:max_word_count]) + "..."
-        
-        optimized_descriptions.append(description)
-    
+    if not METRICS.enabled:
+        return [
+            compose_description(description, default_word_count, max_word_count)
+            for description in descriptions
+        ]
+
+    with METRICS.time("optimize_descriptions"):
+        optimized_descriptions = []
+        for description in descriptions:
+            plan = plan_description(description, default_word_count, max_word_count)
+            _, blocks, word_limit = plan
+            if blocks:
+                METRICS.increment("descriptions_expanded_total")
+            if word_limit is not None:
+                METRICS.increment("descriptions_truncated_total")
+            METRICS.observe("filler_blocks", len(blocks), COUNT_BUCKETS)
+            optimized_descriptions.append(render_description(*plan))
+        METRICS.increment("descriptions_total", len(optimized_descriptions))
     return optimized_descriptions
 
 def validate_input(input_text, separator_pattern=r'[,\|]', input_type="titles"):
@@ -130,42 +240,56 @@ def validate_input(input_text, separator_pattern=r'[,\|]', input_type="titles"):
     Validate user input and return a list of items.
     
     Parameters:
-    input_text (str): The input string containing items separated by commas or pipes.
+    input_text (str or file): The input containing items separated by commas or pipes.
     separator_pattern (str): The regex pattern to use for splitting the input. Default is '[,\\|]'.
     input_type (str): The type of input being validated ('titles' or 'descriptions').
     
     Returns:
     list: A list of validated items.
+
+    Raises:
+    InvalidInputError: If any item is empty or a quoted item is not closed.
     """
-    items = [item.strip() for item in re.split(separator_pattern, input_text)]
+    return list(iter_items(input_text, separator_pattern, input_type))
 
-    if len(items) < 1 or any(item == "" for item in items):
-        print(f"Invalid input. Please enter at least one {input_type[:-1]} separated by commas or pipes.")
-        return validate_input(
-            input(f"Enter product {input_type} to optimize (separated by commas or pipes): "),
-            separator_pattern,
-            input_type
-        )
-    return items
+def prompt_items(input_type="titles"):
+    """
+    Ask for items until the user enters a valid list.
+    
+    Parameters:
+    input_type (str): The type of items being requested ('titles' or 'descriptions').
+    
+    Returns:
+    list: A list of validated items.
+    """
+    while True:
+        text = input(f"\nEnter product {input_type} to optimize (separated by commas or pipes): ")
+        try:
+            return validate_input(text, input_type=input_type)
+        except InvalidInputError as error:
+            print(error)
 
 def ensure_list(items, input_type="titles"):
     """
     Ensure that the input is a list of items.
     
     Parameters:
-    items (str or list): The input containing items, either as a string or a list.
+    items (str, file or list): The input containing items, either as a string, a text file or a list.
     input_type (str): The type of items being processed ('titles' or 'descriptions').
     
     Returns:
     list: A list of items.
+
+    Raises:
+    InvalidInputError: If string or file input contains an empty or malformed item.
+    TypeError: If the input is not a string, a file or a list.
     """
-    if isinstance(items, str):
+    if isinstance(items, str) or hasattr(items, "read"):
         return validate_input(items, input_type=input_type)
     elif isinstance(items, list):
         return [item.strip() for item in items if item.strip()]  # Clean up whitespace and filter out empty items
     else:
-        print(f"Invalid input type. Please provide a string or a list of product {input_type}.")
-        return []
+        raise TypeError(f"Invalid input type. Please provide a string or a list of product {input_type}.")
 
 def main():
     print("=== Product Optimization Tool ===")
@@ -185,13 +309,7 @@ def main():
             
         if choice in ["1", "3"]:
             # Optimize titles
-            title_input = input("\nEnter product titles to optimize (separated by commas or pipes): ")
-            
-            if not title_input.strip():
-                print("Invalid input. Please enter at least one product title.")
-                continue
-                
-            titles = ensure_list(title_input, "titles")
+            titles = prompt_items("titles")
             optimized_titles = optimize_titles(titles)
             
             print("\nOptimized Titles:")
@@ -200,13 +318,7 @@ def main():
         
         if choice in ["2", "3"]:
             # Optimize descriptions
-            desc_input = input("\nEnter product descriptions to optimize (separated by commas or pipes): ")
-            
-            if not desc_input.strip():
-                print("Invalid input. Please enter at least one product description.")
-                continue
-                
-            descriptions = ensure_list(desc_input, "descriptions")
+            descriptions = prompt_items("descriptions")
             optimized_descriptions = optimize_descriptions(descriptions)
             
             print("\nOptimized Descriptions:")
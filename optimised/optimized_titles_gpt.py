@@ -50,26 +50,24 @@ def optimize_titles(titles, max_length=200, separator='|'):
     
     return optimized_titles
 
-import re
-
-def validate_titles_input(titles_input):
+from input_tokenizer import InvalidInputError, iter_items
 
+def validate_titles_input(titles_input, on_error=None):
     """
     Validate the input for product titles and return a list of titles.
     
     Parameters:
     titles_input (str): The input string containing product titles separated by commas.
+    on_error (callable): Called with an InvalidInputError for each bad title, which is then skipped.
+        If None, the error is raised instead. Default is None.
     
     Returns:
     list: A list of validated product titles.
-    """
-    titles = [title.strip() for title in re.split(r'[,\|]', titles_input)]
-
-    if len(titles) < 1 or any(title == "" for title in titles):
-        print("Invalid input. Please enter at least one product title separated by commas or use a valid separator (comma or pipe).")
 
-        return validate_titles_input(input("Enter product titles to optimize (separated by commas): "))
-    return titles
+    Raises:
+    InvalidInputError: If a title is empty and no on_error is given.
+    """
+    return list(iter_items(titles_input, r'[,\|]', "titles", on_error=on_error))
 
 def ensure_titles_list(titles):
     """
@@ -80,14 +78,17 @@ def ensure_titles_list(titles):
     
     Returns:
     list: A list of product titles.
+
+    Raises:
+    InvalidInputError: If a string input contains an empty title.
+    TypeError: If the input is neither a string nor a list.
     """
     if isinstance(titles, str):
         return validate_titles_input(titles)
     elif isinstance(titles, list):
         return [title.strip() for title in titles if title.strip()]  # Clean up whitespace and filter out empty titles
     else:
-        print("Invalid input type. Please provide a string or a list of product titles.")
-        return []
+        raise TypeError("Invalid input type. Please provide a string or a list of product titles.")
 
 def main():
     while True:
@@ -98,7 +99,11 @@ def main():
             print("Invalid input. Please enter at least one product title.")
             continue
         
-        new_titles = ensure_titles_list(new_titles_input)  # Ensure input is a list
+        try:
+            new_titles = ensure_titles_list(new_titles_input)  # Ensure input is a list
+        except InvalidInputError:
+            print("Invalid input. Please enter at least one product title separated by commas or use a valid separator (comma or pipe).")
+            continue
 
         
         # Optimize the product titles
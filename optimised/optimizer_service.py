@@ -0,0 +1,442 @@
+import argparse
+import json
+import os
+import queue
+import socketserver
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from csv_batch import iter_chunks
+from optimized_product_optimizer import optimize_titles, optimize_descriptions
+from title_rules import default_matcher
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Requests arriving within this window are optimized together in one call
+DEFAULT_BATCH_DELAY = 0.001
+DEFAULT_BATCH_SIZE = 256
+# Requests waiting for a batch beyond this count are rejected with 503 instead of queueing forever
+DEFAULT_MAX_PENDING = 10000
+DEFAULT_REQUEST_TIMEOUT = 5.0
+DEFAULT_MAX_BODY_SIZE = 16 * 1024 * 1024
+# A client that stops sending (e.g. a body shorter than its Content-Length) is dropped after this many seconds
+DEFAULT_SOCKET_TIMEOUT = 30.0
+# Bulk requests with at least this many items are split across the worker processes
+DEFAULT_BULK_CHUNK_SIZE = 2000
+
+TITLE_OPTIONS = {"max_length": int, "separator": str}
+DESCRIPTION_OPTIONS = {"default_word_count": int, "max_word_count": int}
+
+_STOP = object()
+
+
+class ServiceOverloaded(RuntimeError):
+    """Raised when a request cannot be queued because too many are already pending."""
+
+
+class RequestError(ValueError):
+    """Raised for a malformed request; carries the HTTP status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class MicroBatcher:
+    """
+    Collect single-item requests from many threads into batched optimizer calls.
+
+    A background thread takes the first waiting request, then keeps collecting
+    for at most max_delay seconds or until max_batch_size requests are waiting,
+    and runs func once per distinct set of options in the batch. The queue is
+    bounded: submit raises ServiceOverloaded when max_pending requests wait.
+    """
+
+    def __init__(self, func, max_batch_size=DEFAULT_BATCH_SIZE, max_delay=DEFAULT_BATCH_DELAY,
+                 max_pending=DEFAULT_MAX_PENDING):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if max_pending < 1:
+            # queue.Queue treats 0 as unbounded, which would silently turn off backpressure
+            raise ValueError("max_pending must be at least 1")
+        self.func = func
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.stats = {"requests": 0, "batches": 0, "rejected": 0}
+        # submit() runs on the request threads, _process() on the batching thread
+        self._stats_lock = threading.Lock()
+        self._queue = queue.Queue(max_pending)
+        self._thread = threading.Thread(target=self._run, name=f"batcher-{func.__name__}", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self):
+        return self._queue.qsize()
+
+    def stats_snapshot(self):
+        with self._stats_lock:
+            return dict(self.stats)
+
+    def submit(self, item, **options):
+        """
+        Queue one item for the next batch.
+
+        Parameters:
+        item (str): The title or description.
+        **options: Keyword arguments for func (e.g. max_length, separator).
+
+        Returns:
+        Future: Resolves to the optimized item.
+        """
+        future = Future()
+        try:
+            self._queue.put_nowait((item, tuple(sorted(options.items())), future))
+        except queue.Full:
+            with self._stats_lock:
+                self.stats["rejected"] += 1
+            raise ServiceOverloaded("too many pending requests") from None
+        return future
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.max_delay
+            stopping = False
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is _STOP:
+                    stopping = True
+                    break
+                batch.append(entry)
+            self._process(batch)
+            if stopping:
+                return
+
+    def _process(self, batch):
+        groups = {}
+        for item, options, future in batch:
+            groups.setdefault(options, []).append((item, future))
+        with self._stats_lock:
+            self.stats["requests"] += len(batch)
+            self.stats["batches"] += len(groups)
+        for options, entries in groups.items():
+            try:
+                results = self.func([item for item, _ in entries], **dict(options))
+            except Exception as error:
+                for _, future in entries:
+                    future.set_exception(error)
+                continue
+            for (_, future), result in zip(entries, results):
+                future.set_result(result)
+
+
+def _warm_up():
+    # Runs once in each worker process so the first bulk request does not pay for imports and rule compilation
+    optimize_titles(["ChatGPT"], matcher=default_matcher())
+
+
+class OptimizerService:
+    """
+    The request handling behind the HTTP service, independent of the transport.
+
+    Single titles and descriptions go through a MicroBatcher each. Bulk requests
+    are optimized directly, split across a pool of warm worker processes when
+    workers is set and the request is large enough.
+    """
+
+    def __init__(self, max_batch_size=DEFAULT_BATCH_SIZE, max_delay=DEFAULT_BATCH_DELAY,
+                 max_pending=DEFAULT_MAX_PENDING, workers=0, bulk_chunk_size=DEFAULT_BULK_CHUNK_SIZE,
+                 request_timeout=DEFAULT_REQUEST_TIMEOUT, matcher=None):
+        self.matcher = default_matcher() if matcher is None else matcher
+        self.request_timeout = request_timeout
+        self.bulk_chunk_size = bulk_chunk_size
+        batching = {"max_batch_size": max_batch_size, "max_delay": max_delay, "max_pending": max_pending}
+        self.titles = MicroBatcher(self._optimize_titles, **batching)
+        self.descriptions = MicroBatcher(optimize_descriptions, **batching)
+        self.executor = None
+        if workers:
+            self.executor = ProcessPoolExecutor(max_workers=workers, initializer=_warm_up)
+            # Start every worker now rather than on the first bulk request
+            for future in [self.executor.submit(_warm_up) for _ in range(workers)]:
+                future.result()
+
+    def _optimize_titles(self, titles, **options):
+        return optimize_titles(titles, matcher=self.matcher, **options)
+
+    def health(self):
+        return {
+            "status": "ok",
+            "rules_version": self.matcher.version,
+            "pending": {"titles": self.titles.pending, "descriptions": self.descriptions.pending},
+            "batches": {
+                "titles": self.titles.stats_snapshot(),
+                "descriptions": self.descriptions.stats_snapshot(),
+            },
+        }
+
+    def optimize_title(self, payload):
+        title = _require_string(payload, "title")
+        return {"title": self._wait(self.titles.submit(title, **_options(payload, TITLE_OPTIONS)))}
+
+    def optimize_description(self, payload):
+        description = _require_string(payload, "description")
+        options = _options(payload, DESCRIPTION_OPTIONS)
+        return {"description": self._wait(self.descriptions.submit(description, **options))}
+
+    def optimize_bulk(self, payload):
+        response = {}
+        if "titles" in payload:
+            titles = _require_strings(payload, "titles")
+            options = _options(payload, TITLE_OPTIONS)
+            if self.matcher is not default_matcher():
+                options["matcher"] = self.matcher
+            response["titles"] = self._bulk(optimize_titles, titles, options)
+        if "descriptions" in payload:
+            descriptions = _require_strings(payload, "descriptions")
+            response["descriptions"] = self._bulk(optimize_descriptions, descriptions,
+                                                  _options(payload, DESCRIPTION_OPTIONS))
+        if not response:
+            raise RequestError("expected 'titles' and/or 'descriptions'")
+        return response
+
+    def _bulk(self, func, items, options):
+        if self.executor is None or len(items) < 2 * self.bulk_chunk_size:
+            return func(items, **options)
+        results = []
+        for chunk in self.executor.map(partial(func, **options), iter_chunks(items, self.bulk_chunk_size)):
+            results.extend(chunk)
+        return results
+
+    def _wait(self, future):
+        try:
+            return future.result(timeout=self.request_timeout)
+        except FutureTimeoutError:
+            raise RequestError("timed out waiting for the batch", status=504) from None
+
+    def handle(self, method, path, payload=None):
+        """
+        Dispatch one request.
+
+        Parameters:
+        method (str): 'GET' or 'POST'.
+        path (str): The request path ('/health', '/titles', '/descriptions' or '/bulk').
+        payload (dict): The decoded JSON body of a POST request.
+
+        Returns:
+        dict: The JSON response body.
+
+        Raises:
+        RequestError: For an unknown route or an invalid payload.
+        ServiceOverloaded: When the batch queue is full.
+        """
+        routes = {
+            ("GET", "/health"): lambda _: self.health(),
+            ("POST", "/titles"): self.optimize_title,
+            ("POST", "/descriptions"): self.optimize_description,
+            ("POST", "/bulk"): self.optimize_bulk,
+        }
+        route = routes.get((method, path.split("?", 1)[0]))
+        if route is None:
+            raise RequestError(f"no route for {method} {path}", status=404)
+        if method == "POST" and not isinstance(payload, dict):
+            raise RequestError("expected a JSON object")
+        return route(payload)
+
+    def close(self):
+        self.titles.close()
+        self.descriptions.close()
+        if self.executor is not None:
+            self.executor.shutdown()
+
+
+def _require_string(payload, field):
+    value = payload.get(field)
+    if not isinstance(value, str):
+        raise RequestError(f"'{field}' must be a string")
+    return value
+
+
+def _require_strings(payload, field):
+    values = payload.get(field)
+    if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+        raise RequestError(f"'{field}' must be a list of strings")
+    return values
+
+
+def _options(payload, allowed):
+    options = {}
+    for name, kind in allowed.items():
+        if name in payload:
+            value = payload[name]
+            if not isinstance(value, kind) or isinstance(value, bool):
+                raise RequestError(f"'{name}' must be of type {kind.__name__}")
+            options[name] = value
+    return options
+
+
+class OptimizerRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "ProductOptimizer/1.0"
+    # Buffer the response so headers and body leave in one write; written separately, keep-alive
+    # clients stall for ~40 ms on Nagle's algorithm waiting for a delayed ACK
+    wbufsize = -1
+    timeout = DEFAULT_SOCKET_TIMEOUT
+
+    def do_GET(self):
+        self._dispatch(None)
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True
+            self._send(400, {"error": "invalid Content-Length"})
+            return
+        if length > self.server.max_body_size:
+            self.close_connection = True
+            self._send(413, {"error": "request body too large"})
+            return
+        try:
+            body = self.rfile.read(length)
+        except TimeoutError:
+            self.close_connection = True
+            self._send(408, {"error": "timed out reading the request body"})
+            return
+        try:
+            payload = json.loads(body or b"null")
+        except ValueError:
+            self._send(400, {"error": "invalid JSON"})
+            return
+        self._dispatch(payload)
+
+    def _dispatch(self, payload):
+        try:
+            body = self.server.service.handle(self.command, self.path, payload)
+        except RequestError as error:
+            self._send(error.status, {"error": str(error)})
+        except ServiceOverloaded as error:
+            self._send(503, {"error": str(error)}, {"Retry-After": "1"})
+        except Exception as error:
+            self.log_error("error handling %s %s: %r", self.command, self.path, error)
+            self._send(500, {"error": "internal server error"})
+        else:
+            self._send(200, body)
+
+    def _send(self, status, body, headers=None):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self):
+        # Unix socket peers have no address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class _ServiceMixin:
+    daemon_threads = True
+    # The socketserver default of 5 drops connections under a burst of concurrent clients
+    request_queue_size = 1024
+    max_body_size = DEFAULT_MAX_BODY_SIZE
+    verbose = False
+    service = None
+
+
+class OptimizerHTTPServer(_ServiceMixin, ThreadingHTTPServer):
+    pass
+
+
+class OptimizerUnixServer(_ServiceMixin, socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    pass
+
+
+def create_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_socket=None, verbose=False):
+    """
+    Bind an HTTP server for the service on a TCP port or a Unix socket.
+
+    Parameters:
+    service (OptimizerService): The service handling the requests.
+    host (str): The TCP host. Default is '127.0.0.1'.
+    port (int): The TCP port, or 0 for any free port. Default is 8765.
+    unix_socket (str): A Unix socket path to listen on instead of TCP. Default is None.
+    verbose (bool): Log every request to stderr. Default is False.
+
+    Returns:
+    socketserver.BaseServer: The bound server; call serve_forever() to run it.
+    """
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.unlink(unix_socket)
+        server = OptimizerUnixServer(unix_socket, OptimizerRequestHandler)
+    else:
+        server = OptimizerHTTPServer((host, port), OptimizerRequestHandler)
+    server.service = service
+    server.verbose = verbose
+    return server
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Serve the product optimizer over HTTP.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix-socket", help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="maximum requests per batch (default: %(default)s)")
+    parser.add_argument("--batch-delay-ms", type=float, default=DEFAULT_BATCH_DELAY * 1000,
+                        help="how long to wait for more requests to join a batch (default: %(default)s)")
+    parser.add_argument("--max-pending", type=int, default=DEFAULT_MAX_PENDING,
+                        help="queued requests before answering 503 (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="worker processes for large bulk requests (default: none)")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args(argv)
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+    if args.max_pending < 1:
+        parser.error("--max-pending must be at least 1")
+
+    service = OptimizerService(
+        max_batch_size=args.batch_size,
+        max_delay=args.batch_delay_ms / 1000,
+        max_pending=args.max_pending,
+        workers=args.workers,
+    )
+    server = create_server(service, args.host, args.port, args.unix_socket, args.verbose)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        if args.unix_socket and os.path.exists(args.unix_socket):
+            os.unlink(args.unix_socket)
+
+
+if __name__ == "__main__":
+    main()
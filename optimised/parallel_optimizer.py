@@ -0,0 +1,146 @@
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import partial
+
+from csv_batch import iter_chunks
+from optimized_product_optimizer import optimize_titles, optimize_descriptions
+
+DEFAULT_CHUNK_SIZE = 2000
+# Below this many items the cost of starting worker processes outweighs the gain
+DEFAULT_INLINE_THRESHOLD = 10000
+
+
+def _run_chunk(func, start, chunk, kwargs):
+    return start, func(chunk, **kwargs)
+
+
+def parallel_optimize(func, items, chunk_size=DEFAULT_CHUNK_SIZE, max_workers=None, ordered=True,
+                      inline_threshold=DEFAULT_INLINE_THRESHOLD, **kwargs):
+    """
+    Run a list-in/list-out optimizer over an iterable using a process pool.
+
+    The input is consumed lazily in chunks and at most two chunks per worker are
+    in flight at any time, so arbitrarily long inputs use bounded memory. Inputs
+    shorter than inline_threshold are processed in the current process.
+
+    Parameters:
+    func (callable): A module-level function taking a list of items (e.g. optimize_titles).
+    items (iterable): The items to optimize.
+    chunk_size (int): The number of items sent to a worker at a time. Default is 2000.
+    max_workers (int): The number of worker processes. Default is os.cpu_count().
+    ordered (bool): If True, yield results in input order; otherwise yield (index, result)
+        pairs as soon as each chunk completes. Default is True.
+    inline_threshold (int): Inputs with fewer items run without a pool. Default is 10000.
+    **kwargs: Extra keyword arguments passed to func (e.g. max_length, separator).
+
+    Returns:
+    generator: Optimized items, or (index, optimized item) pairs when ordered is False.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    max_workers = max_workers or os.cpu_count() or 1
+
+    chunks = iter_chunks(items, chunk_size)
+
+    # Buffer chunks until we know whether the input is big enough to parallelize
+    buffered = []
+    buffered_items = 0
+    for chunk in chunks:
+        buffered.append(chunk)
+        buffered_items += len(chunk)
+        if buffered_items >= inline_threshold:
+            break
+    else:
+        yield from _run_inline(func, buffered, chunk_size, ordered, kwargs)
+        return
+
+    if max_workers == 1:
+        yield from _run_inline(func, _chain(buffered, chunks), chunk_size, ordered, kwargs)
+        return
+
+    work = partial(_run_chunk, func)
+    max_in_flight = max_workers * 2
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque() if ordered else set()
+        start = 0
+        for chunk in _chain(buffered, chunks):
+            future = executor.submit(work, start, chunk, kwargs)
+            start += len(chunk)
+            if ordered:
+                pending.append(future)
+                if len(pending) >= max_in_flight:
+                    yield from pending.popleft().result()[1]
+            else:
+                pending.add(future)
+                if len(pending) >= max_in_flight:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    yield from _indexed(done)
+
+        if ordered:
+            while pending:
+                yield from pending.popleft().result()[1]
+        else:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                yield from _indexed(done)
+
+
+def _chain(buffered, chunks):
+    yield from buffered
+    yield from chunks
+
+
+def _run_inline(func, chunks, chunk_size, ordered, kwargs):
+    start = 0
+    for chunk in chunks:
+        results = func(chunk, **kwargs)
+        if ordered:
+            yield from results
+        else:
+            for offset, result in enumerate(results):
+                yield start + offset, result
+        start += len(chunk)
+
+
+def _indexed(done):
+    for future in done:
+        start, results = future.result()
+        for offset, result in enumerate(results):
+            yield start + offset, result
+
+
+def parallel_optimize_titles(titles, max_length=200, separator='|', **options):
+    """
+    Optimize titles across a process pool (see parallel_optimize for options).
+
+    Parameters:
+    titles (iterable): The product titles to optimize.
+    max_length (int): Passed to optimize_titles. Default is 200.
+    separator (str): Passed to optimize_titles. Default is '|'.
+
+    Returns:
+    generator: Optimized titles (or (index, title) pairs when ordered=False).
+    """
+    return parallel_optimize(optimize_titles, titles, max_length=max_length, separator=separator, **options)
+
+
+def parallel_optimize_descriptions(descriptions, default_word_count=1500, max_word_count=2000, **options):
+    """
+    Optimize descriptions across a process pool (see parallel_optimize for options).
+
+    Parameters:
+    descriptions (iterable): The product descriptions to optimize.
+    default_word_count (int): Passed to optimize_descriptions. Default is 1500.
+    max_word_count (int): Passed to optimize_descriptions. Default is 2000.
+
+    Returns:
+    generator: Optimized descriptions (or (index, description) pairs when ordered=False).
+    """
+    return parallel_optimize(
+        optimize_descriptions,
+        descriptions,
+        default_word_count=default_word_count,
+        max_word_count=max_word_count,
+        **options
+    )
@@ -0,0 +1,414 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import unicodedata
+from bisect import bisect_right
+from itertools import product
+
+from listing_reports import write_json_array
+from parallel_optimizer import parallel_optimize
+from pdf_text import PdfDocument, extract_text_runs
+
+# Baselines closer than this (points) belong to the same table row; mixed fonts in one cell shift it slightly
+ROW_TOLERANCE = 3.0
+# Cell text may start up to this far (points) left of its column header and still belong to it
+CELL_PADDING = 3.0
+DEFAULT_PAGES_PER_CHUNK = 2
+# Fewer pages than this are extracted without starting worker processes
+DEFAULT_INLINE_THRESHOLD = 8
+STATE_FORMAT = 1
+_NUMBER_PATTERN = re.compile(r"-?\d+(?:\.\d+)?")
+# Bytes cp1252 leaves undefined; exports draw them all with the same missing glyph, so which one it was is lost
+_UNDEFINED_BYTES = (0x9D, 0x8F, 0x90, 0x8D, 0x81)
+_LOST_CHARACTERS = frozenset("\x81\x8d\x8f\x90\x9d\ufffd")
+_UNUSABLE_CATEGORIES = frozenset(("Cc", "Cn", "Co", "Cs"))
+
+# Documents opened by this process (a pool worker or the parent), so each is parsed once per process
+_documents = {}
+
+
+def _document(path):
+    stamp = os.stat(path).st_mtime_ns
+    cached = _documents.get(path)
+    if cached is None or cached[0] != stamp:
+        cached = _documents[path] = (stamp, PdfDocument(path))
+    return cached[1]
+
+
+def page_rows(document, index):
+    """
+    Group the text of a page into table rows.
+
+    Text outside its clipping box is invisible: it is either the overflow of
+    a cell already printed on a neighbouring page of a wide sheet, and is
+    dropped, or the rest of a cell whose first part is visible, and is
+    joined to it.
+
+    Parameters:
+    document (PdfDocument): The open document.
+    index (int): The zero-based page index.
+
+    Returns:
+    list: Rows from the top of the page down, each a list of [x, text] cells in drawing order.
+    """
+    width, _ = document.page_size(index)
+    rows = []
+    for run in extract_text_runs(document, index):
+        for row in rows:
+            if abs(row[0] - run.y) <= ROW_TOLERANCE:
+                break
+        else:
+            row = None
+        clip = run.clip
+        if clip is None and not 0 <= run.x < width or clip is not None and not clip[0] <= run.x <= clip[2]:
+            if row is not None and row[2] is not None and row[2] == clip:
+                row[1][-1][1] += run.text
+            continue
+        if row is None:
+            row = [run.y, [], None]
+            rows.append(row)
+        row[1].append([round(run.x, 2), run.text])
+        row[2] = clip
+    rows.sort(key=lambda row: -row[0])
+    return [row[1] for row in rows if any(text.strip() for _, text in row[1])]
+
+
+def extract_pages(indices, path):
+    """
+    Extract the rows of several pages; the unit of work sent to pool workers.
+
+    Parameters:
+    indices (list): Zero-based page indices.
+    path (str): The PDF file.
+
+    Returns:
+    list: One page_rows() result per index.
+    """
+    document = _document(path)
+    return [page_rows(document, index) for index in indices]
+
+
+def page_digest(document, index):
+    """
+    Fingerprint a page by its raw content streams, without decoding them.
+
+    Parameters:
+    document (PdfDocument): The open document.
+    index (int): The zero-based page index.
+
+    Returns:
+    str: A hex digest that changes whenever the page content does.
+    """
+    return hashlib.sha1(document.page_fingerprint(index)).hexdigest()
+
+
+def load_state(path):
+    """
+    Read the page cache written by save_state; a missing or outdated file is an empty cache.
+
+    Parameters:
+    path (str): The state file (JSON lines).
+
+    Returns:
+    dict: Page index to (digest, rows).
+    """
+    state = {}
+    try:
+        with open(path, encoding="utf-8") as handle:
+            for line in handle:
+                entry = json.loads(line)
+                if entry.get("format") != STATE_FORMAT:
+                    return {}
+                state[entry["page"]] = (entry["digest"], entry["rows"])
+    except (OSError, ValueError, KeyError):
+        return {}
+    return state
+
+
+def save_state(path, state):
+    """
+    Atomically replace the page cache.
+
+    Parameters:
+    path (str): The state file (JSON lines).
+    state (dict): Page index to (digest, rows).
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temporary = tempfile.mkstemp(prefix=".pdf-state-", dir=directory)
+    try:
+        with os.fdopen(descriptor, "w", encoding="utf-8") as handle:
+            for page in sorted(state):
+                digest, rows = state[page]
+                entry = {"format": STATE_FORMAT, "page": page, "digest": digest, "rows": rows}
+                handle.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def extract_rows(path, max_workers=None, pages_per_chunk=DEFAULT_PAGES_PER_CHUNK,
+                 inline_threshold=DEFAULT_INLINE_THRESHOLD, state=None, stats=None):
+    """
+    Extract the rows of every page, in parallel and optionally incrementally.
+
+    Pages are independent units of work handed to a process pool; each
+    worker parses the document once. With a state dict, pages whose content
+    digest is unchanged reuse their cached rows and only the others are
+    extracted; the dict is updated in place for save_state.
+
+    Parameters:
+    path (str): The PDF file.
+    max_workers (int): The number of worker processes. Default is os.cpu_count().
+    pages_per_chunk (int): Pages sent to a worker at a time. Default is 2.
+    inline_threshold (int): With fewer pages to extract, no pool is started. Default is 8.
+    state (dict): Page index to (digest, rows) from load_state, or None. Default is None.
+    stats (dict): If given, receives 'pages', 'extracted' and 'reused' counts. Default is None.
+
+    Returns:
+    list: One page_rows() result per page.
+    """
+    document = _document(path)
+    count = len(document.pages)
+    pages = [None] * count
+    pending = list(range(count))
+    digests = {}
+    if state is not None:
+        pending = []
+        for index in range(count):
+            digests[index] = page_digest(document, index)
+            cached = state.get(index)
+            if cached is not None and cached[0] == digests[index]:
+                pages[index] = cached[1]
+            else:
+                pending.append(index)
+        for index in list(state):
+            if index >= count:
+                del state[index]
+
+    extracted = parallel_optimize(extract_pages, pending, chunk_size=pages_per_chunk, max_workers=max_workers,
+                                  inline_threshold=inline_threshold, path=path)
+    for index, rows in zip(pending, extracted):
+        pages[index] = rows
+        if state is not None:
+            state[index] = (digests[index], rows)
+    if stats is not None:
+        stats.update(pages=count, extracted=len(pending), reused=count - len(pending))
+    return pages
+
+
+def _is_header(row, first_header):
+    # A band's header names columns: text, not URLs or numbers, and not the first band's names again
+    texts = [text.strip() for _, text in row]
+    return (texts != [text.strip() for _, text in first_header]
+            and all(text and "://" not in text and not _NUMBER_PATTERN.fullmatch(text) for text in texts))
+
+
+def detect_band_pages(pages):
+    """
+    Find how many pages a sheet wider than the page takes to print its first columns.
+
+    Spreadsheet exports print every row of the leftmost columns, then every
+    row of the next columns, and so on; each such band covers the same rows,
+    so the per-page row counts repeat with the band length, and every band
+    starts with a header row of its own. Narrow sheets whose pages merely hold
+    the same number of rows have data at the top of each page and stay one band.
+
+    Parameters:
+    pages (list): page_rows() results of the non-empty pages.
+
+    Returns:
+    int: The number of pages per band (len(pages) when the sheet fits the page width).
+    """
+    signatures = [len(rows) for rows in pages]
+    total = len(signatures)
+    for size in range(1, total):
+        if total % size == 0 and all(
+            signatures[start:start + size] == signatures[:size]
+            and _is_header(pages[start][0], pages[0][0])
+            for start in range(size, total, size)
+        ):
+            return size
+    return total
+
+
+def _utf8_length(lead):
+    if lead is None or lead < 0x80:
+        return 1
+    if 0xC2 <= lead <= 0xDF:
+        return 2
+    if 0xE0 <= lead <= 0xEF:
+        return 3
+    if 0xF0 <= lead <= 0xF4:
+        return 4
+    return 0
+
+
+def _candidates(sequence):
+    holes = [position for position, value in enumerate(sequence) if value is None]
+    found = []
+    for filling in product(_UNDEFINED_BYTES, repeat=len(holes)):
+        data = list(sequence)
+        for position, value in zip(holes, filling):
+            data[position] = value
+        try:
+            character = bytes(data).decode("utf-8")
+        except UnicodeDecodeError:
+            continue
+        if unicodedata.category(character) not in _UNUSABLE_CATEGORIES and character not in found:
+            found.append(character)
+    return found
+
+
+def repair_mojibake(text):
+    """
+    Undo UTF-8 text that was read as cp1252 somewhere before the PDF export.
+
+    Bytes that cp1252 leaves undefined survive only as a missing glyph, so
+    a character containing one is a guess: a styled Latin letter or digit if
+    one fits, else the candidate closest in code point to its neighbours.
+    Text that is not such mojibake is returned unchanged.
+
+    Parameters:
+    text (str): The cell text.
+
+    Returns:
+    str: The repaired text.
+    """
+    if text.isascii():
+        return text
+    data = []
+    for character in text:
+        if character in _LOST_CHARACTERS:
+            data.append(None)
+            continue
+        try:
+            data.append(character.encode("cp1252")[0])
+        except UnicodeEncodeError:
+            return text
+    choices = []
+    position = 0
+    while position < len(data):
+        length = _utf8_length(data[position])
+        sequence = data[position:position + length]
+        found = _candidates(sequence) if length and len(sequence) == length else []
+        if not found:
+            return text
+        choices.append(found)
+        position += length
+
+    known = [ord(found[0]) if len(found) == 1 and ord(found[0]) >= 0x80 else None for found in choices]
+    characters = []
+    before = None
+    for index, found in enumerate(choices):
+        if len(found) > 1:
+            after = next((value for value in known[index + 1:] if value is not None), None)
+            neighbours = [value for value in (before, after) if value is not None]
+            found = sorted(found, key=lambda character: (
+                # Styled letters and digits (bold, italic, sans...) are by far the most common in titles
+                not unicodedata.normalize("NFKC", character).isascii(),
+                min((abs(ord(character) - value) for value in neighbours), default=0),
+            ))
+        if ord(found[0]) >= 0x80:
+            before = ord(found[0])
+        characters.append(found[0])
+    return "".join(characters)
+
+
+def cell_value(text):
+    """
+    Convert the text of a cell as the *_processed.json exports store it.
+
+    Parameters:
+    text (str or None): The cell text.
+
+    Returns:
+    str, int, float or None: None for empty cells, numbers for plain numerals, else the text
+        (see repair_mojibake).
+    """
+    if text is None or not text.strip():
+        return None
+    text = repair_mojibake(text)
+    if _NUMBER_PATTERN.fullmatch(text):
+        return float(text) if "." in text else int(text)
+    return text
+
+
+def _band_records(band):
+    header, *rows = [row for rows in band for row in rows]
+    names = [text for _, text in header]
+    starts = [anchor for anchor, _ in header]
+    for row in rows:
+        # Headers repeated at the top of every page (print titles) are not records
+        if [text for _, text in row] == names:
+            continue
+        cells = [None] * len(names)
+        for anchor, text in row:
+            column = max(bisect_right(starts, anchor + CELL_PADDING) - 1, 0)
+            cells[column] = text if cells[column] is None else cells[column] + text
+        yield names, cells
+
+
+def table_records(pages, band_pages=None):
+    """
+    Rebuild the records of a spreadsheet exported to PDF.
+
+    The first row of each band is its header; the rows of later bands are
+    joined to those of the first by position.
+
+    Parameters:
+    pages (list): page_rows() results in page order, e.g. from extract_rows.
+    band_pages (int): Pages per band, or None to detect it. Default is None.
+
+    Returns:
+    generator: Dicts keyed by header in column order, with values converted by cell_value.
+    """
+    pages = [rows for rows in pages if rows]
+    if not pages:
+        return
+    size = band_pages or detect_band_pages(pages)
+    bands = [_band_records(pages[start:start + size]) for start in range(0, len(pages), size)]
+    for parts in zip(*bands):
+        record = {}
+        for names, cells in parts:
+            for name, text in zip(names, cells):
+                record.setdefault(name, cell_value(text))
+        yield record
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(
+        prog=prog,
+        description="Convert a listings spreadsheet exported to PDF into a *_processed.json array."
+    )
+    parser.add_argument("input", help="the PDF export")
+    parser.add_argument("-o", "--output", default="-", help="output path, or - for stdout (default)")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--pages-per-chunk", type=int, default=DEFAULT_PAGES_PER_CHUNK,
+                        help="pages sent to a worker at a time (default: %(default)s)")
+    parser.add_argument("--band-pages", type=int,
+                        help="pages printed per column band of a wide sheet (default: detected)")
+    parser.add_argument("--state", help="page cache file; unchanged pages are not extracted again")
+    args = parser.parse_args(argv)
+
+    state = load_state(args.state) if args.state else None
+    stats = {}
+    pages = extract_rows(args.input, args.workers, args.pages_per_chunk, state=state, stats=stats)
+    if args.state:
+        save_state(args.state, state)
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        written = write_json_array(table_records(pages, args.band_pages), output)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f"Wrote {written} records from {stats['pages']} pages "
+          f"({stats['extracted']} extracted, {stats['reused']} unchanged).", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
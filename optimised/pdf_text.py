@@ -0,0 +1,693 @@
+import re
+import zlib
+
+# A small PDF reader, enough to pull positioned text out of the reports exported
+# from spreadsheets: classic and compressed object storage, Flate streams, simple
+# (WinAnsi) and Type0 fonts with ToUnicode maps. No layout analysis happens here;
+# see pdf_listings.py for turning text runs into table rows.
+
+WHITESPACE = b"\x00\t\n\x0c\r "
+DELIMITERS = b"()<>[]{}/%"
+_OBJECT_PATTERN = re.compile(rb"(?<![0-9])(\d+)\s+(\d+)\s+obj\b")
+_NUMBER_PATTERN = re.compile(rb"[+-]?(?:\d+\.?\d*|\.\d+)$")
+_SPACE_PATTERN = re.compile(rb"(?:[\x00\t\n\x0c\r ]+|%[^\r\n]*)*")
+_REGULAR_PATTERN = re.compile(rb"[^\x00\t\n\x0c\r ()<>\[\]{}/%]*")
+_STRING_PATTERN = re.compile(rb"[()\\]")
+_CONTENT_PATTERN = re.compile(rb"""
+    (?:[\x00\t\n\x0c\r\x20]+|%[^\r\n]*)*
+    (?:(?P<number>[+-]?(?:\d+\.?\d*|\.\d+))(?![^\x00\t\n\x0c\r\x20()<>\[\]{}/%])
+    |/(?P<name>[^\x00\t\n\x0c\r\x20()<>\[\]{}/%]*)
+    |\((?P<plain>[^()\\]*)\)
+    |(?P<string>\()
+    |(?P<dictionary><<)
+    |<(?P<hex>[0-9A-Fa-f\x00\t\n\x0c\r\x20]*)>
+    |(?P<open>\[)
+    |(?P<close>\])
+    |(?P<keyword>[^\x00\t\n\x0c\r\x20()<>\[\]{}/%]*))
+""", re.VERBOSE)
+_ESCAPES = {ord("n"): b"\n", ord("r"): b"\r", ord("t"): b"\t", ord("b"): b"\b", ord("f"): b"\f",
+            ord("("): b"(", ord(")"): b")", ord("\\"): b"\\"}
+# Adjustments in a TJ array beyond this (thousandths of an em) are word gaps, not kerning
+TJ_SPACE_THRESHOLD = 200
+
+
+class PdfError(ValueError):
+    """Raised for PDF files this reader cannot parse."""
+
+
+class Name(str):
+    """A PDF name object such as /Type, stored without the slash."""
+
+    __slots__ = ()
+
+
+class Ref:
+    """An indirect reference (object number and generation)."""
+
+    __slots__ = ("number", "generation")
+
+    def __init__(self, number, generation=0):
+        self.number = number
+        self.generation = generation
+
+    def __eq__(self, other):
+        return isinstance(other, Ref) and (self.number, self.generation) == (other.number, other.generation)
+
+    def __hash__(self):
+        return hash((self.number, self.generation))
+
+    def __repr__(self):
+        return f"Ref({self.number}, {self.generation})"
+
+
+class Operator(bytes):
+    """A bare keyword in a content stream (Tj, BT, re, ...)."""
+
+
+class Stream:
+    """A stream object: its dictionary and raw, still encoded, bytes."""
+
+    __slots__ = ("dictionary", "raw")
+
+    def __init__(self, dictionary, raw):
+        self.dictionary = dictionary
+        self.raw = raw
+
+
+class Lexer:
+    """Tokenizer and object parser over a bytes buffer."""
+
+    def __init__(self, data, position=0):
+        self.data = data
+        self.position = position
+
+    def skip_whitespace(self):
+        self.position = _SPACE_PATTERN.match(self.data, self.position).end()
+
+    def next_object(self):
+        """Parse the next object; bare keywords come back as Operator instances. None at the end."""
+        self.skip_whitespace()
+        data = self.data
+        if self.position >= len(data):
+            return None
+        char = data[self.position]
+        if char == 0x2F:  # /
+            return Name(_decode_name(self._read_regular(self.position + 1)))
+        if char == 0x28:  # (
+            return self._read_literal_string()
+        if char == 0x3C:  # <
+            if data[self.position + 1:self.position + 2] == b"<":
+                self.position += 2
+                return self._read_dictionary()
+            return self._read_hex_string()
+        if char == 0x5B:  # [
+            self.position += 1
+            items = []
+            while True:
+                self.skip_whitespace()
+                if self.position >= len(data):
+                    raise PdfError("unterminated array")
+                if data[self.position] == 0x5D:
+                    self.position += 1
+                    return items
+                items.append(self._read_value())
+        if char in b"]>)}{":
+            self.position += 1
+            return Operator(bytes([char]))
+        token = self._read_regular(self.position)
+        if _NUMBER_PATTERN.match(token):
+            return float(token) if b"." in token else int(token)
+        if token == b"true":
+            return True
+        if token == b"false":
+            return False
+        if token == b"null":
+            return None
+        if not token:
+            raise PdfError(f"unexpected byte {data[self.position:self.position + 1]!r} at {self.position}")
+        return Operator(token)
+
+    def _read_regular(self, start):
+        self.position = _REGULAR_PATTERN.match(self.data, start).end()
+        return self.data[start:self.position]
+
+    def _read_value(self):
+        # Objects inside arrays and dictionaries, where "n g R" is a reference
+        value = self.next_object()
+        if isinstance(value, int) and not isinstance(value, bool):
+            saved = self.position
+            self.skip_whitespace()
+            generation = self._try_integer()
+            if generation is not None:
+                self.skip_whitespace()
+                if self.data[self.position:self.position + 1] == b"R" and self._is_token_end(self.position + 1):
+                    self.position += 1
+                    return Ref(value, generation)
+            self.position = saved
+        return value
+
+    def _try_integer(self):
+        match = re.match(rb"\d+", self.data[self.position:self.position + 12])
+        if match is None or not self._is_token_end(self.position + match.end()):
+            return None
+        self.position += match.end()
+        return int(match.group(0))
+
+    def _is_token_end(self, position):
+        return position >= len(self.data) or self.data[position] in WHITESPACE or self.data[position] in DELIMITERS
+
+    def _read_dictionary(self):
+        dictionary = {}
+        while True:
+            self.skip_whitespace()
+            if self.data[self.position:self.position + 2] == b">>":
+                self.position += 2
+                return dictionary
+            key = self.next_object()
+            if not isinstance(key, Name):
+                raise PdfError(f"dictionary key is not a name at {self.position}")
+            dictionary[key] = self._read_value()
+
+    def _read_literal_string(self):
+        data = self.data
+        position = self.position + 1
+        depth = 1
+        output = bytearray()
+        while True:
+            # Copy ordinary bytes in bulk up to the next parenthesis or escape
+            match = _STRING_PATTERN.search(data, position)
+            if match is None:
+                raise PdfError("unterminated string")
+            output += data[position:match.start()]
+            position = match.start()
+            char = data[position]
+            if char == 0x5C:  # backslash
+                position += 1
+                escaped = data[position]
+                if escaped in _ESCAPES:
+                    output += _ESCAPES[escaped]
+                    position += 1
+                elif 0x30 <= escaped <= 0x37:
+                    digits = re.match(rb"[0-7]{1,3}", data[position:position + 3]).group(0)
+                    output.append(int(digits, 8) & 0xFF)
+                    position += len(digits)
+                elif escaped in b"\r\n":
+                    # Line continuation
+                    position += 2 if data[position:position + 2] == b"\r\n" else 1
+                else:
+                    output.append(escaped)
+                    position += 1
+                continue
+            if char == 0x28:
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    self.position = position + 1
+                    return bytes(output)
+            output.append(char)
+            position += 1
+
+    def _read_hex_string(self):
+        end = self.data.index(b">", self.position)
+        digits = re.sub(rb"\s", b"", self.data[self.position + 1:end])
+        if len(digits) % 2:
+            digits += b"0"
+        self.position = end + 1
+        return bytes.fromhex(digits.decode("ascii"))
+
+
+def _decode_name(raw):
+    if b"#" not in raw:
+        return raw.decode("latin-1")
+    return re.sub(rb"#([0-9A-Fa-f]{2})", lambda match: bytes([int(match.group(1), 16)]), raw).decode("latin-1")
+
+
+def _decode_filters(stream):
+    data = stream.raw
+    filters = stream.dictionary.get("Filter")
+    if filters is None:
+        return data
+    for name in filters if isinstance(filters, list) else [filters]:
+        if name in ("FlateDecode", "Fl"):
+            # decompressobj tolerates the trailing garbage some writers leave after the stream
+            data = zlib.decompressobj().decompress(data)
+        else:
+            raise PdfError(f"unsupported stream filter /{name}")
+    return data
+
+
+class PdfDocument:
+    """
+    Random access to the objects and pages of a PDF file.
+
+    Objects are located by scanning for "n g obj" headers rather than by
+    trusting the cross-reference table, which also recovers files whose
+    tables are damaged; later definitions win, as with incremental updates.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as handle:
+            self.data = handle.read()
+        if not self.data.startswith(b"%PDF-"):
+            raise PdfError(f"{path} is not a PDF file")
+        self._offsets = {}
+        for match in _OBJECT_PATTERN.finditer(self.data):
+            self._offsets[int(match.group(1))] = match.end()
+        self._cache = {}
+        self._compressed = {}
+        for number in list(self._offsets):
+            value = self.get(number)
+            if isinstance(value, Stream) and value.dictionary.get("Type") == "ObjStm":
+                self._index_object_stream(number, value)
+        self.pages = self._collect_pages()
+
+    def get(self, number):
+        """Return object number `number`, parsed; None if it does not exist."""
+        if number in self._cache:
+            return self._cache[number]
+        if number in self._offsets:
+            value = self._parse_at(self._offsets[number])
+        elif number in self._compressed:
+            container, index = self._compressed[number]
+            value = self._parse_compressed(container, index)
+        else:
+            value = None
+        self._cache[number] = value
+        return value
+
+    def resolve(self, value):
+        """Follow indirect references until a direct object is reached."""
+        while isinstance(value, Ref):
+            value = self.get(value.number)
+        return value
+
+    def stream_data(self, value):
+        """Return the decoded bytes of a stream (or reference to one)."""
+        stream = self.resolve(value)
+        if not isinstance(stream, Stream):
+            raise PdfError("expected a stream")
+        return _decode_filters(stream)
+
+    def _parse_at(self, offset):
+        lexer = Lexer(self.data, offset)
+        value = lexer._read_value()
+        lexer.skip_whitespace()
+        if isinstance(value, dict) and self.data.startswith(b"stream", lexer.position):
+            start = lexer.position + 6
+            if self.data.startswith(b"\r\n", start):
+                start += 2
+            elif self.data[start:start + 1] in (b"\n", b"\r"):
+                start += 1
+            length = value.get("Length")
+            if isinstance(length, Ref):
+                length = self._parse_at(self._offsets[length.number]) if length.number in self._offsets else None
+            if not isinstance(length, int) or not self.data.startswith(b"endstream", self._skip(start + length)):
+                # Missing or wrong /Length: fall back to the endstream keyword
+                length = self.data.index(b"endstream", start) - start
+            return Stream(value, self.data[start:start + length])
+        return value
+
+    def _skip(self, position):
+        while position < len(self.data) and self.data[position] in WHITESPACE:
+            position += 1
+        return position
+
+    def _index_object_stream(self, number, stream):
+        data = _decode_filters(stream)
+        lexer = Lexer(data)
+        for index in range(stream.dictionary.get("N", 0)):
+            object_number = lexer.next_object()
+            lexer.next_object()
+            if object_number not in self._offsets:
+                self._compressed[object_number] = (number, index)
+
+    def _parse_compressed(self, container, index):
+        stream = self.get(container)
+        data = _decode_filters(stream)
+        lexer = Lexer(data)
+        pairs = [(lexer.next_object(), lexer.next_object()) for _ in range(stream.dictionary.get("N", 0))]
+        lexer = Lexer(data, stream.dictionary.get("First", 0) + pairs[index][1])
+        return lexer._read_value()
+
+    def _collect_pages(self):
+        root = None
+        for match in re.finditer(rb"/Root\s+(\d+)\s+(\d+)\s+R", self.data):
+            root = self.resolve(Ref(int(match.group(1))))
+        if root is None:
+            # Cross-reference streams keep /Root in the stream dictionary, which the scan above also finds;
+            # as a last resort look for the catalog itself
+            for number in self._offsets:
+                value = self.get(number)
+                if isinstance(value, dict) and value.get("Type") == "Catalog":
+                    root = value
+        if not isinstance(root, dict) or "Pages" not in root:
+            raise PdfError(f"{self.path} has no page tree")
+        pages = []
+        self._walk_pages(self.resolve(root["Pages"]), {}, pages, set())
+        return pages
+
+    def _walk_pages(self, node, inherited, pages, seen):
+        if id(node) in seen:
+            return
+        seen.add(id(node))
+        inherited = dict(inherited)
+        for key in ("Resources", "MediaBox"):
+            if key in node:
+                inherited[key] = node[key]
+        if node.get("Type") == "Page" or "Kids" not in node:
+            page = dict(inherited)
+            page.update(node)
+            pages.append(page)
+            return
+        for kid in self.resolve(node["Kids"]):
+            self._walk_pages(self.resolve(kid), inherited, pages, seen)
+
+    def page_content(self, index):
+        """Return the decoded, concatenated content streams of a page."""
+        contents = self.resolve(self.pages[index].get("Contents"))
+        if contents is None:
+            return b""
+        if not isinstance(contents, list):
+            contents = [contents]
+        return b"\n".join(self.stream_data(part) for part in contents)
+
+    def page_fingerprint(self, index):
+        """Bytes that change whenever the page's content streams change, without decoding them."""
+        contents = self.resolve(self.pages[index].get("Contents"))
+        if contents is None:
+            return b""
+        if not isinstance(contents, list):
+            contents = [contents]
+        return b"\0".join(self.resolve(part).raw for part in contents)
+
+    def page_size(self, index):
+        box = [self.resolve(value) for value in self.resolve(self.pages[index].get("MediaBox", [0, 0, 612, 792]))]
+        return box[2] - box[0], box[3] - box[1]
+
+    def page_fonts(self, index):
+        resources = self.resolve(self.pages[index].get("Resources")) or {}
+        fonts = self.resolve(resources.get("Font")) or {}
+        return {name: Font(self, self.resolve(font)) for name, font in fonts.items()}
+
+
+class Font:
+    """Decodes the bytes of a text-showing operator into Unicode."""
+
+    def __init__(self, document, dictionary):
+        self.two_byte = dictionary.get("Subtype") == "Type0"
+        self.to_unicode = {}
+        if "ToUnicode" in dictionary:
+            self.to_unicode = parse_cmap(document.stream_data(dictionary["ToUnicode"]))
+        encoding = document.resolve(dictionary.get("Encoding"))
+        self.differences = {}
+        if isinstance(encoding, dict):
+            code = 0
+            for item in encoding.get("Differences", []):
+                if isinstance(item, int):
+                    code = item
+                else:
+                    self.differences[code] = _glyph_to_unicode(item)
+                    code += 1
+            encoding = encoding.get("BaseEncoding")
+        codec = "mac_roman" if encoding == "MacRomanEncoding" else "cp1252"
+        # Character code -> text, for str.translate over the codes of a string operand
+        if self.two_byte:
+            self._table = _CodeTable(self.to_unicode)
+        else:
+            self._table = {code: bytes([code]).decode(codec, errors="replace") for code in range(256)}
+            self._table.update(self.differences)
+            self._table.update(self.to_unicode)
+
+    def decode(self, data):
+        if self.two_byte:
+            codes = data[:len(data) & ~1].decode("utf-16-be", errors="surrogatepass")
+        else:
+            codes = data.decode("latin-1")
+        return codes.translate(self._table)
+
+
+class _CodeTable(dict):
+    __slots__ = ()
+
+    def __missing__(self, code):
+        return "\ufffd"
+
+
+def _glyph_to_unicode(name):
+    if re.fullmatch(r"uni[0-9A-Fa-f]{4}", name):
+        return chr(int(name[3:], 16))
+    if len(name) == 1:
+        return name
+    return {"space": " ", "hyphen": "-", "period": ".", "comma": ",", "bullet": "•"}.get(name, "�")
+
+
+def parse_cmap(data):
+    """
+    Parse the bfchar and bfrange sections of a ToUnicode CMap.
+
+    Parameters:
+    data (bytes): The decoded CMap stream.
+
+    Returns:
+    dict: Character code (int) to Unicode text.
+    """
+    mapping = {}
+    lexer = Lexer(data)
+    tokens = []
+    while True:
+        token = lexer.next_object()
+        if token is None and lexer.position >= len(data):
+            break
+        tokens.append(token)
+    index = 0
+    while index < len(tokens):
+        token = tokens[index]
+        if token == b"beginbfchar":
+            index += 1
+            while tokens[index] != b"endbfchar":
+                mapping[int.from_bytes(tokens[index], "big")] = _utf16(tokens[index + 1])
+                index += 2
+        elif token == b"beginbfrange":
+            index += 1
+            while tokens[index] != b"endbfrange":
+                low = int.from_bytes(tokens[index], "big")
+                high = int.from_bytes(tokens[index + 1], "big")
+                target = tokens[index + 2]
+                if isinstance(target, list):
+                    for offset, text in enumerate(target):
+                        mapping[low + offset] = _utf16(text)
+                else:
+                    base = bytearray(target)
+                    for code in range(low, high + 1):
+                        mapping[code] = _utf16(bytes(base))
+                        base[-1] = (base[-1] + 1) & 0xFF
+                index += 3
+        index += 1
+    return mapping
+
+
+def _utf16(data):
+    return data.decode("utf-16-be", errors="replace")
+
+
+def content_operations(data):
+    """
+    Split a content stream into its operations.
+
+    Parameters:
+    data (bytes): The decoded content stream.
+
+    Returns:
+    generator: (operator, operands) pairs; operator is bytes (b'Tj', b're', ...) and
+        operands a list of parsed objects. Inline images are skipped.
+    """
+    operands = []
+    arrays = []
+    position = 0
+    length = len(data)
+    while position < length:
+        match = _CONTENT_PATTERN.match(data, position)
+        kind = match.lastgroup
+        position = match.end()
+        if kind == "plain":
+            value = match.group(kind)
+        elif kind == "number":
+            value = match.group(kind)
+            value = float(value) if b"." in value else int(value)
+        elif kind == "name":
+            value = Name(_decode_name(match.group(kind)))
+        elif kind in ("string", "dictionary"):
+            # Nested parentheses, escapes and dictionaries are left to the general parser
+            lexer = Lexer(data, match.start())
+            value = lexer.next_object()
+            position = lexer.position
+        elif kind == "hex":
+            digits = re.sub(rb"\s", b"", match.group(kind))
+            value = bytes.fromhex((digits + b"0" if len(digits) % 2 else digits).decode("ascii"))
+        elif kind == "open":
+            arrays.append([])
+            continue
+        elif kind == "close":
+            if arrays:
+                value = arrays.pop()
+            else:
+                continue
+        else:
+            keyword = match.group(kind)
+            if not keyword:
+                if position >= length:
+                    break
+                raise PdfError(f"unexpected byte {data[position:position + 1]!r} at {position}")
+            if keyword in (b"true", b"false", b"null"):
+                value = {b"true": True, b"false": False, b"null": None}[keyword]
+            else:
+                if keyword == b"BI":
+                    # Inline image: its binary data runs from ID to EI
+                    end = data.find(b"EI", data.find(b"ID", position))
+                    position = length if end < 0 else end + 2
+                yield keyword, operands
+                operands = []
+                arrays = []
+                continue
+        (arrays[-1] if arrays else operands).append(value)
+
+
+class TextRun:
+    """Text shown inside one BT ... ET block on one baseline, with its clipping box if any."""
+
+    __slots__ = ("x", "y", "text", "clip")
+
+    def __init__(self, x, y, text, clip=None):
+        self.x = x
+        self.y = y
+        self.text = text
+        self.clip = clip
+
+    def __repr__(self):
+        return f"TextRun({self.x:.2f}, {self.y:.2f}, {self.text!r})"
+
+
+def _multiply(first, second):
+    a, b, c, d, e, f = first
+    A, B, C, D, E, F = second
+    return (a * A + b * C, a * B + b * D, c * A + d * C, c * B + d * D, e * A + f * C + E, e * B + f * D + F)
+
+
+IDENTITY = (1, 0, 0, 1, 0, 0)
+
+
+def extract_text_runs(document, index):
+    """
+    Extract the positioned text of one page.
+
+    Parameters:
+    document (PdfDocument): The open document.
+    index (int): The zero-based page index.
+
+    Returns:
+    list: TextRun objects in drawing order, with x and y in page space.
+    """
+    fonts = document.page_fonts(index)
+    runs = []
+    ctm = IDENTITY
+    clip = None
+    stack = []
+    pending_clip = None
+    path_box = None
+    font = None
+    leading = 0.0
+    text_matrix = line_matrix = IDENTITY
+    current = None  # [x, y, pieces, clip] of the run being built
+
+    def flush():
+        nonlocal current
+        if current is not None:
+            text = "".join(current[2])
+            if text:
+                runs.append(TextRun(current[0], current[1], text, current[3]))
+            current = None
+
+    def show(pieces):
+        nonlocal current
+        e, f = _multiply(text_matrix, ctm)[4:]
+        if current is not None and abs(current[1] - f) > 0.01:
+            flush()
+        if current is None:
+            current = [e, f, [], clip]
+        current[2].extend(pieces)
+
+    def decode(data):
+        return font.decode(data) if font is not None else data.decode("latin-1")
+
+    for token, operands in content_operations(document.page_content(index)):
+        if token == b"q":
+            stack.append((ctm, clip))
+        elif token == b"Q":
+            if stack:
+                ctm, clip = stack.pop()
+        elif token == b"cm" and len(operands) >= 6:
+            ctm = _multiply(tuple(operands[-6:]), ctm)
+        elif token == b"re" and len(operands) >= 4:
+            x, y, width, height = operands[-4:]
+            path_box = _extend(path_box, ctm, ((x, y), (x + width, y + height)))
+        elif token in (b"m", b"l") and len(operands) >= 2:
+            path_box = _extend(path_box, ctm, (operands[-2:],))
+        elif token in (b"c", b"v", b"y") and len(operands) >= 4:
+            # Curves only matter for clipping, where their end points bound them closely enough
+            path_box = _extend(path_box, ctm, (operands[-2:],))
+        elif token in (b"W", b"W*"):
+            pending_clip = path_box
+        elif token in (b"n", b"S", b"s", b"f", b"F", b"f*", b"B", b"B*", b"b", b"b*"):
+            if pending_clip is not None:
+                clip = pending_clip if clip is None else _intersect(clip, pending_clip)
+            pending_clip = path_box = None
+        elif token == b"BT":
+            text_matrix = line_matrix = IDENTITY
+        elif token == b"ET":
+            flush()
+        elif token == b"Tf" and len(operands) >= 2:
+            font = fonts.get(operands[-2])
+        elif token == b"TL" and operands:
+            leading = operands[-1]
+        elif token == b"Tm" and len(operands) >= 6:
+            flush()
+            text_matrix = line_matrix = tuple(operands[-6:])
+        elif token in (b"Td", b"TD") and len(operands) >= 2:
+            if token == b"TD":
+                leading = -operands[-1]
+            text_matrix = line_matrix = _multiply((1, 0, 0, 1, operands[-2], operands[-1]), line_matrix)
+        elif token == b"T*":
+            text_matrix = line_matrix = _multiply((1, 0, 0, 1, 0, -leading), line_matrix)
+        elif token == b"Tj" and operands and isinstance(operands[-1], bytes):
+            show([decode(operands[-1])])
+        elif token in (b"'", b'"') and operands and isinstance(operands[-1], bytes):
+            text_matrix = line_matrix = _multiply((1, 0, 0, 1, 0, -leading), line_matrix)
+            show([decode(operands[-1])])
+        elif token == b"TJ" and operands and isinstance(operands[-1], list):
+            pieces = []
+            for item in operands[-1]:
+                if isinstance(item, bytes):
+                    pieces.append(decode(item))
+                elif isinstance(item, (int, float)) and item < -TJ_SPACE_THRESHOLD:
+                    pieces.append(" ")
+            show(pieces)
+    flush()
+    return runs
+
+
+def _extend(box, matrix, points):
+    for x, y in points:
+        x, y = _transform(matrix, x, y)
+        box = (x, y, x, y) if box is None else (min(box[0], x), min(box[1], y), max(box[2], x), max(box[3], y))
+    return box
+
+
+def _intersect(first, second):
+    return (max(first[0], second[0]), max(first[1], second[1]), min(first[2], second[2]), min(first[3], second[3]))
+
+
+def _transform(matrix, x, y):
+    a, b, c, d, e, f = matrix
+    return a * x + c * y + e, b * x + d * y + f
@@ -0,0 +1,76 @@
+"""
+Single import point for the product optimizer.
+
+Every name below is loaded from its engine module on first access, so
+importing the package costs almost nothing and a script that only optimizes
+titles never imports the service, the async backends or the dataset
+analyzer. Run `python -m product_optimizer --help` for the command line.
+"""
+
+import os
+import sys
+from importlib import import_module
+
+# The engines are the top-level modules next to this package. Appended, not
+# prepended, so the directory never shadows an installed module of the same name
+_ENGINE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _ENGINE_DIR not in sys.path:
+    sys.path.append(_ENGINE_DIR)
+
+# Public name -> engine module that defines it
+_EXPORTS = {
+    "optimize_titles": "optimized_product_optimizer",
+    "optimize_descriptions": "optimized_product_optimizer",
+    "compose_description": "optimized_product_optimizer",
+    "validate_input": "optimized_product_optimizer",
+    "TITLE_RULES": "title_rules",
+    "RuleMatcher": "title_rules",
+    "compile_rules": "title_rules",
+    "compile_rules_cached": "title_rules",
+    "optimize_csv": "csv_batch",
+    "optimize_csv_file": "csv_batch",
+    "incremental_optimize": "incremental_csv",
+    "parallel_optimize_titles": "parallel_optimizer",
+    "parallel_optimize_descriptions": "parallel_optimizer",
+    "ResultCache": "result_cache",
+    "cached_optimize_titles": "result_cache",
+    "cached_optimize_descriptions": "result_cache",
+    "compact_descriptions": "description_store",
+    "DescriptionGenerator": "description_generator",
+    "generate_descriptions": "description_generator",
+    "OptimizerService": "optimizer_service",
+    "create_server": "optimizer_service",
+    "iter_listings": "scrape_reader",
+    "read_listings": "listing",
+    "canonical_url": "listing",
+    "diff_snapshots": "snapshot_diff",
+    "iter_snapshot": "snapshot_diff",
+    "SalesHistory": "sales_history",
+    "top_k": "listing_reports",
+    "external_sort": "listing_reports",
+    "PdfDocument": "pdf_text",
+    "extract_rows": "pdf_listings",
+    "table_records": "pdf_listings",
+    "ImageCache": "image_cache",
+    "open_image": "image_codec",
+    "duplicate_clusters": "image_hashes",
+    "hash_files": "image_hashes",
+    "HashIndex": "image_hashes",
+    "analyze_file": "dataset_analyzer",
+    "METRICS": "metrics",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,163 @@
+import argparse
+import os
+import sys
+from importlib import import_module
+from itertools import islice
+
+# Subcommands handled by an engine module's own main(argv); the module is only
+# imported when its subcommand runs
+DELEGATED = {
+    "batch": ("csv_batch", "Optimize the title (and optionally description) column of a product CSV."),
+    "analyze": ("dataset_analyzer", "Write a *_analysis.json report for a processed dataset."),
+    "serve": ("optimizer_service", "Serve the product optimizer over HTTP."),
+    "diff": ("snapshot_diff", "Compare two listing snapshots and write a JSONL change feed."),
+    "history": ("sales_history", "Keep the sales history of listings across repeated scrapes."),
+    "rank": ("listing_reports", "Rank scraped listings by a metric with bounded memory."),
+    "pdf": ("pdf_listings", "Convert a listings spreadsheet exported to PDF into a *_processed.json array."),
+    "images": ("image_cache", "Fetch listing images into a shared cache and make thumbnails."),
+    "dupes": ("image_hashes", "Find listings that reuse near-identical images."),
+}
+
+PROG = "python -m product_optimizer"
+STDIN_CHUNK_SIZE = 1000
+
+
+def _terminal_width():
+    # shutil.get_terminal_size() without importing shutil, which brings in zlib, bz2 and lzma
+    try:
+        return int(os.environ["COLUMNS"])
+    except (KeyError, ValueError):
+        pass
+    try:
+        return os.get_terminal_size(sys.__stdout__.fileno()).columns
+    except (AttributeError, ValueError, OSError):
+        return 80
+
+
+class HelpFormatter(argparse.HelpFormatter):
+    """argparse's help formatter, sized to the terminal without importing shutil."""
+
+    def __init__(self, prog, indent_increment=2, max_help_position=24, width=None):
+        # argparse makes a formatter for every add_argument() call, not only for --help
+        if width is None:
+            width = _terminal_width() - 2
+        super().__init__(prog, indent_increment, max_help_position, width)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog=PROG,
+        description="Optimize product titles and descriptions for e-commerce listings.",
+        formatter_class=HelpFormatter,
+    )
+    # An explicit prog spares argparse building a help formatter up front
+    commands = parser.add_subparsers(dest="command", metavar="command", prog=PROG)
+    commands.required = True
+
+    titles = commands.add_parser("titles", help="optimize titles given as arguments or on stdin",
+                                 formatter_class=HelpFormatter)
+    titles.add_argument("items", nargs="*", metavar="title", help="titles to optimize; none or - reads one per line from stdin")
+    titles.add_argument("--max-length", type=int, default=200)
+    titles.add_argument("--separator", default="|")
+    titles.add_argument("--rules", help="a JSON file holding a rule table to use instead of the built-in one")
+
+    descriptions = commands.add_parser("descriptions", help="optimize descriptions given as arguments or on stdin",
+                                       formatter_class=HelpFormatter)
+    descriptions.add_argument("items", nargs="*", metavar="description",
+                              help="descriptions to optimize; none or - reads one per line from stdin")
+    descriptions.add_argument("--default-word-count", type=int, default=1500)
+    descriptions.add_argument("--max-word-count", type=int, default=2000)
+
+    # Their options belong to the engine's parser, including --help
+    for name, (_, description) in DELEGATED.items():
+        commands.add_parser(name, help=description, add_help=False, formatter_class=HelpFormatter)
+    return parser
+
+
+def read_items(items, stdin=None):
+    """
+    Yield the items named on the command line, reading stdin where none or '-' is given.
+
+    Parameters:
+    items (list): The positional arguments.
+    stdin (file): Where '-' reads from. Default is sys.stdin.
+
+    Returns:
+    generator: The items, with stdin lines stripped of their line ending.
+    """
+    stdin = sys.stdin if stdin is None else stdin
+    for item in items or ["-"]:
+        if item != "-":
+            yield item
+            continue
+        for line in stdin:
+            yield line.rstrip("\r\n")
+
+
+def _write_chunks(optimize, items, output):
+    # Optimize in chunks so piped input is answered as it streams in
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, STDIN_CHUNK_SIZE))
+        if not chunk:
+            return
+        output.write("\n".join(optimize(chunk)) + "\n")
+        output.flush()
+
+
+def run_titles(args, output):
+    from optimized_product_optimizer import optimize_titles
+    from title_rules import load_rules
+
+    matcher = load_rules(args.rules) if args.rules else None
+    _write_chunks(
+        lambda chunk: optimize_titles(chunk, args.max_length, args.separator, matcher),
+        read_items(args.items),
+        output,
+    )
+
+
+def run_descriptions(args, output):
+    from optimized_product_optimizer import optimize_descriptions
+
+    _write_chunks(
+        lambda chunk: optimize_descriptions(chunk, args.default_word_count, args.max_word_count),
+        read_items(args.items),
+        output,
+    )
+
+
+def main(argv=None, output=None):
+    """
+    Run the command line.
+
+    Parameters:
+    argv (list): The arguments, without the program name. Default is sys.argv[1:].
+    output (file): Where titles and descriptions are written. Default is sys.stdout.
+
+    Returns:
+    int: The exit status.
+    """
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if args.command in DELEGATED:
+        # Everything after the subcommand goes to the engine unparsed
+        argv = sys.argv[1:] if argv is None else list(argv)
+        module = import_module(DELEGATED[args.command][0])
+        return module.main(argv[argv.index(args.command) + 1:], prog=f"{parser.prog} {args.command}") or 0
+    if extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+
+    output = sys.stdout if output is None else output
+    try:
+        if args.command == "titles":
+            run_titles(args, output)
+        else:
+            run_descriptions(args, output)
+    except BrokenPipeError:
+        # The reader (e.g. head) went away; that is not an error for a filter
+        return 0
+    except (OSError, ValueError) as error:
+        print(f"error: {error}", file=sys.stderr)
+        return 1
+    return 0
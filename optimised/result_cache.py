@@ -0,0 +1,269 @@
+import hashlib
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+
+import optimized_product_optimizer as optimizer
+from title_rules import default_matcher, rules_version
+
+DEFAULT_MEMORY_SIZE = 10000
+DEFAULT_MAX_DISK_ENTRIES = 1000000
+
+# Changes whenever the phrases or fillers used by optimize_descriptions change
+DESCRIPTION_VERSION = rules_version([
+    optimizer.QUALITY_PHRASE,
+    optimizer.EASE_PHRASE,
+    optimizer.INTRO_FILLERS,
+    optimizer.ADDITIONAL_FILLERS,
+])
+
+
+def cache_key(function_name, text, params, version):
+    """
+    Build the content address of one optimizer result.
+
+    Parameters:
+    function_name (str): The name of the optimizer function.
+    text (str): The input title or description.
+    params (dict): The optimizer parameters (max_length, separator, word counts, ...).
+    version (str): The rule-set or template version the result depends on.
+
+    Returns:
+    str: A hex SHA-256 digest.
+    """
+    header = json.dumps([function_name, params, version], sort_keys=True, ensure_ascii=False)
+    digest = hashlib.sha256(header.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(text.encode("utf-8", "surrogatepass"))
+    return digest.hexdigest()
+
+
+class LRUCache:
+    """A small in-memory least-recently-used mapping."""
+
+    def __init__(self, maxsize=DEFAULT_MEMORY_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+
+    def get(self, key, default=None):
+        try:
+            self._data.move_to_end(key)
+        except KeyError:
+            return default
+        return self._data[key]
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+
+class ResultCache:
+    """
+    Two-level memoization store for optimizer results.
+
+    Lookups go to an in-memory LRU first and then to an optional SQLite file
+    that survives across runs. The file keeps at most max_disk_entries rows;
+    the least recently used rows are evicted when it grows past that.
+    """
+
+    def __init__(self, path=None, memory_size=DEFAULT_MEMORY_SIZE, max_disk_entries=DEFAULT_MAX_DISK_ENTRIES):
+        self.memory = LRUCache(memory_size)
+        self.max_disk_entries = max_disk_entries
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+            self._db.commit()
+            # Upper bound on the rows in the file, so puts only count them when it may be full
+            self._disk_rows = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def get_many(self, keys):
+        """
+        Look up several keys at once.
+
+        Parameters:
+        keys (list): The cache keys to look up.
+
+        Returns:
+        dict: The cached values for the keys that were found.
+        """
+        found = {}
+        missing = []
+        for key in dict.fromkeys(keys):
+            value = self.memory.get(key)
+            if value is None:
+                missing.append(key)
+            else:
+                found[key] = value
+
+        disk_found = {}
+        if self._db is not None and missing:
+            now = time.time()
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(missing), 500):
+                batch = missing[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._db.execute(
+                    f"SELECT key, value FROM results WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                disk_found.update(rows)
+            if disk_found:
+                self._db.executemany(
+                    "UPDATE results SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in disk_found]
+                )
+                self._db.commit()
+                for key, value in disk_found.items():
+                    self.memory.put(key, value)
+
+        # Statistics count every requested key, including repeats within the batch
+        for key in keys:
+            if key in found:
+                self.stats["memory_hits"] += 1
+            elif key in disk_found:
+                self.stats["disk_hits"] += 1
+            else:
+                self.stats["misses"] += 1
+        found.update(disk_found)
+        return found
+
+    def put_many(self, items):
+        """
+        Store several results at once.
+
+        Parameters:
+        items (dict): A mapping of cache key to result string.
+        """
+        for key, value in items.items():
+            self.memory.put(key, value)
+        if self._db is not None and items:
+            now = time.time()
+            self._db.executemany(
+                "INSERT OR REPLACE INTO results (key, value, last_used) VALUES (?, ?, ?)",
+                [(key, value, now) for key, value in items.items()]
+            )
+            self._db.commit()
+            # Replaced keys are counted as new rows; _evict() corrects the bound
+            self._disk_rows += len(items)
+            if self._disk_rows > self.max_disk_entries:
+                self._evict()
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def put(self, key, value):
+        self.put_many({key: value})
+
+    def _evict(self):
+        count = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        self._disk_rows = count
+        excess = count - self.max_disk_entries
+        if excess <= 0:
+            return
+        # Trim an extra 10% so eviction runs once per batch of inserts, not on every put
+        excess += self.max_disk_entries // 10
+        self._db.execute(
+            "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY last_used LIMIT ?)",
+            (excess,)
+        )
+        self._db.commit()
+        self._disk_rows -= min(excess, count)
+        self.stats["evictions"] += min(excess, count)
+
+    def hit_rate(self):
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _cached_batch(cache, function_name, items, params, version, compute):
+    items = list(items)
+    keys = [cache_key(function_name, item, params, version) for item in items]
+    found = cache.get_many(keys)
+
+    # Compute each distinct missing input once
+    missing = {}
+    for key, item in zip(keys, items):
+        if key not in found and key not in missing:
+            missing[key] = item
+    if missing:
+        computed = dict(zip(missing, compute(list(missing.values()))))
+        cache.put_many(computed)
+        found.update(computed)
+
+    return [found[key] for key in keys]
+
+
+def cached_optimize_titles(titles, cache, max_length=200, separator='|', matcher=None):
+    """
+    optimize_titles with results memoized in a ResultCache.
+
+    Parameters:
+    titles (list): A list of product titles to optimize.
+    cache (ResultCache): The cache to read from and write to.
+    max_length (int): Passed to optimize_titles. Default is 200.
+    separator (str): Passed to optimize_titles. Default is '|'.
+    matcher (RuleMatcher): Passed to optimize_titles. Default is the built-in rule table.
+
+    Returns:
+    list: A list of optimized product titles.
+    """
+    if matcher is None:
+        matcher = default_matcher()
+    params = {"max_length": max_length, "separator": separator}
+    return _cached_batch(
+        cache, "optimize_titles", titles, params, matcher.version,
+        lambda batch: optimizer.optimize_titles(batch, max_length, separator, matcher)
+    )
+
+
+def cached_optimize_descriptions(descriptions, cache, default_word_count=1500, max_word_count=2000):
+    """
+    optimize_descriptions with results memoized in a ResultCache.
+
+    Parameters:
+    descriptions (list): A list of product descriptions to optimize.
+    cache (ResultCache): The cache to read from and write to.
+    default_word_count (int): Passed to optimize_descriptions. Default is 1500.
+    max_word_count (int): Passed to optimize_descriptions. Default is 2000.
+
+    Returns:
+    list: A list of optimized product descriptions.
+    """
+    params = {"default_word_count": default_word_count, "max_word_count": max_word_count}
+    return _cached_batch(
+        cache, "optimize_descriptions", descriptions, params, DESCRIPTION_VERSION,
+        lambda batch: optimizer.optimize_descriptions(batch, default_word_count, max_word_count)
+    )
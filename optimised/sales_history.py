@@ -0,0 +1,477 @@
+import argparse
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from collections import namedtuple
+from heapq import merge
+
+from listing import MISSING_INT
+
+Observation = namedtuple("Observation", ("timestamp", "price", "sales", "rating"))
+Observation.__doc__ = "One scraped data point of a listing; missing values are None."
+
+MANIFEST = "manifest.json"
+JOURNAL = "journal.bin"
+SEGMENT_MAGIC = b"SALESEG1"
+# magic, byte order, rows, listings, first timestamp, last timestamp
+SEGMENT_HEADER = struct.Struct("<8s8sqqqq")
+# shop id, item id, timestamp, price, sales, rating
+JOURNAL_RECORD = struct.Struct("=qqqdqd")
+DEFAULT_SEGMENT_ROWS = 1000000
+DAY = 86400
+
+
+class SalesSegment:
+    """
+    One immutable, memory-mapped segment of the store.
+
+    Rows are sorted by (shop id, item id, timestamp) and stored column by
+    column, followed by the per-listing offset index: four parallel columns
+    of shop id, item id, first row and row count, sorted by listing. A
+    lookup is a binary search of the index and a slice of each column, all
+    read straight from the mapping.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as handle:
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, byteorder, rows, listings, self.first, self.last = SEGMENT_HEADER.unpack_from(self._mmap)
+        if magic != SEGMENT_MAGIC:
+            raise ValueError(f"{path} is not a sales history segment")
+        if byteorder.rstrip(b"\0").decode() != sys.byteorder:
+            raise ValueError(f"{path} was written on a {byteorder.decode()}-endian machine")
+        self.rows = rows
+        self.listings = listings
+        view = memoryview(self._mmap)
+        self._views = [view]
+        offset = SEGMENT_HEADER.size
+
+        def column(typecode, length):
+            nonlocal offset
+            size = length * 8
+            cast = view[offset:offset + size].cast(typecode)
+            self._views.append(cast)
+            offset += size
+            return cast
+
+        self.timestamps = column("q", rows)
+        self.prices = column("d", rows)
+        self.sales = column("q", rows)
+        self.ratings = column("d", rows)
+        self.shop_ids = column("q", listings)
+        self.item_ids = column("q", listings)
+        self.starts = column("q", listings)
+        self.counts = column("q", listings)
+
+    def find(self, shop_id, item_id):
+        """Return (first row, row count) of a listing, or None if the segment does not hold it."""
+        shop_ids, item_ids = self.shop_ids, self.item_ids
+        low, high = 0, self.listings
+        while low < high:
+            middle = (low + high) // 2
+            if (shop_ids[middle], item_ids[middle]) < (shop_id, item_id):
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.listings and shop_ids[low] == shop_id and item_ids[low] == item_id:
+            return self.starts[low], self.counts[low]
+        return None
+
+    def history(self, shop_id, item_id, start=None, end=None):
+        """Observations of one listing with start <= timestamp < end, oldest first."""
+        if (start is not None and self.last < start) or (end is not None and self.first >= end):
+            return []
+        found = self.find(shop_id, item_id)
+        if found is None:
+            return []
+        first, count = found
+        timestamps = self.timestamps
+        low = first if start is None else _bisect(timestamps, start, first, first + count)
+        high = first + count if end is None else _bisect(timestamps, end, low, first + count)
+        return [self.observation(row) for row in range(low, high)]
+
+    def observation(self, row):
+        return Observation(self.timestamps[row], *_decode(self.prices[row], self.sales[row], self.ratings[row]))
+
+    def keys(self, tag=None):
+        """Yield ((shop id, item id), tag, first row, row count) in key order."""
+        for position in range(self.listings):
+            yield (self.shop_ids[position], self.item_ids[position]), tag, self.starts[position], self.counts[position]
+
+    def close(self):
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._mmap.close()
+
+
+class SalesHistory:
+    """
+    Append-only store of per-listing price, sales and rating observations.
+
+    New observations are appended to a journal file and sealed into an
+    immutable, memory-mapped columnar segment once the journal holds
+    segment_rows rows (or on flush()). Queries read the journal and every
+    segment whose time range overlaps the window, so a trend query touches
+    only the rows it returns. compact() merges old segments and thins their
+    rows to one per listing and time bucket.
+
+    A store supports one writer at a time; any number of readers may open
+    it while nothing is writing.
+    """
+
+    def __init__(self, path, segment_rows=DEFAULT_SEGMENT_ROWS):
+        self.path = path
+        self.segment_rows = segment_rows
+        os.makedirs(path, exist_ok=True)
+        manifest_path = os.path.join(path, MANIFEST)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding="utf-8") as handle:
+                manifest = json.load(handle)
+        else:
+            manifest = {"segments": [], "next_segment": 1}
+        self._next_segment = manifest["next_segment"]
+        self.segments = [SalesSegment(os.path.join(path, name)) for name in manifest["segments"]]
+        self._journal = {}
+        self._journal_rows = 0
+        self._load_journal()
+        self._journal_file = open(os.path.join(path, JOURNAL), "ab")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _load_journal(self):
+        journal_path = os.path.join(self.path, JOURNAL)
+        if not os.path.exists(journal_path):
+            return
+        with open(journal_path, "rb") as handle:
+            data = handle.read()
+        complete = len(data) - len(data) % JOURNAL_RECORD.size
+        if complete != len(data):
+            # A crash in the middle of an append leaves a partial record behind
+            with open(journal_path, "r+b") as handle:
+                handle.truncate(complete)
+        for shop_id, item_id, timestamp, price, sales, rating in JOURNAL_RECORD.iter_unpack(data[:complete]):
+            self._journal.setdefault((shop_id, item_id), []).append((timestamp, price, sales, rating))
+            self._journal_rows += 1
+
+    def append(self, shop_id, item_id, timestamp, price=None, sales=None, rating=None):
+        """
+        Record one observation of a listing.
+
+        Parameters:
+        shop_id (int): The shop id.
+        item_id (int): The item id.
+        timestamp (int): The scrape time in seconds since the epoch.
+        price (float): The price, or None. Default is None.
+        sales (int): Units sold per month, or None. Default is None.
+        rating (float): The star rating, or None. Default is None.
+        """
+        self.extend([(shop_id, item_id, timestamp, price, sales, rating)])
+
+    def extend(self, observations):
+        """
+        Record many observations with a single journal write.
+
+        Parameters:
+        observations (iterable): (shop id, item id, timestamp, price, sales, rating) tuples.
+
+        Returns:
+        int: The number of observations recorded.
+        """
+        records = bytearray()
+        count = 0
+        for shop_id, item_id, timestamp, price, sales, rating in observations:
+            row = (
+                int(timestamp),
+                math.nan if price is None else float(price),
+                MISSING_INT if sales is None else int(sales),
+                math.nan if rating is None else float(rating),
+            )
+            records += JOURNAL_RECORD.pack(shop_id, item_id, *row)
+            self._journal.setdefault((shop_id, item_id), []).append(row)
+            count += 1
+        self._journal_file.write(records)
+        self._journal_file.flush()
+        self._journal_rows += count
+        if self._journal_rows >= self.segment_rows:
+            self.flush()
+        return count
+
+    def extend_listings(self, listings, timestamp):
+        """
+        Record one scrape of parsed listings.
+
+        Parameters:
+        listings (iterable): Listing objects (see listing.py).
+        timestamp (int): The scrape time in seconds since the epoch.
+
+        Returns:
+        int: The number of listings recorded; listings without shop and item ids are skipped.
+        """
+        return self.extend(
+            (listing.shop_id, listing.item_id, timestamp, listing.price, listing.sales, listing.rating)
+            for listing in listings
+            if listing.shop_id is not None and listing.item_id is not None
+        )
+
+    def flush(self):
+        """Seal the journal into a new segment. Does nothing when the journal is empty."""
+        if not self._journal_rows:
+            return
+        rows = (
+            (key, row)
+            for key in sorted(self._journal)
+            for row in sorted(self._journal[key], key=lambda row: row[0])
+        )
+        name = self._write_segment(rows)
+        self.segments.append(SalesSegment(os.path.join(self.path, name)))
+        self._write_manifest()
+        self._journal_file.truncate(0)
+        self._journal_file.seek(0)
+        self._journal = {}
+        self._journal_rows = 0
+
+    def history(self, shop_id, item_id, start=None, end=None):
+        """
+        Observations of one listing inside a time window.
+
+        Parameters:
+        shop_id (int): The shop id.
+        item_id (int): The item id.
+        start (int): The first timestamp included, or None for no lower bound. Default is None.
+        end (int): The first timestamp excluded, or None for no upper bound. Default is None.
+
+        Returns:
+        list: Observation records, oldest first.
+        """
+        observations = []
+        for segment in self.segments:
+            observations.extend(segment.history(shop_id, item_id, start, end))
+        for timestamp, price, sales, rating in self._journal.get((shop_id, item_id), ()):
+            if (start is None or timestamp >= start) and (end is None or timestamp < end):
+                observations.append(Observation(timestamp, *_decode(price, sales, rating)))
+        observations.sort(key=lambda observation: observation.timestamp)
+        return observations
+
+    def listings(self):
+        """
+        Every listing in the store.
+
+        Returns:
+        list: Sorted (shop id, item id) pairs.
+        """
+        keys = set(self._journal)
+        for segment in self.segments:
+            keys.update(zip(segment.shop_ids, segment.item_ids))
+        return sorted(keys)
+
+    def compact(self, older_than, resolution=DAY):
+        """
+        Merge the segments holding old data and thin out their old rows.
+
+        Every segment with observations before older_than is rewritten into a
+        single segment in which each listing keeps only its last observation
+        per resolution-second bucket before older_than. Newer rows in those
+        segments are kept as they are. The journal is sealed first.
+
+        Parameters:
+        older_than (int): Rows before this timestamp are downsampled.
+        resolution (int): The bucket width in seconds. Default is one day.
+
+        Returns:
+        dict: The number of segments merged and the rows before and after.
+        """
+        self.flush()
+        old = [segment for segment in self.segments if segment.first < older_than]
+        if not old:
+            return {"segments": 0, "rows_before": 0, "rows_after": 0}
+
+        rows_before = sum(segment.rows for segment in old)
+        rows_after = 0
+
+        def merged_rows():
+            nonlocal rows_after
+            listings = merge(*(segment.keys(index) for index, segment in enumerate(old)))
+            current, rows = None, []
+            for key, index, first, count in listings:
+                if key != current:
+                    if rows:
+                        kept = _downsample(rows, older_than, resolution)
+                        rows_after += len(kept)
+                        yield from ((current, row) for row in kept)
+                    current, rows = key, []
+                segment = old[index]
+                rows.extend(
+                    (segment.timestamps[row], segment.prices[row], segment.sales[row], segment.ratings[row])
+                    for row in range(first, first + count)
+                )
+            if rows:
+                kept = _downsample(rows, older_than, resolution)
+                rows_after += len(kept)
+                yield from ((current, row) for row in kept)
+
+        name = self._write_segment(merged_rows())
+        merged = SalesSegment(os.path.join(self.path, name))
+        position = self.segments.index(old[0])
+        self.segments = [segment for segment in self.segments if segment not in old]
+        self.segments.insert(position, merged)
+        self._write_manifest()
+        for segment in old:
+            segment.close()
+            os.unlink(segment.path)
+        return {"segments": len(old), "rows_before": rows_before, "rows_after": rows_after}
+
+    def _write_segment(self, rows):
+        # rows: ((shop id, item id), (timestamp, price, sales, rating)) sorted by key and time
+        columns = [array("q"), array("d"), array("q"), array("d")]
+        index = [array("q"), array("q"), array("q"), array("q")]
+        current = None
+        for key, row in rows:
+            if key != current:
+                current = key
+                index[0].append(key[0])
+                index[1].append(key[1])
+                index[2].append(len(columns[0]))
+                index[3].append(0)
+            index[3][-1] += 1
+            for column, value in zip(columns, row):
+                column.append(value)
+        timestamps = columns[0]
+        name = f"segment-{self._next_segment:06d}.bin"
+        self._next_segment += 1
+        path = os.path.join(self.path, name)
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as handle:
+            handle.write(SEGMENT_HEADER.pack(
+                SEGMENT_MAGIC, sys.byteorder.encode(), len(timestamps), len(index[0]),
+                min(timestamps) if timestamps else 0, max(timestamps) if timestamps else 0,
+            ))
+            for column in columns + index:
+                column.tofile(handle)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temporary, path)
+        return name
+
+    def _write_manifest(self):
+        manifest = {
+            "segments": [os.path.basename(segment.path) for segment in self.segments],
+            "next_segment": self._next_segment,
+        }
+        temporary = os.path.join(self.path, MANIFEST + ".tmp")
+        with open(temporary, "w", encoding="utf-8") as handle:
+            json.dump(manifest, handle)
+        os.replace(temporary, os.path.join(self.path, MANIFEST))
+
+    def close(self):
+        self._journal_file.close()
+        for segment in self.segments:
+            segment.close()
+        self.segments = []
+
+
+def _bisect(values, target, low, high):
+    while low < high:
+        middle = (low + high) // 2
+        if values[middle] < target:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def _decode(price, sales, rating):
+    return (
+        None if math.isnan(price) else price,
+        None if sales == MISSING_INT else sales,
+        None if math.isnan(rating) else rating,
+    )
+
+
+def _downsample(rows, older_than, resolution):
+    rows.sort(key=lambda row: row[0])
+    kept = []
+    bucket = None
+    for row in rows:
+        if row[0] >= older_than:
+            kept.append(row)
+            bucket = None
+            continue
+        row_bucket = row[0] // resolution
+        if row_bucket == bucket:
+            kept[-1] = row
+        else:
+            kept.append(row)
+            bucket = row_bucket
+    return kept
+
+
+def _parse_time(value):
+    # Seconds since the epoch, or an ISO date such as 2025-03-26 (UTC)
+    try:
+        return int(value)
+    except ValueError:
+        from datetime import datetime, timezone
+
+        parsed = datetime.fromisoformat(value)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return int(parsed.timestamp())
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog,
+                                     description="Keep the sales history of listings across repeated scrapes.")
+    parser.add_argument("store", help="the store directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="append one scrape per file")
+    ingest.add_argument("files", nargs="+", help="CSV or scraped JSON snapshots")
+    ingest.add_argument("--timestamp", type=_parse_time,
+                        help="scrape time (epoch seconds or ISO date); default is each file's modification time")
+
+    query = commands.add_parser("query", help="print the history of one listing as JSON lines")
+    query.add_argument("shop_id", type=int)
+    query.add_argument("item_id", type=int)
+    query.add_argument("--since", type=_parse_time)
+    query.add_argument("--until", type=_parse_time)
+
+    compact = commands.add_parser("compact", help="merge old segments and keep one row per bucket")
+    compact.add_argument("--older-than-days", type=float, default=30)
+    compact.add_argument("--resolution-days", type=float, default=1)
+    args = parser.parse_args(argv)
+
+    with SalesHistory(args.store) as store:
+        if args.command == "ingest":
+            from snapshot_diff import iter_snapshot
+
+            for path in args.files:
+                timestamp = args.timestamp if args.timestamp is not None else int(os.path.getmtime(path))
+                count = store.extend_listings((listing for _, listing in iter_snapshot(path)), timestamp)
+                print(f"{path}: recorded {count} listings at {timestamp}.", file=sys.stderr)
+            store.flush()
+        elif args.command == "query":
+            for observation in store.history(args.shop_id, args.item_id, args.since, args.until):
+                print(json.dumps(observation._asdict()))
+        else:
+            result = store.compact(
+                int(time.time() - args.older_than_days * DAY), max(1, int(args.resolution_days * DAY))
+            )
+            print(
+                f"Merged {result['segments']} segments: {result['rows_before']} rows -> {result['rows_after']}.",
+                file=sys.stderr
+            )
+
+
+if __name__ == "__main__":
+    main()
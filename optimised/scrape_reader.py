@@ -0,0 +1,243 @@
+import json
+from collections import namedtuple
+
+READ_SIZE = 1 << 16
+
+# Column-mapping profiles for the scraped Shopee exports. The scraper names
+# columns after the CSS classes of the element they came from, and the same
+# class holds different fields depending on the page layout.
+PROFILES = {
+    # Search / top-sales item cards (TopSales_*_processed.json, Chatgpt shopee _processed.json)
+    "item_card": {
+        "title": "line-clamp-2",
+        "url": "contents href",
+        "price": "truncate",
+        "rating": "flex-none",
+        "sales": "truncate 4",
+        "location": "ml-[3px]",
+        "discount": "h-4",
+        "promotions": ["truncate 2", "truncate 3"],
+        "thumbnail_url": "inset-y-0 src",
+        "image_url": "w-full src",
+    },
+    # Popular-products grid (Popular_*_processed.json)
+    "popular": {
+        "title": "line-clamp-2",
+        "url": "contents href",
+        "price": "truncate 3",
+        "sales": "truncate 4",
+        "discount": "absolute",
+        "promotions": ["truncate", "truncate 2"],
+        "thumbnail_url": "inset-y-0 src",
+        "image_url": "w-full src",
+    },
+    # Catalog exports with named fields (scraped_data_processed*.json); these carry
+    # an "id" instead of a product URL
+    "catalog": {
+        "title": "name",
+        "price": "price",
+        "rating": "rating",
+        "sales": "sales",
+        "thumbnail_url": "thumbnailUrl",
+        "image_url": "imageUrl",
+        "category": "category",
+    },
+}
+
+LISTING_FIELDS = (
+    "title", "url", "price", "rating", "sales", "location",
+    "discount", "promotions", "thumbnail_url", "image_url", "category",
+)
+
+ScrapedListing = namedtuple("ScrapedListing", LISTING_FIELDS, defaults=(None,) * len(LISTING_FIELDS))
+ScrapedListing.__doc__ = "One listing read from a scraped export; price and rating are floats or None."
+
+
+def iter_json_array(source, read_size=READ_SIZE):
+    """
+    Incrementally decode the elements of a top-level JSON array.
+
+    Only one element (plus one read buffer) is held in memory at a time, so
+    files far larger than RAM can be processed.
+
+    Parameters:
+    source (file): A text file object positioned at the start of the array.
+    read_size (int): The number of characters read at a time. Default is 65536.
+
+    Returns:
+    generator: The decoded array elements.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    eof = False
+
+    def fill():
+        nonlocal buffer, position, eof
+        chunk = source.read(read_size)
+        if not chunk:
+            eof = True
+        buffer = buffer[position:] + chunk
+        position = 0
+
+    def skip_whitespace():
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n":
+                position += 1
+            if position < len(buffer) or eof:
+                return
+            fill()
+
+    skip_whitespace()
+    if position >= len(buffer) or buffer[position] != "[":
+        raise ValueError("Expected a JSON array")
+    position += 1
+
+    expect_value = True
+    skip_whitespace()
+    if position < len(buffer) and buffer[position] == "]":
+        return
+    while True:
+        skip_whitespace()
+        if position >= len(buffer):
+            raise ValueError("Unterminated JSON array")
+        if not expect_value:
+            char = buffer[position]
+            position += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise ValueError(f"Expected ',' or ']' in JSON array, found {char!r}")
+            expect_value = True
+            continue
+
+        try:
+            value, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            fill()
+            continue
+        if not eof and _may_continue(value, buffer, end):
+            # The rest of this number (e.g. ".5" or "e3") may be in the next read
+            fill()
+            continue
+        position = end
+        expect_value = False
+        yield value
+
+        # Drop consumed text so the buffer never grows beyond one element
+        if position > read_size:
+            buffer = buffer[position:]
+            position = 0
+
+
+_NUMBER_CHARS = frozenset("0123456789.eE+-")
+
+
+def _may_continue(value, buffer, end):
+    # raw_decode stops a number at the longest valid prefix, so "-25" is a
+    # complete number until a character that cannot extend it has been read
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return end == len(buffer)
+    return all(char in _NUMBER_CHARS for char in buffer[end:])
+
+
+def detect_profile(record):
+    """
+    Guess the column-mapping profile of a scraped record from its keys.
+
+    Parameters:
+    record (dict): One raw scraped record.
+
+    Returns:
+    str: The name of a profile in PROFILES.
+    """
+    if "flex-none" in record or "ml-[3px]" in record:
+        return "item_card"
+    if "absolute" in record or "truncate 3" in record:
+        return "popular"
+    if "name" in record and "contents href" not in record:
+        return "catalog"
+    return "item_card"
+
+
+def _to_float(value):
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_text(value):
+    return None if value is None else str(value)
+
+
+def to_listing(record, mapping):
+    """
+    Convert one raw scraped record into a ScrapedListing.
+
+    Parameters:
+    record (dict): The raw record keyed by CSS class names.
+    mapping (dict): A column-mapping profile (see PROFILES).
+
+    Returns:
+    ScrapedListing: The typed listing.
+    """
+    get = record.get
+    promotions = tuple(
+        str(get(column)) for column in mapping.get("promotions", ()) if get(column) not in (None, "")
+    )
+    return ScrapedListing(
+        title=_to_text(get(mapping.get("title"))) or "",
+        url=_to_text(get(mapping.get("url"))),
+        price=_to_float(get(mapping.get("price"))),
+        rating=_to_float(get(mapping.get("rating"))),
+        sales=_to_text(get(mapping.get("sales"))),
+        location=_to_text(get(mapping.get("location"))),
+        discount=_to_text(get(mapping.get("discount"))),
+        promotions=promotions,
+        thumbnail_url=_to_text(get(mapping.get("thumbnail_url"))),
+        image_url=_to_text(get(mapping.get("image_url"))),
+        category=_to_text(get(mapping.get("category"))),
+    )
+
+
+def iter_listings(source, profile="auto", read_size=READ_SIZE):
+    """
+    Stream typed listings out of a scraped JSON export.
+
+    Parameters:
+    source (str or file): A file path or an open text file containing a JSON array.
+    profile (str or dict): A profile name from PROFILES, a custom mapping, or 'auto'
+        to detect the layout from the first record. Default is 'auto'.
+    read_size (int): The number of characters read at a time. Default is 65536.
+
+    Returns:
+    generator: ScrapedListing records in file order.
+
+    Examples:
+    >>> titles = (listing.title for listing in iter_listings("TopSales_DigitalProduct_shopee_processed.json"))
+    >>> optimize_titles(titles)
+    """
+    if isinstance(source, str):
+        with open(source, encoding="utf-8") as handle:
+            yield from iter_listings(handle, profile, read_size)
+        return
+
+    mapping = profile if isinstance(profile, dict) else None
+    if mapping is None and profile != "auto":
+        try:
+            mapping = PROFILES[profile]
+        except KeyError:
+            raise ValueError(f"Unknown scrape profile {profile!r}; expected one of {sorted(PROFILES)} or 'auto'")
+
+    for record in iter_json_array(source, read_size):
+        if not isinstance(record, dict):
+            raise ValueError(f"Expected JSON objects in the array, found {type(record).__name__}")
+        if mapping is None:
+            mapping = PROFILES[detect_profile(record)]
+        yield to_listing(record, mapping)
@@ -0,0 +1,230 @@
+import argparse
+import json
+import sys
+from collections import namedtuple
+from operator import attrgetter
+
+from listing import Listing, canonical_url, read_records
+
+# Fields compared between snapshots; numeric ones are already parsed (sales is units per month)
+DIFF_FIELDS = ("title", "price", "sales", "rating")
+
+ListingChange = namedtuple("ListingChange", ("kind", "key", "old", "new", "deltas"))
+ListingChange.__doc__ = (
+    "One difference between two snapshots. kind is 'added', 'removed' or 'changed'; "
+    "deltas maps each changed field to its (old, new) values."
+)
+
+
+def listing_key(listing):
+    """
+    Identify a listing across snapshots.
+
+    Parameters:
+    listing (Listing): The parsed listing.
+
+    Returns:
+    tuple or str or None: (shop id, item id) when the URL carries them, else the
+        canonical URL, or None when the listing has no URL at all.
+    """
+    if listing.shop_id is not None and listing.item_id is not None:
+        return (listing.shop_id, listing.item_id)
+    return canonical_url(listing.url)
+
+
+def iter_snapshot(source, profile="auto"):
+    """
+    Stream the keyed listings of a snapshot file.
+
+    CSV exports (shopee_products.csv) and scraped JSON arrays are both
+    accepted. Records of the catalog layout carry no URL and are keyed by
+    their "id" field instead.
+
+    Parameters:
+    source (str): A .csv file or a JSON array export.
+    profile (str or dict): The scrape profile for JSON files (see scrape_reader.PROFILES). Default is 'auto'.
+
+    Returns:
+    generator: (key, Listing) pairs in file order; key is None for listings that cannot be identified.
+    """
+    for listing, record in read_records(source, profile):
+        key = listing_key(listing)
+        if key is None and record.get("id") is not None:
+            key = str(record["id"])
+        yield key, listing
+
+
+def index_snapshot(pairs, stats=None):
+    """
+    Build the hash index of a snapshot.
+
+    Parameters:
+    pairs (iterable): (key, Listing) pairs, e.g. from iter_snapshot.
+    stats (dict): If given, its 'duplicates' and 'unkeyed' counts are increased. Default is None.
+
+    Returns:
+    dict: Key to the first listing with that key, in file order.
+    """
+    index = {}
+    duplicates = unkeyed = 0
+    for key, listing in pairs:
+        if key is None:
+            unkeyed += 1
+        elif key in index:
+            duplicates += 1
+        else:
+            index[key] = listing
+    if stats is not None:
+        stats["duplicates"] = stats.get("duplicates", 0) + duplicates
+        stats["unkeyed"] = stats.get("unkeyed", 0) + unkeyed
+    return index
+
+
+def join_snapshots(old, new, stats=None):
+    """
+    Full outer join of two snapshots on the listing key.
+
+    Only the old snapshot is indexed; the new one is streamed against it, so
+    the join takes one pass over each side. As in index_snapshot, the first
+    listing with a key wins and unkeyed listings are skipped.
+
+    Parameters:
+    old (iterable or dict): (key, Listing) pairs of the earlier snapshot, or an index of them.
+    new (iterable): (key, Listing) pairs of the later snapshot.
+    stats (dict): If given, receives 'duplicates' and 'unkeyed' counts. Default is None.
+
+    Returns:
+    generator: (key, old listing or None, new listing or None) triples; keys only in the
+        old snapshot come last, in their original order.
+    """
+    remaining = dict(old) if isinstance(old, dict) else index_snapshot(old, stats)
+    seen = set()
+    duplicates = unkeyed = 0
+    for key, listing in new:
+        if key is None:
+            unkeyed += 1
+            continue
+        if key in seen:
+            duplicates += 1
+            continue
+        seen.add(key)
+        yield key, remaining.pop(key, None), listing
+    if stats is not None:
+        stats["duplicates"] = stats.get("duplicates", 0) + duplicates
+        stats["unkeyed"] = stats.get("unkeyed", 0) + unkeyed
+    for key, listing in remaining.items():
+        yield key, listing, None
+
+
+def field_deltas(old, new, fields=DIFF_FIELDS):
+    """
+    Compare the given fields of two versions of a listing.
+
+    Parameters:
+    old (Listing): The earlier version.
+    new (Listing): The later version.
+    fields (tuple): Listing attributes to compare. Default is DIFF_FIELDS.
+
+    Returns:
+    dict: Field name to (old value, new value) for every field that differs.
+    """
+    deltas = {}
+    for field in fields:
+        before = getattr(old, field)
+        after = getattr(new, field)
+        if before != after:
+            deltas[field] = (before, after)
+    return deltas
+
+
+def diff_snapshots(old, new, fields=DIFF_FIELDS, stats=None):
+    """
+    Report the listings added, removed and changed between two snapshots.
+
+    Parameters:
+    old (iterable or dict): (key, Listing) pairs of the earlier snapshot, or an index of them.
+    new (iterable): (key, Listing) pairs of the later snapshot.
+    fields (tuple): Listing attributes compared for changes. Default is DIFF_FIELDS.
+    stats (dict): If given, receives counts of added, removed, changed, unchanged,
+        duplicate and unkeyed listings. Default is None.
+
+    Returns:
+    generator: ListingChange records; unchanged listings are not reported.
+    """
+    counts = {"added": 0, "removed": 0, "changed": 0, "unchanged": 0}
+    # Most listings are unchanged, so compare all fields at C speed before looking at each one
+    compared = attrgetter(*fields)
+    for key, before, after in join_snapshots(old, new, stats):
+        if before is None:
+            counts["added"] += 1
+            yield ListingChange("added", key, None, after, {})
+        elif after is None:
+            counts["removed"] += 1
+            yield ListingChange("removed", key, before, None, {})
+        elif compared(before) == compared(after):
+            counts["unchanged"] += 1
+        else:
+            counts["changed"] += 1
+            yield ListingChange("changed", key, before, after, field_deltas(before, after, fields))
+    if stats is not None:
+        stats.update(counts)
+
+
+def change_record(change):
+    """
+    Convert a ListingChange into a JSON-serializable feed record.
+
+    Parameters:
+    change (ListingChange): The change.
+
+    Returns:
+    dict: {"op", "key"} plus "listing" for added and removed listings, or "changes"
+        ({field: {"old", "new"}}) and "url" for changed ones.
+    """
+    record = {"op": change.kind, "key": list(change.key) if isinstance(change.key, tuple) else change.key}
+    if change.kind == "changed":
+        record["url"] = change.new.url
+        record["changes"] = {field: {"old": old, "new": new} for field, (old, new) in change.deltas.items()}
+    else:
+        record["listing"] = (change.new or change.old).to_dict()
+        record["listing"]["promotions"] = list(record["listing"]["promotions"])
+    return record
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(
+        prog=prog,
+        description="Compare two listing snapshots (CSV or scraped JSON) and write a JSONL change feed."
+    )
+    parser.add_argument("old", help="the earlier snapshot")
+    parser.add_argument("new", help="the later snapshot")
+    parser.add_argument("-o", "--output", default="-", help="JSONL change feed path, or - for stdout (default)")
+    parser.add_argument("--fields", default=",".join(DIFF_FIELDS),
+                        help="comma-separated listing fields to compare (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    fields = tuple(field.strip() for field in args.fields.split(",") if field.strip())
+    unknown = sorted(set(fields) - set(Listing.__slots__))
+    if not fields:
+        parser.error("--fields must name at least one field")
+    if unknown:
+        parser.error(f"unknown fields: {', '.join(unknown)}")
+
+    stats = {}
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        for change in diff_snapshots(iter_snapshot(args.old), iter_snapshot(args.new), fields, stats):
+            output.write(json.dumps(change_record(change), ensure_ascii=False) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(
+        f"Added {stats['added']}, removed {stats['removed']}, changed {stats['changed']}, "
+        f"unchanged {stats['unchanged']} listings ({stats['duplicates']} duplicate, "
+        f"{stats['unkeyed']} unkeyed skipped).",
+        file=sys.stderr
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import io
+import unittest
+from contextlib import redirect_stderr
+from benchmark import FALLBACK_SHAPES, compare, main, run_benchmark, synthetic_listings
+
+class TestBenchmark(unittest.TestCase):
+    def test_corpus_is_reproducible(self):
+        first = list(synthetic_listings(50, seed=3, shapes=FALLBACK_SHAPES))
+        self.assertEqual(first, list(synthetic_listings(50, seed=3, shapes=FALLBACK_SHAPES)))
+        self.assertNotEqual(first, list(synthetic_listings(50, seed=4, shapes=FALLBACK_SHAPES)))
+        self.assertTrue(all(record["line-clamp-2"] and record["contents href"] for record in first))
+
+    def test_run_benchmark_reports_metrics(self):
+        result = run_benchmark("optimize_titles", 200, shapes=FALLBACK_SHAPES, batch_size=50,
+                               repeat=1, latency_samples=20)
+        self.assertEqual(result["rows"], 200)
+        self.assertGreater(result["rows_per_second"], 0)
+        self.assertLessEqual(result["p50_us"], result["p99_us"])
+        self.assertGreater(result["peak_memory_bytes"], 0)
+
+    def test_compare_flags_regressions(self):
+        baseline = {"results": {"x@10": {"rows_per_second": 1000, "p99_us": 100, "peak_memory_bytes": 1000}}}
+        same = {"results": {"x@10": {"rows_per_second": 950, "p99_us": 104, "peak_memory_bytes": 1000}}}
+        slower = {"results": {"x@10": {"rows_per_second": 500, "p99_us": 300, "peak_memory_bytes": 5000}}}
+        self.assertEqual(compare(same, baseline, threshold=0.1), [])
+        self.assertEqual(len(compare(slower, baseline, threshold=0.1)), 3)
+
+    def test_unknown_benchmark_is_rejected(self):
+        with redirect_stderr(io.StringIO()) as messages, self.assertRaises(SystemExit) as raised:
+            main(["optimize_titles", "nope"])
+        self.assertEqual(raised.exception.code, 2)
+        self.assertIn("unknown benchmark 'nope'", messages.getvalue())
+
+if __name__ == "__main__":
+    unittest.main()
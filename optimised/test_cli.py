@@ -0,0 +1,78 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from product_optimizer.cli import main, read_items
+from optimized_product_optimizer import optimize_descriptions, optimize_titles
+
+class TestCli(unittest.TestCase):
+    def run_cli(self, *argv):
+        output = io.StringIO()
+        self.assertEqual(main(list(argv), output), 0)
+        return output.getvalue().splitlines()
+
+    def test_titles(self):
+        titles = ["[FAST] ChatGPT 4 plus", "Plain listing"]
+        self.assertEqual(self.run_cli("titles", *titles), optimize_titles(titles))
+        self.assertEqual(self.run_cli("titles", "--separator", "/", titles[0]), optimize_titles(titles[:1], separator="/"))
+
+    def test_descriptions(self):
+        self.assertEqual(
+            self.run_cli("descriptions", "--default-word-count", "10", "--max-word-count", "20", "Short"),
+            optimize_descriptions(["Short"], 10, 20),
+        )
+
+    def test_read_items_from_stdin(self):
+        stdin = io.StringIO("first\r\nsecond\n")
+        self.assertEqual(list(read_items([], stdin)), ["first", "second"])
+        self.assertEqual(list(read_items(["a", "-", "b"], io.StringIO("x\n"))), ["a", "x", "b"])
+
+    def test_rules_file(self):
+        rules = [{"pattern": "Canva", "template": "Canva Pro {sep} Lifetime"}]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "rules.json")
+            with open(path, "w", encoding="utf-8") as rules_file:
+                json.dump(rules, rules_file)
+            os.environ["PRODUCT_OPTIMIZER_CACHE_DIR"] = os.path.join(directory, "cache")
+            try:
+                self.assertEqual(self.run_cli("titles", "--rules", path, "canva", "ChatGPT"),
+                                 ["Canva Pro | Lifetime", "ChatGPT"])
+            finally:
+                del os.environ["PRODUCT_OPTIMIZER_CACHE_DIR"]
+            self.assertEqual(len(os.listdir(os.path.join(directory, "cache"))), 1)
+
+    def test_engines_load_lazily(self):
+        code = (
+            "import sys, product_optimizer as p\n"
+            "before = 'optimized_product_optimizer' in sys.modules\n"
+            "p.optimize_titles(['x'])\n"
+            "print(before, 'optimized_product_optimizer' in sys.modules, 'optimizer_service' in sys.modules)\n"
+        )
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+        self.assertEqual(result.stdout.split(), ["False", "True", "False"])
+
+    def test_startup_imports(self):
+        code = (
+            "import io, sys\n"
+            "from product_optimizer.cli import main\n"
+            "main(['titles', 'ChatGPT'], io.StringIO())\n"
+            "print('shutil' in sys.modules, 'fuzzy_classifier' in sys.modules)\n"
+        )
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+        self.assertEqual(result.stdout.split(), ["False", "False"])
+
+    def test_delegated_usage_names_the_subcommand(self):
+        argv0 = sys.argv[0]
+        with redirect_stdout(io.StringIO()) as help_text, self.assertRaises(SystemExit):
+            main(["rank", "--help"])
+        self.assertTrue(help_text.getvalue().startswith("usage: python -m product_optimizer rank "))
+        self.assertEqual(sys.argv[0], argv0)
+
+if __name__ == "__main__":
+    unittest.main()
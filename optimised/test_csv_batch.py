@@ -0,0 +1,47 @@
+import io
+import unittest
+from csv_batch import iter_chunks, optimize_csv
+
+SAMPLE = (
+    "Product Title,Product URL,Description\r\n"
+    '"[FAST 24/7] SciSpace Typeset Premium","https://shopee.com.my/a-i.1.2","Short text."\r\n'
+    '"Plain listing, no rule","https://shopee.com.my/b-i.3.4","Another."\r\n'
+)
+
+class TestCsvBatch(unittest.TestCase):
+    def test_rewrites_only_title_column(self):
+        output = io.StringIO()
+        rows = optimize_csv(io.StringIO(SAMPLE), output, chunk_size=1)
+        self.assertEqual(rows, 2)
+        lines = output.getvalue().splitlines()
+        self.assertEqual(lines[0], "Product Title,Product URL,Description")
+        self.assertEqual(
+            lines[1],
+            '"SciSpace Typeset Premium | AI Copilot | ChatGPT Alternative","https://shopee.com.my/a-i.1.2","Short text."'
+        )
+        self.assertEqual(lines[2], '"Plain listing, no rule","https://shopee.com.my/b-i.3.4","Another."')
+
+    def test_description_column(self):
+        output = io.StringIO()
+        optimize_csv(io.StringIO(SAMPLE), output, description_column="Description",
+                     default_word_count=10, max_word_count=20)
+        self.assertIn("high-quality materials", output.getvalue())
+
+    def test_missing_column(self):
+        with self.assertRaises(ValueError):
+            optimize_csv(io.StringIO(SAMPLE), io.StringIO(), title_column="Name")
+
+    def test_iter_chunks(self):
+        self.assertEqual(list(iter_chunks(range(5), 2)), [[0, 1], [2, 3], [4]])
+
+    def test_chunk_size_must_be_positive(self):
+        for chunk_size in (0, -1):
+            with self.assertRaises(ValueError):
+                iter_chunks(range(5), chunk_size)
+            output = io.StringIO()
+            with self.assertRaises(ValueError):
+                optimize_csv(io.StringIO(SAMPLE), output, chunk_size=chunk_size)
+            self.assertEqual(output.getvalue(), "")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import json
+import os
+import random
+import unittest
+from dataset_analyzer import analyze_file, analyze_records
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "FICHATGPT")
+
+class TestDatasetAnalyzer(unittest.TestCase):
+    def test_reproduces_existing_report(self):
+        report = analyze_file(os.path.join(DATA_DIR, "TopSales_DigitalProduct_shopee_processed.json"))
+        with open(os.path.join(DATA_DIR, "TopSales_DigitalProduct_shopee_processed_analysis.json"), encoding="utf-8") as handle:
+            expected = json.load(handle)
+        self.assertEqual(list(report["summary"]), list(expected["summary"]))
+        for field, summary in expected["summary"].items():
+            for name, value in summary.items():
+                if isinstance(value, float):
+                    self.assertAlmostEqual(report["summary"][field][name], value, places=9)
+                else:
+                    self.assertEqual(report["summary"][field][name], value)
+        self.assertEqual(
+            [(outlier["field"], outlier["rowIndex"]) for outlier in report["outliers"]],
+            [(outlier["field"], outlier["rowIndex"]) for outlier in expected["outliers"]]
+        )
+        self.assertEqual(report["insights"], expected["insights"])
+
+    def test_sketches_for_large_inputs(self):
+        rng = random.Random(7)
+        values = list(range(20000))
+        rng.shuffle(values)
+        report = analyze_records(({"n": value, "s": str(value)} for value in values), exact_limit=1000)
+        self.assertAlmostEqual(report["summary"]["s"]["unique"], 20000, delta=20000 * 0.03)
+        self.assertAlmostEqual(report["summary"]["n"]["median"], 9999.5, delta=20000 * 0.02)
+        self.assertEqual(report["summary"]["n"]["min"], 0)
+        self.assertAlmostEqual(report["summary"]["n"]["mean"], 9999.5)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import asyncio
+import time
+import unittest
+from description_generator import (
+    BackendError,
+    ChatCompletionsBackend,
+    DescriptionBackend,
+    DescriptionGenerator,
+    TokenBucket,
+    generate_descriptions,
+)
+from description_stub_server import StubServer
+from optimized_product_optimizer import compose_description, optimize_descriptions
+
+class TestDescriptionGenerator(unittest.IsolatedAsyncioTestCase):
+    async def test_stub_backend_round_trip(self):
+        async with StubServer() as server:
+            generator = DescriptionGenerator(ChatCompletionsBackend(server.url), max_concurrency=4)
+            descriptions = [f"Listing number {index}" for index in range(20)]
+            result = await generator.generate_many(descriptions)
+        self.assertEqual(result, [text.strip() for text in optimize_descriptions(descriptions)])
+        self.assertEqual(server.requests, 20)
+
+    async def test_identical_inputs_are_coalesced(self):
+        async with StubServer(latency=0.05) as server:
+            generator = DescriptionGenerator(ChatCompletionsBackend(server.url))
+            result = await generator.generate_many(["Same text"] * 10)
+        self.assertEqual(result, [compose_description("Same text").strip()] * 10)
+        self.assertEqual(server.requests, 1)
+        self.assertEqual(generator.stats["coalesced"], 9)
+
+    async def test_retries_then_succeeds(self):
+        async with StubServer(fail_first=2) as server:
+            generator = DescriptionGenerator(ChatCompletionsBackend(server.url), retries=3, backoff=0.001)
+            result = await generator.generate("Retry me")
+        self.assertEqual(result, compose_description("Retry me").strip())
+        self.assertEqual(generator.stats["retries"], 2)
+
+    async def test_timeout_uses_fallback(self):
+        async with StubServer(latency=1.0) as server:
+            generator = DescriptionGenerator(
+                ChatCompletionsBackend(server.url), timeout=0.05, retries=1, backoff=0.001, fallback=str.upper
+            )
+            self.assertEqual(await generator.generate("slow"), "SLOW")
+        self.assertEqual(generator.stats["failures"], 1)
+
+    async def test_non_retryable_error_is_raised(self):
+        class Rejecting(DescriptionBackend):
+            calls = 0
+
+            async def generate(self, prompt, description):
+                Rejecting.calls += 1
+                raise BackendError("bad request", 400)
+
+        with self.assertRaises(BackendError):
+            await DescriptionGenerator(Rejecting(), retries=3).generate("x")
+        self.assertEqual(Rejecting.calls, 1)
+
+    async def test_token_bucket_limits_rate(self):
+        bucket = TokenBucket(rate=100, capacity=1)
+        start = time.monotonic()
+        await asyncio.gather(*(bucket.acquire() for _ in range(6)))
+        self.assertGreaterEqual(time.monotonic() - start, 0.045)
+
+class TestGenerateDescriptions(unittest.TestCase):
+    def test_offline_template_backend(self):
+        self.assertEqual(generate_descriptions(["Basic product"]), optimize_descriptions(["Basic product"]))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import io
+import unittest
+from description_store import compact_descriptions, export_descriptions, read_compact, write_compact
+from optimized_product_optimizer import optimize_descriptions
+
+DESCRIPTIONS = [
+    "Basic product description",
+    "High quality and easy to use tool",
+    "",
+    " ".join(["word"] * 1800),
+    " ".join(["word"] * 2500),
+]
+
+class TestDescriptionStore(unittest.TestCase):
+    def test_render_matches_optimize_descriptions(self):
+        for default_word_count, max_word_count in [(1500, 2000), (10, 20), (3000, 2000)]:
+            compact = compact_descriptions(DESCRIPTIONS, default_word_count, max_word_count)
+            expected = optimize_descriptions(DESCRIPTIONS, default_word_count, max_word_count)
+            self.assertEqual([str(description) for description in compact], expected)
+
+    def test_block_sequences_are_shared(self):
+        first, second = compact_descriptions(["Product one", "Product two"])
+        self.assertIs(first.blocks, second.blocks)
+
+    def test_serializer_round_trip(self):
+        compact = compact_descriptions(DESCRIPTIONS * 3)
+        buffer = io.StringIO()
+        self.assertEqual(write_compact(compact, buffer), 15)
+        buffer.seek(0)
+        self.assertEqual(list(export_descriptions(read_compact(buffer))), optimize_descriptions(DESCRIPTIONS * 3))
+
+    def test_fillers_are_written_once(self):
+        compact = compact_descriptions(f"Product number {index}" for index in range(100))
+        buffer = io.StringIO()
+        write_compact(compact, buffer)
+        self.assertLess(len(buffer.getvalue()) * 10, sum(len(str(description)) for description in compact))
+
+if __name__ == "__main__":
+    unittest.main()
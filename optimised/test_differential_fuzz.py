@@ -0,0 +1,31 @@
+import unittest
+from differential_fuzz import generate_cases, load_implementation, minimize, run_differential
+
+class TestDifferentialFuzz(unittest.TestCase):
+    def test_equivalent_copies_agree(self):
+        report = run_differential(
+            load_implementation("refactored"), load_implementation("titles_gpt"), generate_cases(5000, seed=1)
+        )
+        self.assertEqual(report["cases"], 5000)
+        self.assertEqual(report["divergences"], [])
+        self.assertGreater(report["candidate"]["titles_per_second"], 0)
+
+    def test_double_truncation_divergence_is_minimized(self):
+        report = run_differential(
+            load_implementation("refactored"), load_implementation("desc"), generate_cases(5000, seed=1),
+            max_divergences=1,
+        )
+        divergence = report["divergences"][0]
+        self.assertLess(divergence["max_length"], 3)
+        self.assertLessEqual(len(divergence["reproducer"]), 3)
+        self.assertNotEqual(divergence["reference"], divergence["candidate"])
+
+    def test_minimize(self):
+        self.assertEqual(minimize("xxxxaxxxbxxxx" * 3, lambda title: "a" in title and "b" in title), "ab")
+        self.assertEqual(minimize("anything", lambda title: True), "")
+
+    def test_cases_are_reproducible(self):
+        self.assertEqual(list(generate_cases(100, seed=7)), list(generate_cases(100, seed=7)))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import random
+import unittest
+from fuzzy_classifier import FuzzyClassifier, substring_distance
+from optimized_product_optimizer import optimize_titles
+from title_rules import compile_rules
+
+def reference_distance(pattern, text):
+    # Sellers' dynamic programme: a match may start and end anywhere in the text
+    previous = list(range(len(pattern) + 1))
+    best = previous[-1]
+    for char in text:
+        current = [0]
+        for index, pattern_char in enumerate(pattern):
+            current.append(min(
+                previous[index] + (pattern_char != char),
+                previous[index + 1] + 1,
+                current[index] + 1
+            ))
+        previous = current
+        best = min(best, previous[-1])
+    return best
+
+class TestFuzzyClassifier(unittest.TestCase):
+    def test_substring_distance_matches_reference(self):
+        rng = random.Random(5)
+        for _ in range(500):
+            pattern = "".join(rng.choice("abc") for _ in range(rng.randint(1, 70)))
+            text = "".join(rng.choice("abcd") for _ in range(rng.randint(0, 40)))
+            self.assertEqual(substring_distance(pattern, text), reference_distance(pattern, text))
+
+    def test_classify_variants(self):
+        classifier = FuzzyClassifier(["3u ChatGPT", "ChatGPT", "Turnitin", "SciSpace"])
+        self.assertEqual(classifier.classify("3u Chat Gpt4 Plus Warranty Provided")[0], "3u ChatGPT")
+        name, confidence = classifier.classify("Turntin plagiarism report")
+        self.assertEqual(name, "Turnitin")
+        self.assertLess(confidence, 1)
+        self.assertIsNone(classifier.classify("Canva Pro lifetime"))
+        # One edit away, but a different number is a different product
+        self.assertEqual(classifier.classify("5𝒖 𝐂𝐡𝐚𝐭 𝐆𝐏𝐓𝟒.𝟎 𝐏𝐥𝐮𝐬 𝐖𝐚𝐫𝐫𝐚𝐧𝐭𝐲")[0], "ChatGPT")
+
+    def test_optimize_titles_uses_fuzzy_fallback(self):
+        titles = ["3u Chat Gpt4 Plus Warranty Provided", "Turntin CHEAPEST check", "5u Chat GPT4.0 Plus Warranty"]
+        result = optimize_titles(titles, matcher=compile_rules(fuzzy_threshold=0.85))
+        self.assertEqual(result[0], "3u ChatGPT 4 Plus | Warranty Provided")
+        self.assertTrue(result[1].startswith("Affordable Turnitin"))
+        self.assertFalse(result[2].startswith("3u"))
+        # The fallback is opt-in
+        self.assertEqual(optimize_titles(titles[:1]), titles[:1])
+
+if __name__ == "__main__":
+    unittest.main()
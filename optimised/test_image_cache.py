@@ -0,0 +1,143 @@
+import io
+import json
+import os
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stderr
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from image_cache import ImageCache, listing_image_urls, main
+from image_codec import Image, decode
+
+RED = Image(40, 20, "RGB", bytes((255, 0, 0)) * 800).to_png()
+GRAY = Image(16, 16, "L", bytes(range(256))).to_png()
+# Stand-in CDN: two URLs serve the same bytes, one redirects
+FILES = {"/red.png": RED, "/copy-of-red.png": RED, "/gray.png": GRAY, "/broken.png": b"not an image"}
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        if self.path == "/moved.png":
+            self.send_response(301)
+            self.send_header("Location", "/gray.png")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = FILES.get(self.path.split("?")[0])
+        if body is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestImageCache(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.requests = []
+        self.server.connections = 0
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.base = "http://%s:%d" % self.server.server_address
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache_dir = self.directory.name
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.directory.cleanup()
+
+    def urls(self, *paths):
+        return [self.base + path for path in paths]
+
+    def test_fetch_deduplicates_and_reuses_connections(self):
+        paths = ["/red.png", "/gray.png", "/copy-of-red.png"] * 10 + [f"/red.png?v={n}" for n in range(20)]
+        with ImageCache(self.cache_dir, max_workers=3) as cache:
+            digests = cache.fetch_many(self.urls(*paths))
+            self.assertEqual(len(digests), 23)
+            self.assertEqual(len(set(digests.values())), 2)
+            self.assertEqual(cache.stats["downloaded"], 23)
+            self.assertLessEqual(cache.stats["connections"], 3)
+        # Each URL is requested once, over at most one connection per thread
+        self.assertEqual(len(self.server.requests), 23)
+        self.assertLessEqual(self.server.connections, 3)
+        objects = [name for _, _, names in os.walk(os.path.join(self.cache_dir, "objects")) for name in names]
+        self.assertEqual(len(objects), 2)
+
+        # A later run finds every URL in the index
+        with ImageCache(self.cache_dir) as cache:
+            self.assertEqual(cache.fetch_many(self.urls(*paths)), digests)
+            self.assertEqual(cache.stats["url_hits"], 23)
+        self.assertEqual(len(self.server.requests), 23)
+
+    def test_redirects_and_errors(self):
+        with ImageCache(self.cache_dir, max_workers=2) as cache:
+            digests = cache.fetch_many(self.urls("/moved.png", "/gray.png", "/missing.png"))
+            moved, gray, missing = self.urls("/moved.png", "/gray.png", "/missing.png")
+            self.assertEqual(digests[moved], digests[gray])
+            self.assertNotIn(missing, digests)
+            self.assertEqual(cache.errors[missing], "HTTP 404")
+            self.assertEqual(cache.stats["failed"], 1)
+
+    def test_overwritten_local_files_are_read_again(self):
+        path = os.path.join(self.cache_dir, "local.png")
+        with open(path, "wb") as handle:
+            handle.write(RED)
+        with ImageCache(os.path.join(self.cache_dir, "cache")) as cache:
+            red = cache.fetch(path)
+            self.assertEqual(cache.fetch(path), red)
+            self.assertEqual(cache.stats["url_hits"], 1)
+
+            with open(path, "wb") as handle:
+                handle.write(GRAY)
+            status = os.stat(path)
+            os.utime(path, ns=(status.st_atime_ns, status.st_mtime_ns + 1))
+            gray = cache.fetch(path)
+            self.assertNotEqual(gray, red)
+            self.assertEqual(cache.lookup_many([path]), {path: gray})
+
+    def test_thumbnails_are_made_once(self):
+        red, copy, gray, broken = self.urls("/red.png", "/copy-of-red.png", "/gray.png", "/broken.png")
+        with ImageCache(self.cache_dir) as cache:
+            cache.fetch_many([red, copy, gray, broken])
+            thumbnails = cache.thumbnails([red, copy, gray, broken, "unknown"], size=10)
+            self.assertEqual(thumbnails[red], thumbnails[copy])
+            self.assertEqual(cache.stats["thumbnails"], 2)
+            self.assertEqual(set(cache.errors), {broken, "unknown"})
+            with open(thumbnails[red], "rb") as handle:
+                image = decode(handle.read())
+            self.assertEqual((image.width, image.height, image.pixels[:3]), (10, 5, bytes((255, 0, 0))))
+
+            self.assertEqual(cache.thumbnail(gray, size=10), thumbnails[gray])
+            self.assertEqual((cache.stats["thumbnails"], cache.stats["thumbnail_hits"]), (2, 1))
+            self.assertIsNone(cache.thumbnail(broken, size=10))
+
+    def test_listing_image_urls(self):
+        path = os.path.join(self.cache_dir, "listings.json")
+        records = [{"contents href": "https://shopee.com.my/a-i.1.2", "line-clamp-2": "A",
+                    "inset-y-0 src": self.base + "/gray.png", "w-full src": self.base + "/red.png"}] * 3
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(records, handle)
+        self.assertEqual(list(listing_image_urls(path)), self.urls("/gray.png", "/red.png"))
+
+        with redirect_stderr(io.StringIO()) as messages:
+            main([path, "--cache", os.path.join(self.cache_dir, "cache"), "--thumbnails", "8"])
+        self.assertIn("2 of 2 images cached as 2 files", messages.getvalue())
+        self.assertIn("2 thumbnails (2 made, 0 existing)", messages.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
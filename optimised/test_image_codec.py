@@ -0,0 +1,102 @@
+import os
+import struct
+import unittest
+import zlib
+from image_codec import Image, ImageError, PNG_SIGNATURE, decode, image_format, open_image
+
+IMAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "FICHATGPT", "Image")
+JPEG = os.path.join(IMAGE_DIR, "sg-11134201-7rd3w-m7sq987p2wy598.jpeg")
+WEBP = os.path.join(IMAGE_DIR, "sg-11134201-7rd6j-m7sq977wjb436d@resize_w900_nl.webp")
+
+
+def paeth(left, up, corner):
+    estimate = left + up - corner
+    distances = [abs(estimate - left), abs(estimate - up), abs(estimate - corner)]
+    return (left, up, corner)[distances.index(min(distances))]
+
+
+def filtered_png(width, height, color_type, samples, pixels):
+    # Encode every row with a different filter, the way PNG encoders mix them
+    stride = width * samples
+    raw = bytearray()
+    previous = bytes(stride)
+    for y in range(height):
+        row = pixels[y * stride:(y + 1) * stride]
+        kind = y % 5
+        out = bytearray()
+        for index, value in enumerate(row):
+            left = row[index - samples] if index >= samples else 0
+            corner = previous[index - samples] if index >= samples else 0
+            up = previous[index]
+            predictor = (0, left, up, (left + up) >> 1, paeth(left, up, corner))[kind]
+            out.append((value - predictor) & 255)
+        raw += bytes((kind,)) + out
+        previous = row
+    header = struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0)
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    return PNG_SIGNATURE + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(bytes(raw))) + chunk(b"IEND", b"")
+
+
+class TestImageCodec(unittest.TestCase):
+    def test_png_filters(self):
+        pixels = bytes((x * 37 + y * 11 + c * 101) % 256 for y in range(10) for x in range(7) for c in range(3))
+        image = decode(filtered_png(7, 10, 2, 3, pixels))
+        self.assertEqual((image.width, image.height, image.mode), (7, 10, "RGB"))
+        self.assertEqual(image.pixels, pixels)
+
+    def test_png_alpha_on_white(self):
+        pixels = bytes((0, 0, 0, 255, 0, 0, 0, 0, 200, 100, 0, 128))
+        image = decode(filtered_png(3, 1, 6, 4, pixels))
+        self.assertEqual(list(image.pixels), [0, 0, 0, 255, 255, 255, 227, 177, 127])
+
+    def test_png_round_trip(self):
+        for mode, channels in (("L", 1), ("RGB", 3)):
+            image = Image(5, 4, mode, bytes(range(20 * channels)))
+            decoded = decode(image.to_png())
+            self.assertEqual((decoded.mode, decoded.pixels), (mode, image.pixels))
+
+    def test_resize_averages_boxes(self):
+        image = Image(4, 2, "L", bytes((0, 10, 20, 30, 40, 50, 60, 70)))
+        self.assertEqual(list(image.resize(2, 1).pixels), [25, 45])
+        self.assertEqual(list(image.resize(8, 2).pixels[:4]), [0, 0, 10, 10])
+        self.assertEqual((image.fit(2).width, image.fit(2).height), (2, 1))
+        self.assertIs(image.fit(10), image)
+
+    def test_convert(self):
+        image = Image(2, 1, "RGB", bytes((255, 255, 255, 255, 0, 0)))
+        self.assertEqual(list(image.convert("L").pixels), [255, 76])
+        self.assertEqual(image.convert("L").convert("RGB").pixels, bytes((255,) * 3 + (76,) * 3))
+
+    def test_jpeg_draft_scales(self):
+        eighth = open_image(JPEG, draft=(100, 100))
+        self.assertEqual((eighth.width, eighth.height, eighth.mode), (128, 128, "RGB"))
+        quarter = open_image(JPEG, draft=(256, 256), mode="L")
+        self.assertEqual((quarter.width, quarter.height, quarter.mode), (256, 256, "L"))
+        # Each scale agrees with the next one shrunk to its size
+        shrunk = quarter.resize(128, 128).pixels
+        gray = eighth.convert("L").pixels
+        difference = sum(abs(a - b) for a, b in zip(shrunk, gray)) / len(gray)
+        self.assertLess(difference, 4)
+        # The instructions page is mostly white
+        self.assertGreater(sum(gray) / len(gray), 200)
+
+    def test_unsupported(self):
+        with open(WEBP, "rb") as handle:
+            data = handle.read()
+        self.assertEqual(image_format(data), "webp")
+        with self.assertRaisesRegex(ImageError, "WEBP"):
+            decode(data)
+        with self.assertRaises(ImageError):
+            decode(b"not an image")
+        with open(JPEG, "rb") as handle:
+            data = bytearray(handle.read())
+        # Mark the frame progressive
+        data[data.index(b"\xff\xc0") + 1] = 0xC2
+        with self.assertRaisesRegex(ImageError, "progressive"):
+            decode(bytes(data))
+
+
+if __name__ == "__main__":
+    unittest.main()
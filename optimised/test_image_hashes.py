@@ -0,0 +1,88 @@
+import io
+import json
+import os
+import random
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+from image_cache import ImageCache
+from image_codec import Image, open_image
+from image_hashes import (ALGORITHMS, DEFAULT_RADIUS, HashIndex, cached_hashes, duplicate_clusters, hamming, hash_files,
+                          hash_paths, main)
+
+IMAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "FICHATGPT", "Image")
+SCREENSHOTS = sorted(os.path.join(IMAGE_DIR, name) for name in os.listdir(IMAGE_DIR) if name.endswith(".jpeg"))
+WEBP = os.path.join(IMAGE_DIR, "sg-11134201-7rd6j-m7sq977wjb436d@resize_w900_nl.webp")
+
+
+class TestImageHashes(unittest.TestCase):
+    def test_index_matches_linear_scan(self):
+        generator = random.Random(7)
+        values = [generator.getrandbits(64) for _ in range(1500)]
+        # Plant near neighbours at every distance up to the radius
+        values += [value ^ sum(1 << bit for bit in generator.sample(range(64), index % 11))
+                   for index, value in enumerate(values[:300])]
+        for chunks in (3, 4, 5):
+            index = HashIndex(DEFAULT_RADIUS, chunks)
+            for position, value in enumerate(values):
+                index.add(value, position)
+            self.assertEqual(len(index), len(values))
+            for query in values[:100] + values[-100:]:
+                for radius in (0, 3, DEFAULT_RADIUS):
+                    expected = sorted((hamming(query, value), position) for position, value in enumerate(values)
+                                      if hamming(query, value) <= radius)
+                    self.assertEqual(sorted(index.search(query, radius)), expected)
+        with self.assertRaises(ValueError):
+            index.search(0, DEFAULT_RADIUS + 1)
+
+    def test_duplicate_clusters(self):
+        hashes = {"a": 0b0000, "b": 0b0001, "c": 0b0011, "d": 0xFFFF0000, "e": 0xFFFF0000, "f": 0xF0F0F0F0F0}
+        # Clusters chain through neighbours: a-b-c, and exact copies group together
+        self.assertEqual(duplicate_clusters(hashes, radius=1), [["a", "b", "c"], ["d", "e"]])
+        self.assertEqual(duplicate_clusters(hashes, radius=0), [["d", "e"]])
+
+    def test_hashes_survive_edits(self):
+        with tempfile.TemporaryDirectory() as directory:
+            edited = os.path.join(directory, "edited.png")
+            image = open_image(SCREENSHOTS[0], draft=(256, 256)).resize(300, 300)
+            # Rescaled, re-encoded and brightened
+            brighter = Image(image.width, image.height, image.mode, bytes(min(255, v + 12) for v in image.pixels))
+            with open(edited, "wb") as handle:
+                handle.write(brighter.to_png())
+            for algorithm in ALGORITHMS:
+                original, copy, other = hash_paths([SCREENSHOTS[0], edited, SCREENSHOTS[4]], algorithm)
+                self.assertLessEqual(hamming(original, copy), DEFAULT_RADIUS, algorithm)
+                self.assertGreater(hamming(original, other), 20, algorithm)
+
+    def test_listing_screenshots(self):
+        hashes = dict(zip(SCREENSHOTS + [WEBP], hash_files(SCREENSHOTS + [WEBP], "phash")))
+        self.assertIsNone(hashes.pop(WEBP))
+        # The two instruction pages are one template with different text
+        self.assertEqual(duplicate_clusters(hashes), [SCREENSHOTS[:2]])
+
+    def test_unknown_algorithm(self):
+        with self.assertRaises(ValueError):
+            hash_files([], "md5")
+
+    def test_cached_hashes_and_main(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache_dir = os.path.join(directory, "cache")
+            output = os.path.join(directory, "clusters.json")
+            with redirect_stderr(io.StringIO()) as messages:
+                main([IMAGE_DIR, "--cache", cache_dir, "-o", output, "--workers", "1"])
+            with open(output, encoding="utf-8") as handle:
+                clusters = json.load(handle)
+            self.assertEqual([[entry["image"] for entry in cluster] for cluster in clusters], [SCREENSHOTS[:2]])
+            self.assertIn("1 clusters of near-duplicates among 6 images", messages.getvalue())
+            self.assertIn("m7sq977wjb436d@resize_w900_nl.webp: cannot be decoded", messages.getvalue())
+
+            # Stored hashes are reused rather than decoded again
+            with ImageCache(cache_dir) as cache:
+                digests = cache.fetch_many(SCREENSHOTS)
+                for digest in digests.values():
+                    os.remove(cache.object_path(digest))
+                self.assertEqual(len(cached_hashes(cache, digests.values())), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
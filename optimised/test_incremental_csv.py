@@ -0,0 +1,112 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+from unittest import mock
+from incremental_csv import incremental_optimize, main, row_key
+from title_rules import compile_rules
+
+HEADER = "Product Title,Product URL\r\n"
+ROW_A = '"ChatGPT Plus","https://shopee.com.my/a-i.1.2?sp_atk=one"\r\n'
+ROW_B = '"SciSpace","https://shopee.com.my/b-i.3.4?sp_atk=two"\r\n'
+ROW_B_EDITED = '"SciSpace Premium","https://shopee.com.my/b-i.3.4?sp_atk=three"\r\n'
+ROW_C = '"Turnitin","https://shopee.com.my/c-i.5.6"\r\n'
+
+class TestIncrementalCsv(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.manifest = os.path.join(self.tmpdir.name, "manifest.sqlite")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def run_once(self, text, **options):
+        feed = io.StringIO()
+        output = io.StringIO()
+        stats = incremental_optimize(io.StringIO(text), self.manifest, feed, output, chunk_size=2, **options)
+        return stats, [json.loads(line) for line in feed.getvalue().splitlines()], output.getvalue()
+
+    def test_only_changes_are_reprocessed(self):
+        stats, feed, _ = self.run_once(HEADER + ROW_A + ROW_B)
+        self.assertEqual(stats["added"], 2)
+        self.assertEqual([record["op"] for record in feed], ["upsert", "upsert"])
+
+        stats, feed, output = self.run_once(HEADER + ROW_A + ROW_B_EDITED + ROW_C)
+        self.assertEqual(stats, {"added": 1, "changed": 1, "unchanged": 1, "deleted": 0})
+        self.assertEqual([record["row"]["Product URL"] for record in feed],
+                         ["https://shopee.com.my/b-i.3.4?sp_atk=three", "https://shopee.com.my/c-i.5.6"])
+        self.assertIn('"ChatGPT Plus Premium | 24/7 Access to Turbo GPT-4 Vision"', output)
+
+        stats, feed, _ = self.run_once(HEADER + ROW_C)
+        self.assertEqual(stats["deleted"], 2)
+        self.assertEqual(sorted(record["key"] for record in feed),
+                         ["https://shopee.com.my/a-i.1.2", "https://shopee.com.my/b-i.3.4"])
+
+    def test_rule_change_reprocesses_rows(self):
+        self.run_once(HEADER + ROW_A)
+        matcher = compile_rules([{"pattern": "ChatGPT", "template": "Custom"}])
+        stats, feed, _ = self.run_once(HEADER + ROW_A, matcher=matcher)
+        self.assertEqual(stats["changed"], 1)
+        self.assertEqual(feed[0]["row"]["Product Title"], "Custom")
+
+    def test_tracking_params_and_duplicate_keys_are_stable(self):
+        duplicate = '"SciSpace","https://shopee.com.my/a-i.1.2?sp_atk=four"\r\n'
+        stats, _, _ = self.run_once(HEADER + ROW_A + duplicate)
+        self.assertEqual(stats["added"], 2)
+
+        retracked = ROW_A.replace("sp_atk=one", "sp_atk=five")
+        for _ in range(2):
+            stats, feed, output = self.run_once(HEADER + retracked + duplicate)
+            self.assertEqual(stats, {"added": 0, "changed": 0, "unchanged": 2, "deleted": 0})
+            self.assertEqual(feed, [])
+            self.assertIn("sp_atk=five", output)
+
+        stats, feed, _ = self.run_once(HEADER + retracked)
+        self.assertEqual(feed, [{"op": "delete", "key": "https://shopee.com.my/a-i.1.2#2"}])
+
+    def test_empty_matcher_is_used(self):
+        _, feed, _ = self.run_once(HEADER + ROW_A, matcher=compile_rules([]))
+        self.assertEqual(feed[0]["row"]["Product Title"], "ChatGPT Plus")
+
+    def test_empty_input_and_bad_chunk_size(self):
+        self.run_once(HEADER + ROW_A)
+        self.assertEqual(self.run_once(""), ({"added": 0, "changed": 0, "unchanged": 0, "deleted": 0}, [], ""))
+        # The empty run did not count as a snapshot without ROW_A
+        self.assertEqual(self.run_once(HEADER + ROW_A)[0]["unchanged"], 1)
+        with self.assertRaises(ValueError):
+            incremental_optimize(io.StringIO(HEADER + ROW_A), self.manifest, io.StringIO(), chunk_size=0)
+
+    def test_cli_options_enter_the_version(self):
+        source = os.path.join(self.tmpdir.name, "products.csv")
+        feed = os.path.join(self.tmpdir.name, "feed.jsonl")
+        rules = os.path.join(self.tmpdir.name, "rules.json")
+        with open(source, "w", newline="", encoding="utf-8") as source_file:
+            source_file.write(HEADER + ROW_A)
+        with open(rules, "w", encoding="utf-8") as rules_file:
+            json.dump([{"pattern": "ChatGPT", "template": "Custom - Plan"}], rules_file)
+
+        def run(*options):
+            with redirect_stderr(io.StringIO()) as summary:
+                main([source, "--manifest", self.manifest, "--feed", feed, *options])
+            with open(feed, encoding="utf-8") as feed_file:
+                return summary.getvalue(), [json.loads(line) for line in feed_file]
+
+        self.assertIn("Added 1", run()[0])
+        self.assertEqual(run()[1], [])
+        summary, records = run("--separator", "/", "--max-length", "100")
+        self.assertIn("changed 1", summary)
+        self.assertEqual(records[0]["row"]["Product Title"], "ChatGPT Plus Premium / 24/7 Access to Turbo GPT-4 Vision")
+        with mock.patch.dict(os.environ, {"PRODUCT_OPTIMIZER_CACHE_DIR": os.path.join(self.tmpdir.name, "cache")}):
+            _, records = run("--rules", rules)
+        self.assertEqual(records[0]["row"]["Product Title"], "Custom | Plan")
+        with redirect_stderr(io.StringIO()) as errors, self.assertRaises(SystemExit):
+            main([source, "--manifest", self.manifest, "--chunk-size", "0"])
+        self.assertIn("--chunk-size must be at least 1", errors.getvalue())
+
+    def test_row_key_drops_tracking_params(self):
+        self.assertEqual(row_key("https://shopee.com.my/x-i.1.2?sp_atk=a&xptdk=b"), "https://shopee.com.my/x-i.1.2")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import io
+import unittest
+from unittest import mock
+from input_tokenizer import InvalidInputError, iter_items
+
+class TestInputTokenizer(unittest.TestCase):
+    def test_separators_and_quoting(self):
+        self.assertEqual(list(iter_items("item1, item2|item3")), ["item1", "item2", "item3"])
+        self.assertEqual(
+            list(iter_items('"SciSpace Premium | AI Copilot", "Say ""hi""", 5" screen')),
+            ["SciSpace Premium | AI Copilot", 'Say "hi"', '5" screen']
+        )
+        self.assertEqual(list(iter_items("a;b", separator_pattern=";")), ["a", "b"])
+
+    def test_streaming_sources_match_string(self):
+        text = ", ".join(f'"Title {number} | variant"' if number % 3 == 0 else f"Title {number}" for number in range(500))
+        expected = list(iter_items(text))
+        self.assertEqual(len(expected), 500)
+        self.assertEqual(list(iter_items(io.StringIO(text), read_size=7)), expected)
+        self.assertEqual(list(iter_items(text[i:i + 5] for i in range(0, len(text), 5))), expected)
+
+    def test_errors_raise_or_go_to_sink(self):
+        for bad in ["", "a,,b", "a, b,", '"unterminated, b']:
+            with self.assertRaises(InvalidInputError):
+                list(iter_items(bad))
+        errors = []
+        self.assertEqual(list(iter_items("a,, b", on_error=errors.append)), ["a", "b"])
+        self.assertEqual(errors[0].item_index, 1)
+
+    def test_long_bad_input_does_not_recurse(self):
+        errors = []
+        self.assertEqual(list(iter_items("," * 100000, on_error=errors.append)), [])
+        self.assertEqual(len(errors), 100001)
+
+    def test_legacy_validators_raise_instead_of_prompting(self):
+        import Refactored
+        import optimized_description_gpt
+        import optimized_titles_gpt
+        validators = [
+            Refactored.validate_titles_input,
+            optimized_titles_gpt.validate_titles_input,
+            optimized_description_gpt.validate_titles_input,
+            optimized_description_gpt.validate_descriptions_input,
+        ]
+        with mock.patch("builtins.input", side_effect=AssertionError("validator prompted")):
+            for validate in validators:
+                with self.assertRaises(InvalidInputError):
+                    validate("a,,b")
+                errors = []
+                self.assertEqual(validate("a,,b", on_error=errors.append), ["a", "b"])
+                self.assertEqual(len(errors), 1)
+            with self.assertRaises(TypeError):
+                Refactored.ensure_titles_list(42)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import unittest
+from listing import (
+    Listing,
+    ListingBatch,
+    canonical_url,
+    parse_discount,
+    parse_item_ids,
+    parse_price,
+    parse_sales,
+    read_listings
+)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "FICHATGPT")
+
+class TestListing(unittest.TestCase):
+    def test_parsers(self):
+        self.assertEqual(parse_sales("20.9k Sold/Month"), 20900)
+        self.assertEqual(parse_sales("107 sold/month"), 107)
+        self.assertEqual(parse_sales("1,234 sold"), 1234)
+        self.assertEqual(parse_sales("1.2M sold"), 1200000)
+        self.assertEqual(parse_sales("107 monthly sold"), 107)
+        self.assertEqual(parse_sales("1 month"), 1)
+        self.assertIsNone(parse_sales("no sales yet"))
+        self.assertEqual(parse_price("RM1,299.00"), 1299.0)
+        self.assertEqual(parse_price(5.99), 5.99)
+        self.assertEqual(parse_discount("-80%"), 80.0)
+        self.assertEqual(
+            parse_item_ids("https://shopee.com.my/x-i.1367151879.26777790023?sp_atk=a"),
+            (1367151879, 26777790023)
+        )
+        self.assertEqual(
+            parse_item_ids("https://shopee.com.my/find_similar_products?catid=1&itemid=22&shopid=11"),
+            (11, 22)
+        )
+
+    def test_canonical_url(self):
+        expected = "https://shopee.com.my/product/1367151879/26777790023"
+        self.assertEqual(canonical_url("https://shopee.com.my/Some-Title-i.1367151879.26777790023?sp_atk=a&xptdk=b"), expected)
+        self.assertEqual(canonical_url("https://Shopee.com.my/Renamed-i.1367151879.26777790023"), expected)
+        self.assertEqual(canonical_url("https://shopee.com.my/find_similar_products?itemid=22&shopid=11"),
+                         "https://shopee.com.my/product/11/22")
+        self.assertEqual(canonical_url("https://example.com/item?ref=1#top"), "https://example.com/item")
+        self.assertIsNone(canonical_url(""))
+
+    def test_read_listings(self):
+        listing = next(read_listings(os.path.join(DATA_DIR, "TopSales_DigitalProduct_shopee_processed.json")))
+        self.assertEqual(listing.sales, 20900)
+        self.assertEqual(listing.key, (175491885, 27676579373))
+        popular = next(read_listings(os.path.join(DATA_DIR, "Popular_DigitalProduct_shopee_processed.json")))
+        self.assertEqual(popular.discount, 2.0)
+        with self.assertRaises(AttributeError):
+            listing.unknown = 1
+
+    def test_batch_round_trip(self):
+        listings = [
+            Listing("A", shop_id=1, item_id=2, price=5.0, sales=10, location="Selangor"),
+            Listing("B"),
+        ]
+        batch = ListingBatch(listings)
+        self.assertEqual(len(batch), 2)
+        self.assertEqual(list(batch), listings)
+        self.assertEqual(batch.column("sales").tolist(), [10, -1])
+
+if __name__ == "__main__":
+    unittest.main()
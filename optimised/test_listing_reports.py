@@ -0,0 +1,68 @@
+import io
+import json
+import os
+import random
+import tempfile
+import unittest
+from listing import Listing
+from listing_reports import external_sort, rank_key, top_k, write_json_array
+
+class TestListingReports(unittest.TestCase):
+    def setUp(self):
+        self.listings = [
+            Listing("a", sales=100, price=5.0, location="Selangor"),
+            Listing("b", sales=None, price=1.0, location="Selangor"),
+            Listing("c", sales=300, price=9.0, location="Johor"),
+            Listing("d", sales=200, price=2.0, location="Selangor"),
+            Listing("e", sales=300, price=4.0),
+        ]
+
+    def titles(self, listings):
+        return [listing.title for listing in listings]
+
+    def test_top_k(self):
+        self.assertEqual(self.titles(top_k(self.listings, 3)), ["c", "e", "d"])
+        self.assertEqual(self.titles(top_k(self.listings, 2, "price", largest=False)), ["b", "d"])
+        self.assertEqual(top_k(self.listings, 0), [])
+
+    def test_top_k_by_group(self):
+        ranked = top_k(self.listings, 1, group_by="location")
+        self.assertEqual({group: self.titles(items) for group, items in ranked.items()},
+                         {"Selangor": ["d"], "Johor": ["c"], None: ["e"]})
+
+    def test_top_k_matches_full_sort(self):
+        values = [random.randrange(1000) for _ in range(5000)]
+        self.assertEqual(top_k(values, 50, metric=lambda value: value), sorted(values, reverse=True)[:50])
+
+    def test_rank_key_puts_missing_values_last(self):
+        self.assertEqual(self.titles(sorted(self.listings, key=rank_key())), ["c", "e", "d", "a", "b"])
+        grouped = sorted(self.listings, key=rank_key("price", group_by="location"))
+        self.assertEqual(self.titles(grouped), ["c", "a", "d", "b", "e"])
+
+    def test_external_sort_spills_and_merges_in_passes(self):
+        items = [(random.randrange(100), index) for index in range(3000)]
+        with tempfile.TemporaryDirectory() as directory:
+            ordered = list(external_sort(items, key=lambda item: item[0], run_size=50, fan_in=4, directory=directory))
+            self.assertEqual(os.listdir(directory), [])
+        # Stable: equal keys keep their input order
+        self.assertEqual(ordered, sorted(items, key=lambda item: item[0]))
+
+    def test_external_sort_of_listings(self):
+        ordered = external_sort(self.listings, rank_key(), run_size=2)
+        self.assertEqual(self.titles(ordered), ["c", "e", "d", "a", "b"])
+
+    def test_external_sort_rejects_bad_sizes(self):
+        for options in ({"run_size": 0}, {"run_size": -1}, {"fan_in": 1}):
+            with self.assertRaises(ValueError):
+                list(external_sort([3, 1, 2], key=lambda item: item, **options))
+
+    def test_write_json_array(self):
+        output = io.StringIO()
+        self.assertEqual(write_json_array(iter([{"a": 1}, {"b": "é"}]), output), 2)
+        self.assertEqual(json.loads(output.getvalue()), [{"a": 1}, {"b": "é"}])
+        empty = io.StringIO()
+        write_json_array([], empty)
+        self.assertEqual(json.loads(empty.getvalue()), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import json
+import os
+import tempfile
+import unittest
+from metrics import METRICS, Metrics
+from optimized_product_optimizer import optimize_titles, optimize_descriptions
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        METRICS.reset()
+        METRICS.enable()
+
+    def tearDown(self):
+        METRICS.disable()
+        METRICS.reset()
+
+    def test_title_counters(self):
+        optimize_titles(["ChatGPT Product", "Turnitin CHEAPEST", "Plain title", "x" * 300])
+        counters = METRICS.to_dict()["counters"]
+        self.assertEqual(counters["titles_total"], {"": 4})
+        self.assertEqual(counters["rule_hits_total"], {"rule=ChatGPT": 1, "rule=Turnitin CHEAPEST": 1})
+        self.assertEqual(counters["titles_unmatched_total"], {"": 2})
+        self.assertEqual(counters["titles_truncated_total"], {"": 1})
+        self.assertEqual(METRICS.to_dict()["histograms"]["stage_seconds"]["stage=optimize_titles"]["count"], 1)
+
+    def test_description_counters_match_output(self):
+        descriptions = ["Short", "high quality and easy to use " * 10, "word " * 2500]
+        instrumented = optimize_descriptions(descriptions)
+        METRICS.disable()
+        self.assertEqual(instrumented, optimize_descriptions(descriptions))
+        counters = METRICS.to_dict()["counters"]
+        self.assertEqual(counters["descriptions_total"], {"": 3})
+        self.assertEqual(counters["descriptions_expanded_total"], {"": 3})
+        self.assertEqual(counters["descriptions_truncated_total"], {"": 1})
+
+    def test_disabled_records_nothing(self):
+        METRICS.disable()
+        optimize_titles(["ChatGPT Product"])
+        with METRICS.time("stage"):
+            pass
+        self.assertEqual(METRICS.to_dict(), {"counters": {}, "histograms": {}})
+
+    def test_prometheus_export(self):
+        metrics = Metrics(enabled=True)
+        metrics.increment("rule_hits_total", rule='Say "hi"')
+        metrics.observe("filler_blocks", 3, (1, 5))
+        text = metrics.to_prometheus()
+        self.assertIn('# TYPE optimizer_rule_hits_total counter', text)
+        self.assertIn('optimizer_rule_hits_total{rule="Say \\"hi\\""} 1', text)
+        self.assertIn('optimizer_filler_blocks_bucket{le="1"} 0', text)
+        self.assertIn('optimizer_filler_blocks_bucket{le="5"} 1', text)
+        self.assertIn('optimizer_filler_blocks_bucket{le="+Inf"} 1', text)
+        self.assertIn('optimizer_filler_blocks_count 1', text)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "metrics.json")
+            metrics.write_json(path)
+            with open(path) as handle:
+                self.assertEqual(json.load(handle)["histograms"]["filler_blocks"][""]["sum"], 3)
+
+if __name__ == "__main__":
+    unittest.main()
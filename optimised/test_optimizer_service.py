@@ -0,0 +1,120 @@
+import http.client
+import io
+import json
+import socket
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stderr
+from unittest import mock
+from optimized_product_optimizer import optimize_titles, optimize_descriptions
+from optimizer_service import MicroBatcher, OptimizerRequestHandler, OptimizerService, ServiceOverloaded, create_server, main
+
+TITLES = ["ChatGPT Product", "SciSpace Tool", "Turnitin CHEAPEST Service", "Plain title"] * 25
+
+class TestOptimizerService(unittest.TestCase):
+    def setUp(self):
+        self.service = OptimizerService(max_delay=0.005)
+        self.server = create_server(self.service, port=0)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.service.close()
+
+    def request(self, method, path, payload=None):
+        connection = http.client.HTTPConnection(*self.server.server_address, timeout=5)
+        try:
+            body = None if payload is None else json.dumps(payload)
+            connection.request(method, path, body, {"Content-Type": "application/json"})
+            response = connection.getresponse()
+            return response.status, json.loads(response.read())
+        finally:
+            connection.close()
+
+    def test_concurrent_titles_are_batched(self):
+        with ThreadPoolExecutor(max_workers=20) as pool:
+            responses = list(pool.map(lambda title: self.request("POST", "/titles", {"title": title}), TITLES))
+        self.assertEqual([body["title"] for _, body in responses], optimize_titles(TITLES))
+        stats = self.service.titles.stats
+        self.assertEqual(stats["requests"], len(TITLES))
+        self.assertLess(stats["batches"], len(TITLES))
+
+    def test_bulk_and_options(self):
+        status, body = self.request("POST", "/bulk", {
+            "titles": TITLES,
+            "descriptions": ["Short description"],
+            "separator": "/",
+        })
+        self.assertEqual(status, 200)
+        self.assertEqual(body["titles"], optimize_titles(TITLES, separator="/"))
+        self.assertEqual(body["descriptions"], optimize_descriptions(["Short description"]))
+
+    def test_errors(self):
+        self.assertEqual(self.request("POST", "/titles", {"title": 3})[0], 400)
+        self.assertEqual(self.request("POST", "/titles", {"title": "x", "max_length": "10"})[0], 400)
+        self.assertEqual(self.request("GET", "/missing")[0], 404)
+        status, body = self.request("GET", "/health")
+        self.assertEqual(status, 200)
+        self.assertEqual(body["rules_version"], self.service.matcher.version)
+
+    def test_bad_content_length_and_internal_errors(self):
+        for length in ("abc", "-5"):
+            connection = http.client.HTTPConnection(*self.server.server_address, timeout=5)
+            connection.putrequest("POST", "/titles")
+            connection.putheader("Content-Length", length)
+            connection.endheaders()
+            response = connection.getresponse()
+            self.assertEqual(response.status, 400)
+            self.assertEqual(json.loads(response.read()), {"error": "invalid Content-Length"})
+            connection.close()
+
+        def broken(payload):
+            raise KeyError("boom")
+
+        self.service.optimize_bulk = broken
+        self.assertEqual(self.request("POST", "/bulk", {"titles": []}), (500, {"error": "internal server error"}))
+        # The server keeps answering after the failure
+        self.assertEqual(self.request("POST", "/titles", {"title": "ChatGPT"})[0], 200)
+
+    def test_short_body_times_out(self):
+        with mock.patch.object(OptimizerRequestHandler, "timeout", 0.2):
+            with socket.create_connection(self.server.server_address, timeout=5) as client:
+                client.sendall(b"POST /titles HTTP/1.1\r\nHost: x\r\nContent-Length: 100\r\n\r\n{}")
+                response = client.makefile("rb").read()
+        self.assertTrue(response.startswith(b"HTTP/1.1 408 "))
+        self.assertTrue(response.endswith(b'{"error": "timed out reading the request body"}'))
+
+class TestMicroBatcher(unittest.TestCase):
+    def test_backpressure(self):
+        release = threading.Event()
+
+        def slow(items):
+            release.wait()
+            return items
+
+        batcher = MicroBatcher(slow, max_batch_size=1, max_delay=0, max_pending=1)
+        first = batcher.submit("a")
+        # Wait until the worker has taken the first item, leaving room for exactly one more
+        while batcher.pending:
+            time.sleep(0.001)
+        second = batcher.submit("b")
+        with self.assertRaises(ServiceOverloaded):
+            batcher.submit("c")
+        release.set()
+        self.assertEqual((first.result(1), second.result(1)), ("a", "b"))
+        batcher.close()
+
+    def test_max_pending_must_be_positive(self):
+        for max_pending in (0, -1):
+            with self.assertRaises(ValueError):
+                MicroBatcher(list, max_pending=max_pending)
+            with redirect_stderr(io.StringIO()) as errors, self.assertRaises(SystemExit):
+                main(["--max-pending", str(max_pending)])
+            self.assertIn("--max-pending must be at least 1", errors.getvalue())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,24 @@
+import unittest
+from optimized_product_optimizer import optimize_titles
+from parallel_optimizer import parallel_optimize_titles
+
+TITLES = ["ChatGPT Product", "SciSpace Tool", "Turnitin CHEAPEST Service", "Plain title"] * 50
+
+class TestParallelOptimizer(unittest.TestCase):
+    def test_inline_matches_serial(self):
+        result = list(parallel_optimize_titles(iter(TITLES), chunk_size=7))
+        self.assertEqual(result, optimize_titles(TITLES))
+
+    def test_process_pool_preserves_order(self):
+        result = list(parallel_optimize_titles(TITLES, chunk_size=9, max_workers=2, inline_threshold=1))
+        self.assertEqual(result, optimize_titles(TITLES))
+
+    def test_unordered_returns_indexes(self):
+        result = parallel_optimize_titles(TITLES, chunk_size=9, max_workers=2, ordered=False, inline_threshold=1)
+        expected = optimize_titles(TITLES)
+        pairs = sorted(result)
+        self.assertEqual([index for index, _ in pairs], list(range(len(TITLES))))
+        self.assertEqual([title for _, title in pairs], expected)
+
+if __name__ == "__main__":
+    unittest.main()
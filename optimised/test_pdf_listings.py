@@ -0,0 +1,116 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+from pdf_listings import (cell_value, detect_band_pages, extract_rows, load_state, main, repair_mojibake,
+                          save_state, table_records)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "FICHATGPT")
+TOP_SALES = os.path.join(DATA_DIR, "TopSales_DigitalProduct_shopee.pdf")
+POPULAR = os.path.join(DATA_DIR, "Data - Popular_DigitalProduct_shopee.pdf")
+
+
+def load(name):
+    with open(os.path.join(DATA_DIR, name), encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def lossless(record):
+    # Titles with styled letters or emoji lose bytes in these exports (see repair_mojibake)
+    title = record.get("line-clamp-2")
+    return title is None or title.isascii()
+
+
+class TestPdfListings(unittest.TestCase):
+    def check_export(self, pdf, processed):
+        records = list(table_records(extract_rows(pdf, inline_threshold=100)))
+        expected = load(processed)
+        self.assertEqual(len(records), len(expected))
+        for record, wanted in zip(records, expected):
+            self.assertEqual(list(record), list(wanted))
+            if lossless(wanted) and len(wanted["contents href"]) <= 1024:
+                self.assertEqual(record, wanted)
+        return records
+
+    def test_wide_sheet_in_column_bands(self):
+        records = self.check_export(TOP_SALES, "TopSales_DigitalProduct_shopee_processed.json")
+        self.assertEqual(records[0]["truncate"], 5.99)
+        self.assertIsNone(records[0]["h-4"])
+
+    def test_sheet_with_overflowing_cells(self):
+        records = self.check_export(POPULAR, "Popular_DigitalProduct_shopee_processed.json")
+        # Pieces drawn in different fonts are joined back into one cell
+        self.assertEqual(
+            records[1]["line-clamp-2"],
+            "[Checking-Service] 𝑻𝒖𝒓𝒏𝒊𝒕𝒊𝒏 Plagiarism+AI Writing Detection Checker[No Repository]"
+        )
+
+    def test_parallel_matches_inline(self):
+        inline = extract_rows(TOP_SALES, inline_threshold=100)
+        self.assertEqual(extract_rows(TOP_SALES, max_workers=2, pages_per_chunk=3, inline_threshold=0), inline)
+
+    def test_incremental_state(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "state.jsonl")
+            state, stats = load_state(path), {}
+            first = extract_rows(POPULAR, inline_threshold=100, state=state, stats=stats)
+            self.assertEqual((stats["extracted"], stats["reused"]), (7, 0))
+            save_state(path, state)
+
+            state = load_state(path)
+            # A changed page is extracted again
+            state[3] = ("stale", state[3][1])
+            second = extract_rows(POPULAR, inline_threshold=100, state=state, stats=stats)
+            self.assertEqual((stats["extracted"], stats["reused"]), (1, 6))
+            self.assertEqual(second, first)
+
+    def test_detect_band_pages(self):
+        def page(header, rows):
+            return [[[0, header]]] + [[[0, "https://shopee.com.my/x"]]] * (rows - 1)
+        pages = [page("url", 3), page("https://a", 2), page("location", 3), page("https://b", 2)]
+        self.assertEqual(detect_band_pages(pages), 2)
+        self.assertEqual(detect_band_pages([page("url", 3), page("location", 3), page("https://c", 1)]), 3)
+        # Same-sized pages of a narrow sheet are not bands
+        self.assertEqual(detect_band_pages([page("url", 3), page("https://c", 3), page("https://d", 3)]), 3)
+
+    def test_uniform_pages_are_one_band(self):
+        pages = extract_rows(POPULAR, inline_threshold=100)[:6]
+        self.assertEqual({len(rows) for rows in pages}, {31})
+        records = list(table_records(pages))
+        self.assertEqual(len(records), 185)
+        self.assertEqual(list(records[-1]), list(records[0]))
+
+        # Headers repeated on every page are dropped
+        header = pages[0][0]
+        repeated = [pages[0]] + [[header] + rows for rows in pages[1:]]
+        self.assertEqual(list(table_records(repeated)), records)
+
+    def test_cell_value(self):
+        self.assertIsNone(cell_value(None))
+        self.assertIsNone(cell_value("  "))
+        self.assertEqual(cell_value("4.9"), 4.9)
+        self.assertEqual(cell_value("100"), 100)
+        self.assertEqual(cell_value("-2%"), "-2%")
+
+    def test_repair_mojibake(self):
+        self.assertEqual(repair_mojibake("MIOR12345ðŸ”¥(CUSTOM / PRE)"), "MIOR12345🔥(CUSTOM / PRE)")
+        self.assertEqual(repair_mojibake("QÏ…illBÐ¾t"), "QυillBоt")
+        # Lost bytes are restored to the styled letters around them
+        self.assertEqual(repair_mojibake("ð\x8f\x8f‚ð\x8f\x8f‡ð\x8f\x8f„ð\x8f\x8f€"), "𝐂𝐇𝐄𝐀")
+        for text in ("Café", "plain", "ChatGPT ❤"):
+            self.assertEqual(repair_mojibake(text), text)
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "popular.json")
+            with redirect_stderr(io.StringIO()) as messages:
+                main([POPULAR, "-o", output, "--workers", "1"])
+            with open(output, encoding="utf-8") as handle:
+                self.assertEqual(len(json.load(handle)), 206)
+            self.assertIn("Wrote 206 records from 7 pages", messages.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+import zlib
+from pdf_text import Lexer, Name, PdfDocument, Ref, extract_text_runs, parse_cmap
+
+CMAP = b"""/CIDInit /ProcSet findresource begin
+1 begincodespacerange <0000> <FFFF> endcodespacerange
+2 beginbfchar <0003> <0020> <0010> <D835DC00> endbfchar
+1 beginbfrange <0024> <0026> <0041> endbfrange
+endcmap"""
+
+CONTENT = b"""q 1 0 0 1 0 0 cm
+0 0 100 50 re W n
+BT /F1 10 Tf 1 0 0 1 10 700 Tm [(Hello) -250 (world)] TJ ET
+BT /F1 10 Tf 10 680 Td (a\\(b\\)) Tj ET
+Q
+BT /F2 10 Tf 1 0 0 1 10 660 Tm <00240003002500260010> Tj ET"""
+
+
+def build_pdf(path):
+    stream = zlib.compress(CONTENT)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 /MediaBox [0 0 612 792] "
+        b"/Resources << /Font << /F1 5 0 R /F2 6 0 R >> >> >>",
+        b"<< /Type /Page /Parent 2 0 R /Contents 4 0 R >>",
+        b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream) + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /TrueType /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type0 /Encoding /Identity-H /ToUnicode 7 0 R >>",
+        b"<< /Length %d >>\nstream\n" % len(CMAP) + CMAP + b"\nendstream",
+    ]
+    with open(path, "wb") as handle:
+        handle.write(b"%PDF-1.4\n")
+        for number, body in enumerate(objects, 1):
+            handle.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+        handle.write(b"trailer\n<< /Root 1 0 R >>\n%%EOF\n")
+
+
+class TestPdfText(unittest.TestCase):
+    def test_lexer(self):
+        lexer = Lexer(b"<< /A#20B [1 2.5 3 0 R] /S (x\\051\\\ny) /H <4142> /T true >>")
+        self.assertEqual(lexer.next_object(), {"A B": [1, 2.5, Ref(3, 0)], "S": b"x)y", "H": b"AB", "T": True})
+        self.assertIsInstance(Lexer(b"/Type").next_object(), Name)
+
+    def test_parse_cmap(self):
+        self.assertEqual(parse_cmap(CMAP), {0x03: " ", 0x10: "𝐀", 0x24: "A", 0x25: "B", 0x26: "C"})
+
+    def test_extract_text_runs(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "sample.pdf")
+            build_pdf(path)
+            document = PdfDocument(path)
+            self.assertEqual(len(document.pages), 1)
+            runs = extract_text_runs(document, 0)
+        self.assertEqual([run.text for run in runs], ["Hello world", "a(b)", "A BC𝐀"])
+        self.assertEqual((runs[0].x, runs[0].y), (10, 700))
+        self.assertEqual((runs[1].x, runs[1].y), (10, 680))
+        self.assertEqual(runs[0].clip, (0, 0, 100, 50))
+        # The clip ends with its q ... Q block
+        self.assertIsNone(runs[2].clip)
+
+
+if __name__ == "__main__":
+    unittest.main()
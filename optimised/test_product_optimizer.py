@@ -2,6 +2,8 @@ import unittest
 from optimized_product_optimizer import (
     optimize_titles,
     optimize_descriptions,
+    compose_description,
+    ADDITIONAL_FILLERS,
     validate_input,
     ensure_list
 )
@@ -54,6 +56,19 @@ class TestProductOptimizer(unittest.TestCase):
         word_count = len(result[0].split())
         self.assertLessEqual(word_count, 2001)  # Allow 1 more for potential "..." being counted
     
+    def test_compose_description_word_counts(self):
+        # Expansion stops at the first filler that reaches the target
+        result = compose_description("One two three.", default_word_count=80, max_word_count=1000)
+        self.assertGreaterEqual(len(result.split()), 80)
+        last_filler = next(filler for filler in ADDITIONAL_FILLERS if result.endswith(filler))
+        self.assertLess(len(result[:-len(last_filler)].split()), 80)
+        
+        # Truncation inside the appended fillers keeps exactly max_word_count words
+        result = compose_description("One two three.", default_word_count=60, max_word_count=25)
+        self.assertTrue(result.endswith("..."))
+        self.assertEqual(len(result[:-3].split()), 25)
+        self.assertTrue(result.startswith("One two three. This product is made"))
+    
     def test_validate_input(self):
         # Test comma separation
         result = validate_input("item1, item2, item3")
@@ -80,5 +95,9 @@ class TestProductOptimizer(unittest.TestCase):
         result = ensure_list([])
         self.assertEqual(result, [])
 
+        # Test with an unsupported type
+        with self.assertRaises(TypeError):
+            ensure_list(42)
+
 if __name__ == "__main__":
     unittest.main() 
\ No newline at end of file
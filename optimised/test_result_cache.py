@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+from optimized_product_optimizer import optimize_titles, optimize_descriptions
+from result_cache import LRUCache, ResultCache, cache_key, cached_optimize_titles, cached_optimize_descriptions
+from title_rules import compile_rules
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "cache.sqlite")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_results_match_and_survive_restart(self):
+        titles = ["ChatGPT Product", "SciSpace Tool", "ChatGPT Product", ""]
+        with ResultCache(self.path) as cache:
+            self.assertEqual(cached_optimize_titles(titles, cache), optimize_titles(titles))
+            self.assertEqual(cache.stats["misses"], 4)
+
+        with ResultCache(self.path) as cache:
+            self.assertEqual(cached_optimize_titles(titles, cache), optimize_titles(titles))
+            self.assertEqual(cache.stats["disk_hits"], 4)
+            self.assertEqual(cache.stats["misses"], 0)
+            cached_optimize_titles(titles, cache)
+            self.assertEqual(cache.stats["memory_hits"], 4)
+
+    def test_parameters_and_rules_are_part_of_the_key(self):
+        cache = ResultCache()
+        cached_optimize_titles(["ChatGPT Product"], cache)
+        self.assertEqual(cached_optimize_titles(["ChatGPT Product"], cache, separator="*"),
+                         ["ChatGPT Plus Premium * 24/7 Access to Turbo GPT-4 Vision"])
+        matcher = compile_rules([{"pattern": "ChatGPT", "template": "Custom"}])
+        self.assertEqual(cached_optimize_titles(["ChatGPT Product"], cache, matcher=matcher), ["Custom"])
+        # An empty rule table is still a rule table, not a request for the default one
+        self.assertEqual(cached_optimize_titles(["ChatGPT Product"], cache, matcher=compile_rules([])),
+                         ["ChatGPT Product"])
+        self.assertNotEqual(cache_key("f", "a", {}, "v1"), cache_key("f", "a", {}, "v2"))
+
+    def test_descriptions(self):
+        cache = ResultCache()
+        descriptions = ["A basic product description."]
+        result = cached_optimize_descriptions(descriptions, cache, default_word_count=20)
+        self.assertEqual(result, optimize_descriptions(descriptions, default_word_count=20))
+
+    def test_disk_eviction(self):
+        with ResultCache(self.path, memory_size=0, max_disk_entries=10) as cache:
+            cache.put_many({str(i): str(i) for i in range(25)})
+            count = cache._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            self.assertLessEqual(count, 10)
+            self.assertGreater(cache.stats["evictions"], 0)
+
+            # Rows are only counted when the file may be over its limit
+            statements = []
+            cache._db.set_trace_callback(statements.append)
+            cache.put("24", "replaced")
+            self.assertFalse([statement for statement in statements if "COUNT" in statement])
+            cache.put_many({str(i): "replaced" for i in range(24)})
+            self.assertTrue([statement for statement in statements if "COUNT" in statement])
+
+    def test_lru(self):
+        lru = LRUCache(2)
+        lru.put("a", 1)
+        lru.put("b", 2)
+        lru.get("a")
+        lru.put("c", 3)
+        self.assertIn("a", lru)
+        self.assertNotIn("b", lru)
+
+if __name__ == "__main__":
+    unittest.main()
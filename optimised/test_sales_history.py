@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+from listing import Listing
+from sales_history import DAY, JOURNAL, Observation, SalesHistory
+
+START = 1700000000
+
+class TestSalesHistory(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = self.tmpdir.name
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def fill(self, store, days, listings=3):
+        for day in range(days):
+            store.extend((7, item, START + day * DAY, 1.0 + day, 100 * item + day, 4.5) for item in range(listings))
+            store.flush()
+
+    def test_window_queries_across_segments_and_journal(self):
+        with SalesHistory(self.path) as store:
+            self.fill(store, 5)
+            store.append(7, 1, START + 5 * DAY, None, None, None)
+            self.assertEqual(len(store.segments), 5)
+            history = store.history(7, 1, START + 2 * DAY, START + 6 * DAY)
+            self.assertEqual([observation.sales for observation in history], [102, 103, 104, None])
+            self.assertEqual(history[-1], Observation(START + 5 * DAY, None, None, None))
+            self.assertEqual(store.history(7, 99), [])
+            self.assertEqual(store.listings(), [(7, 0), (7, 1), (7, 2)])
+
+    def test_reopen_keeps_segments_and_journal(self):
+        with SalesHistory(self.path) as store:
+            self.fill(store, 2)
+            store.append(7, 0, START + 2 * DAY, 3.0, 2, 5.0)
+        # A torn append at the end of the journal is dropped on open
+        with open(os.path.join(self.path, JOURNAL), "ab") as journal:
+            journal.write(b"\0" * 10)
+        with SalesHistory(self.path) as store:
+            self.assertEqual([observation.price for observation in store.history(7, 0)], [1.0, 2.0, 3.0])
+            store.append(7, 0, START + 3 * DAY, 4.0)
+        with SalesHistory(self.path) as store:
+            self.assertEqual(len(store.history(7, 0)), 4)
+
+    def test_journal_is_sealed_at_segment_rows(self):
+        with SalesHistory(self.path, segment_rows=4) as store:
+            store.extend((1, item, START, 1.0, 1, 1.0) for item in range(5))
+            self.assertEqual(len(store.segments), 1)
+            self.assertEqual(store.segments[0].rows, 5)
+
+    def test_compaction_keeps_last_row_per_bucket(self):
+        with SalesHistory(self.path) as store:
+            self.fill(store, 10)
+            result = store.compact(START + 8 * DAY, resolution=3 * DAY)
+            self.assertEqual(result["segments"], 8)
+            self.assertEqual(len(store.segments), 3)
+            history = store.history(7, 2)
+            buckets = {}
+            for day in range(8):
+                buckets[(START + day * DAY) // (3 * DAY)] = 1.0 + day
+            self.assertEqual([observation.price for observation in history], sorted(buckets.values()) + [9.0, 10.0])
+        with SalesHistory(self.path) as store:
+            self.assertEqual(len(store.history(7, 2)), len(history))
+            self.assertEqual(sorted(name for name in os.listdir(self.path) if name.startswith("segment-")),
+                             sorted(os.path.basename(segment.path) for segment in store.segments))
+
+    def test_extend_listings_skips_listings_without_ids(self):
+        listings = [Listing("a", shop_id=1, item_id=2, price=5.0, sales=20900), Listing("b")]
+        with SalesHistory(self.path) as store:
+            self.assertEqual(store.extend_listings(listings, START), 1)
+            self.assertEqual(store.history(1, 2), [Observation(START, 5.0, 20900, None)])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import io
+import json
+import os
+import unittest
+from scrape_reader import iter_json_array, iter_listings
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "FICHATGPT")
+TOP_SALES = os.path.join(DATA_DIR, "TopSales_DigitalProduct_shopee_processed.json")
+POPULAR = os.path.join(DATA_DIR, "Popular_DigitalProduct_shopee_processed.json")
+
+class TestScrapeReader(unittest.TestCase):
+    def test_matches_json_load_with_tiny_reads(self):
+        with open(TOP_SALES, encoding="utf-8") as handle:
+            expected = json.load(handle)
+        with open(TOP_SALES, encoding="utf-8") as handle:
+            self.assertEqual(list(iter_json_array(handle, read_size=7)), expected)
+
+    def test_scalars_and_edge_cases(self):
+        self.assertEqual(list(iter_json_array(io.StringIO(" [ ] "))), [])
+        self.assertEqual(list(iter_json_array(io.StringIO("[12345, -1.5e3, \"a,]\"]"), read_size=2)),
+                         [12345, -1500.0, "a,]"])
+        with self.assertRaises(ValueError):
+            list(iter_json_array(io.StringIO("{\"a\": 1}")))
+        with self.assertRaises(ValueError):
+            list(iter_json_array(io.StringIO("[1, 2")))
+
+    def test_scalars_straddling_reads(self):
+        values = [-25000000000.5, 1e-7, 0, -0.25, 3.0e+21, 12345678, True, None, "x", -1.5E3, 7]
+        for text in [json.dumps(values), json.dumps(values, separators=(",", ":")), "[-1.5e3,2E+2 ,0.5\n]"]:
+            for read_size in range(1, 9):
+                self.assertEqual(list(iter_json_array(io.StringIO(text), read_size=read_size)), json.loads(text),
+                                 (text, read_size))
+
+    def test_profiles(self):
+        top = next(iter_listings(TOP_SALES))
+        self.assertEqual(top.price, 5.99)
+        self.assertEqual(top.rating, 4.9)
+        self.assertEqual(top.sales, "20.9k Sold/Month")
+        self.assertEqual(top.location, "Pulau Pinang")
+        self.assertEqual(top.promotions, ("Cheapest on Shopee*", "Free Gift"))
+
+        popular = next(iter_listings(POPULAR))
+        self.assertEqual(popular.price, 4.9)
+        self.assertEqual(popular.sales, "9.7k sold")
+        self.assertEqual(popular.discount, "-2%")
+        self.assertIsNone(popular.rating)
+
+        catalog = next(iter_listings(os.path.join(DATA_DIR, "scraped_data_processed.json")))
+        self.assertEqual(catalog.title, "Software-cat.11000910.11000911.11000923 Product 1")
+        self.assertEqual((catalog.price, catalog.sales), (352.4, "456"))
+        self.assertIsNone(catalog.url)
+        self.assertEqual(catalog.category, "Software-cat.11000910.11000911.11000923")
+
+    def test_unknown_profile(self):
+        with self.assertRaises(ValueError):
+            list(iter_listings(TOP_SALES, profile="nope"))
+
+if __name__ == "__main__":
+    unittest.main()
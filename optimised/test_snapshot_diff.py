@@ -0,0 +1,76 @@
+import json
+import os
+import tempfile
+import unittest
+from listing import Listing
+from snapshot_diff import change_record, diff_snapshots, iter_snapshot, listing_key
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "FICHATGPT")
+
+def card(item_id, title="Listing", price="5.99", sales="107 sold/month", tracking="a"):
+    return {
+        "contents href": f"https://shopee.com.my/x-i.100.{item_id}?sp_atk={tracking}",
+        "line-clamp-2": title,
+        "truncate": price,
+        "flex-none": "4.9",
+        "truncate 4": sales,
+        "ml-[3px]": "Selangor",
+    }
+
+class TestSnapshotDiff(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, name, records):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(records, handle)
+        return path
+
+    def test_added_removed_and_changed(self):
+        old = self.write("old.json", [card(1), card(2), card(3, price="10.00")])
+        new = self.write("new.json", [
+            card(3, price="12.50", sales="1.2k sold/month", tracking="other"),
+            card(4),
+            card(1, tracking="changed"),
+        ])
+        stats = {}
+        changes = list(diff_snapshots(iter_snapshot(old), iter_snapshot(new), stats=stats))
+        self.assertEqual([(change.kind, change.key) for change in changes],
+                         [("changed", (100, 3)), ("added", (100, 4)), ("removed", (100, 2))])
+        self.assertEqual(changes[0].deltas, {"price": (10.0, 12.5), "sales": (107, 1200)})
+        self.assertEqual(stats["unchanged"], 1)
+        record = change_record(changes[0])
+        self.assertEqual(record["key"], [100, 3])
+        self.assertEqual(record["changes"]["sales"], {"old": 107, "new": 1200})
+        json.dumps(change_record(changes[1]))
+
+    def test_duplicates_and_unkeyed(self):
+        pairs = [((1, 1), Listing("a")), ((1, 1), Listing("b")), (None, Listing("c"))]
+        stats = {}
+        changes = list(diff_snapshots(pairs, [((1, 1), Listing("a"))], stats=stats))
+        self.assertEqual(changes, [])
+        self.assertEqual((stats["duplicates"], stats["unkeyed"], stats["unchanged"]), (1, 1, 1))
+
+    def test_listing_key_falls_back_to_canonical_url(self):
+        self.assertEqual(listing_key(Listing(url="https://example.com/p?ref=1")), "https://example.com/p")
+        self.assertIsNone(listing_key(Listing()))
+
+    def test_catalog_snapshots_are_keyed_by_id(self):
+        old = os.path.join(DATA_DIR, "scraped_data_processed.json")
+        new = os.path.join(DATA_DIR, "scraped_data_processed(1).json")
+        keys = [key for key, _ in iter_snapshot(old)]
+        self.assertEqual(keys[0], "PROD100000")
+        kinds = {change.kind for change in diff_snapshots(iter_snapshot(old), iter_snapshot(new))}
+        self.assertLessEqual(kinds, {"added", "removed", "changed"})
+
+    def test_csv_snapshot(self):
+        path = os.path.join(DATA_DIR, "shopee_products.csv")
+        key, listing = next(iter_snapshot(path))
+        self.assertEqual(key, (1367151879, 26777790023))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,16 @@
+import unittest
+from text_normalization import normalize_for_matching
+
+class TestTextNormalization(unittest.TestCase):
+    def test_ascii_fast_path(self):
+        self.assertEqual(normalize_for_matching("ChatGPT Plus"), "chatgpt plus")
+
+    def test_unicode_folding(self):
+        self.assertEqual(normalize_for_matching("𝘾𝙝𝙖𝙩𝙂𝙋𝙏 𝘼𝙄"), "chatgpt ai")
+        self.assertEqual(normalize_for_matching("ＣｈａｔＧＰＴ"), "chatgpt")
+        # Cyrillic 'С' and 'а' posing as Latin letters, plus a zero-width space
+        self.assertEqual(normalize_for_matching("Сh​аtGPT"), "chatgpt")
+        self.assertEqual(normalize_for_matching("STRASSE straße"), "strasse strasse")
+
+if __name__ == "__main__":
+    unittest.main()
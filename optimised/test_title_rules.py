@@ -0,0 +1,121 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from title_rules import SUBSTRING_SCAN_LIMIT, TITLE_RULES, compile_rules, compile_rules_cached, rules_version
+from optimized_product_optimizer import optimize_titles
+from differential_fuzz import generate_cases, load_implementation
+
+class TestTitleRules(unittest.TestCase):
+    def test_specific_rules_beat_generic_chatgpt(self):
+        result = optimize_titles([
+            "Private ChatGPT plus account",
+            "3u ChatGPT 4 Plus",
+            "ChatGPT Masterclass for beginners",
+            "ChatGPT Plus shared",
+        ])
+        self.assertEqual(result, [
+            "Private ChatGPT Plus | Warranty Included",
+            "3u ChatGPT 4 Plus | Warranty Provided",
+            "ChatGPT Masterclass: Ultimate Beginner's Guide",
+            "ChatGPT Plus Premium | 24/7 Access to Turbo GPT-4 Vision",
+        ])
+
+    def test_sub_conditions(self):
+        result = optimize_titles(["Turnitin CHEAPEST", "Turnitin Checker"])
+        self.assertTrue(result[0].startswith("Affordable Turnitin"))
+        self.assertTrue(result[1].startswith("Turnitin Plagiarism"))
+
+    def test_priority_then_longest_match(self):
+        matcher = compile_rules([
+            {"pattern": "abc", "priority": 1, "template": "short"},
+            {"pattern": "abcdef", "priority": 1, "template": "long"},
+            {"pattern": "zz", "priority": 5, "template": "priority"},
+        ])
+        self.assertEqual(matcher.match("xabcdefx").template, "long")
+        self.assertEqual(matcher.match("xabcx").template, "short")
+        self.assertEqual(matcher.match("abcdef zz").template, "priority")
+        self.assertIsNone(matcher.match("nothing here"))
+
+    def test_overlapping_keywords(self):
+        matcher = compile_rules([
+            {"pattern": "she", "template": "she"},
+            {"pattern": "hers", "priority": 1, "template": "hers"},
+            {"pattern": "his", "template": "his"},
+        ])
+        self.assertEqual(matcher.find_keywords("ushers"), {0, 1})
+        self.assertEqual(matcher.match("ushers").template, "hers")
+
+    def test_version_tracks_rule_changes(self):
+        changed = TITLE_RULES + [{"pattern": "New Product", "template": "New"}]
+        self.assertNotEqual(rules_version(TITLE_RULES), rules_version(changed))
+        self.assertEqual(compile_rules(normalize=False, fuzzy_threshold=None).version, rules_version(TITLE_RULES))
+        self.assertNotEqual(compile_rules().version, compile_rules(normalize=False, fuzzy_threshold=None).version)
+
+    def test_styled_and_lowercase_titles_match(self):
+        result = optimize_titles([
+            "𝘾𝙝𝙖𝙩𝙂𝙋𝙏 𝘼𝙄 𝙎𝙤𝙛𝙩𝙬𝙖𝙧𝙚 𝙛𝙤𝙧 𝙋𝘾 & 𝙈𝙤𝙗𝙞𝙡𝙚",
+            "[Checking-Service] 𝑻𝒖𝒓𝒏𝒊𝒕𝒊𝒏 Plagiarism",
+            "Private Chatgpt plus account",
+        ])
+        self.assertEqual(result[0], "ChatGPT Plus Premium | 24/7 Access to Turbo GPT-4 Vision")
+        self.assertTrue(result[1].startswith("Turnitin Plagiarism Checker"))
+        self.assertEqual(result[2], "Private ChatGPT Plus | Warranty Included")
+        self.assertIsNone(compile_rules(normalize=False, fuzzy_threshold=None).match("Private Chatgpt plus account"))
+
+    def test_substring_matching_agrees_with_automaton(self):
+        fillers = [{"pattern": f"filler {index}", "template": "x"} for index in range(SUBSTRING_SCAN_LIMIT)]
+        small = compile_rules()
+        large = compile_rules(TITLE_RULES + fillers)
+        self.assertIsNotNone(small._ranked)
+        self.assertIsNone(large._ranked)
+        for title, _, _ in generate_cases(3000, seed=3):
+            expected = large.match(title)
+            self.assertEqual(getattr(small.match(title), "index", None), getattr(expected, "index", None), title)
+
+    def test_matching_costs_at_most_twice_the_baseline(self):
+        titles = [title for title, _, _ in generate_cases(5000, seed=1)]
+        baseline = load_implementation("refactored")
+
+        # Interleaved, so both sides see the same machine load; the best round of each is compared
+        timings = {optimize_titles: [], baseline: []}
+        for _ in range(7):
+            for func, rounds in timings.items():
+                start = time.perf_counter()
+                func(titles)
+                rounds.append(time.perf_counter() - start)
+        self.assertLess(min(timings[optimize_titles]), 2 * min(timings[baseline]))
+
+    def test_compiled_rules_are_cached_on_disk(self):
+        rules = TITLE_RULES + [{"pattern": "Canva", "priority": 60, "template": "Canva Pro {sep} Lifetime"}]
+        with tempfile.TemporaryDirectory() as cache_dir:
+            matcher = compile_rules_cached(rules, cache_dir=cache_dir)
+            self.assertEqual(matcher.version, compile_rules(rules).version)
+            [path] = [os.path.join(cache_dir, name) for name in os.listdir(cache_dir)]
+            self.assertEqual(optimize_titles(["canva pro"], matcher=compile_rules_cached(rules, cache_dir=cache_dir)),
+                             ["Canva Pro | Lifetime"])
+            # A corrupt cache file is recompiled and replaced
+            with open(path, "wb") as cache_file:
+                cache_file.write(b"not a pickle")
+            self.assertEqual(compile_rules_cached(rules, cache_dir=cache_dir).version, matcher.version)
+            self.assertEqual(os.listdir(cache_dir), [os.path.basename(path)])
+            self.assertNotEqual(os.path.getsize(path), len(b"not a pickle"))
+
+    def test_default_matcher_is_built_on_first_use(self):
+        code = (
+            "import title_rules, optimized_product_optimizer\n"
+            "before = title_rules._default_matcher is None\n"
+            "optimized_product_optimizer.optimize_titles(['x'])\n"
+            "print(before, title_rules.DEFAULT_MATCHER is title_rules.default_matcher())\n"
+        )
+        with tempfile.TemporaryDirectory() as cache_dir:
+            result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                                    cwd=os.path.dirname(os.path.abspath(__file__)),
+                                    env={**os.environ, "PRODUCT_OPTIMIZER_CACHE_DIR": cache_dir})
+            self.assertEqual(result.stdout.split(), ["True", "True"])
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+if __name__ == "__main__":
+    unittest.main()
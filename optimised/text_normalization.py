@@ -0,0 +1,57 @@
+import unicodedata
+from functools import lru_cache
+
+# Bump whenever the normalization below changes, so cached results keyed on the rule-set version are refreshed
+NORMALIZATION_VERSION = "1"
+
+NORMALIZED_CACHE_SIZE = 65536
+
+# Look-alike letters from other scripts that sellers use to dodge keyword filters,
+# folded to the ASCII letter they imitate. NFKC already handles the mathematical
+# alphanumeric styles (bold, italic, script, ...) and full-width forms.
+CONFUSABLES = {
+    # Cyrillic
+    "а": "a", "в": "b", "е": "e", "к": "k", "м": "m", "н": "h", "о": "o", "р": "p", "с": "c",
+    "т": "t", "у": "y", "х": "x", "і": "i", "ј": "j", "ѕ": "s", "ԁ": "d", "ԛ": "q", "ԝ": "w",
+    "А": "A", "В": "B", "Е": "E", "К": "K", "М": "M", "Н": "H", "О": "O", "Р": "P", "С": "C",
+    "Т": "T", "У": "Y", "Х": "X", "І": "I", "Ј": "J", "Ѕ": "S",
+    # Greek
+    "α": "a", "ε": "e", "ι": "i", "κ": "k", "ν": "v", "ο": "o", "ρ": "p", "τ": "t", "υ": "u", "χ": "x",
+    "Α": "A", "Β": "B", "Ε": "E", "Ζ": "Z", "Η": "H", "Ι": "I", "Κ": "K", "Μ": "M", "Ν": "N",
+    "Ο": "O", "Ρ": "P", "Τ": "T", "Υ": "Y", "Χ": "X",
+}
+
+# Invisible characters that split words without showing up on screen
+_INVISIBLE = dict.fromkeys(map(ord, "​‌‍⁠﻿­"))
+
+_FOLD_TABLE = str.maketrans(CONFUSABLES)
+_FOLD_TABLE.update(_INVISIBLE)
+
+
+def normalize_for_matching(text):
+    """
+    Normalize a title for keyword matching (NFKC, confusable folding, case folding).
+
+    Plain ASCII titles, the vast majority, only pay for a lower-case copy; other
+    titles go through the full normalization, whose results are cached.
+
+    Parameters:
+    text (str): The title to normalize.
+
+    Returns:
+    str: The normalized text. Only use it for matching, never for display.
+
+    Examples:
+    >>> normalize_for_matching("𝘾𝙝𝙖𝙩𝙂𝙋𝙏 𝘼𝙄")
+    'chatgpt ai'
+    """
+    if text.isascii():
+        return text.lower()
+    return _normalize_unicode(text)
+
+
+@lru_cache(maxsize=NORMALIZED_CACHE_SIZE)
+def _normalize_unicode(text):
+    text = unicodedata.normalize("NFKC", text)
+    text = text.translate(_FOLD_TABLE)
+    return text.casefold()
@@ -0,0 +1,436 @@
+import os
+from collections import deque
+
+from text_normalization import NORMALIZATION_VERSION, normalize_for_matching
+
+# Tables with at most this many keywords are matched with substring checks in rank
+# order, which beats scanning the title one character at a time in Python
+SUBSTRING_SCAN_LIMIT = 64
+
+# Data-driven rule table for optimize_titles.
+#
+# Each rule is matched when its "pattern" occurs in the cleaned title and every
+# keyword in "requires" (if any) occurs as well. When several rules match, the
+# highest "priority" wins; ties are broken by the longest pattern and then by
+# position in this table. "{sep}" in a template is replaced by the separator
+# passed to optimize_titles and "{title}" by the cleaned input title. An
+# optional "name" labels the rule in metrics; it defaults to the pattern.
+# Patterns and titles are compared after normalize_for_matching, so matching
+# ignores case and look-alike Unicode styling. A matcher compiled with a
+# fuzzy_threshold also retries titles that match no rule exactly with the
+# fuzzy classifier (spacing and typo variants such as "3u Chat Gpt4").
+TITLE_RULES = [
+    {
+        "pattern": "SciSpace",
+        "priority": 100,
+        "template": "SciSpace Typeset Premium {sep} AI Copilot {sep} ChatGPT Alternative",
+    },
+    {
+        "pattern": "Private ChatGPT",
+        "priority": 90,
+        "template": "Private ChatGPT Plus {sep} Warranty Included",
+    },
+    {
+        "pattern": "3u ChatGPT",
+        "priority": 90,
+        "template": "3u ChatGPT 4 Plus {sep} Warranty Provided",
+    },
+    {
+        "pattern": "ChatGPT Masterclass",
+        "priority": 90,
+        "template": "ChatGPT Masterclass: Ultimate Beginner's Guide",
+    },
+    {
+        "pattern": "ChatGPT",
+        "priority": 80,
+        "template": "ChatGPT Plus Premium {sep} 24/7 Access to Turbo GPT-4 Vision",
+    },
+    {
+        "name": "Turnitin CHEAPEST",
+        "pattern": "Turnitin",
+        "priority": 71,
+        "requires": ["CHEAPEST"],
+        "template": "Affordable Turnitin Plagiarism Checker & AI Writing Detection Tool {sep} No Repository",
+    },
+    {
+        "pattern": "Turnitin",
+        "priority": 70,
+        "template": "Turnitin Plagiarism Checker & AI Writing Detection Tool {sep} No Repository",
+    },
+]
+
+
+class TitleRule:
+    """A single compiled entry of the title rule table."""
+
+    __slots__ = ("index", "pattern", "priority", "template", "requires", "name", "_rendered")
+
+    def __init__(self, index, pattern, priority=0, template="{title}", requires=(), name=None):
+        self.index = index
+        self.pattern = pattern
+        self.priority = priority
+        self.template = template
+        self.requires = tuple(requires)
+        self.name = name or pattern
+        # Renderings by separator of templates that do not include the title
+        self._rendered = None if "{title}" in template else {}
+
+    def sort_key(self):
+        # Higher priority first, then longer pattern, then table order
+        return (-self.priority, -len(self.pattern), self.index)
+
+    def render(self, title, separator="|"):
+        if self._rendered is None:
+            return self.template.replace("{sep}", separator).replace("{title}", title)
+        rendered = self._rendered.get(separator)
+        if rendered is None:
+            rendered = self.template.replace("{sep}", separator)
+            if "{title}" in rendered:
+                # The separator itself contained the title placeholder
+                return rendered.replace("{title}", title)
+            if len(self._rendered) < 16:
+                self._rendered[separator] = rendered
+        return rendered
+
+    def __repr__(self):
+        return f"TitleRule({self.name!r}, priority={self.priority})"
+
+
+class RuleMatcher:
+    """
+    Aho-Corasick automaton over every pattern and sub-condition keyword of a rule table.
+
+    A title is scanned once regardless of how many rules are loaded; the set of
+    keywords found is then resolved to the best rule using the precomputed
+    candidate order. Small tables (up to SUBSTRING_SCAN_LIMIT keywords) skip the
+    scan and test each rule's keywords with str 'in' in rank order, stopping at
+    the first rule that matches. With normalize=True (the default) keywords and titles are
+    compared after normalize_for_matching. When fuzzy_threshold is set, titles
+    without an exact match fall back to a trigram-indexed fuzzy lookup of the
+    same keywords.
+    """
+
+    def __init__(self, rules, normalize=True, fuzzy_threshold=None):
+        self.rules = [
+            TitleRule(
+                index,
+                rule["pattern"],
+                rule.get("priority", 0),
+                rule.get("template", "{title}"),
+                rule.get("requires", ()),
+                rule.get("name"),
+            )
+            for index, rule in enumerate(rules)
+        ]
+        self.normalize = normalize
+        self.fuzzy_threshold = fuzzy_threshold
+        # Fingerprinted on first use of version; matching titles never needs it
+        self._source = [dict(rule) for rule in rules]
+        self._version = None
+
+        keywords = []
+        keyword_ids = {}
+        for rule in self.rules:
+            for keyword in (rule.pattern,) + rule.requires:
+                if not keyword:
+                    raise ValueError(f"Empty keyword in title rule {rule.name!r}")
+                if normalize:
+                    keyword = normalize_for_matching(keyword)
+                if keyword not in keyword_ids:
+                    keyword_ids[keyword] = len(keywords)
+                    keywords.append(keyword)
+        self.keywords = keywords
+
+        # Rules grouped by the keyword that triggers them, best candidate first
+        prepare = normalize_for_matching if normalize else str
+        self._rules_by_keyword = {}
+        for rule in sorted(self.rules, key=TitleRule.sort_key):
+            self._rules_by_keyword.setdefault(keyword_ids[prepare(rule.pattern)], []).append(rule)
+        self._rule_requires = {
+            rule.index: tuple(keyword_ids[prepare(keyword)] for keyword in rule.requires)
+            for rule in self.rules
+        }
+
+        # Best rule first, with the prepared keywords it needs, for substring matching
+        self._ranked = None
+        if len(keywords) <= SUBSTRING_SCAN_LIMIT:
+            self._ranked = [
+                (keywords[keyword_ids[prepare(rule.pattern)]],
+                 tuple(keywords[keyword_id] for keyword_id in self._rule_requires[rule.index]),
+                 rule)
+                for rule in sorted(self.rules, key=TitleRule.sort_key)
+            ]
+
+        self._transitions, self._output = _build_automaton(keywords)
+        self.fuzzy = None
+        if fuzzy_threshold is not None:
+            # Imported here so that matchers without the fallback start without it
+            from fuzzy_classifier import FuzzyClassifier
+
+            self.fuzzy = FuzzyClassifier(keywords, fuzzy_threshold)
+
+    @property
+    def version(self):
+        if self._version is None:
+            self._version = matcher_version(self._source, self.normalize, self.fuzzy_threshold)
+        return self._version
+
+    def find_keywords(self, text):
+        """
+        Return the ids of every keyword occurring in the text.
+
+        Parameters:
+        text (str): The text to scan.
+
+        Returns:
+        set: Indexes into self.keywords of the keywords found.
+        """
+        transitions = self._transitions
+        output = self._output
+        found = set()
+        state = 0
+        for char in text:
+            state = transitions[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+    def match(self, title):
+        """
+        Return the winning rule for a title.
+
+        Parameters:
+        title (str): The cleaned product title.
+
+        Returns:
+        TitleRule or None: The highest-ranked matching rule, or None if no rule applies.
+        """
+        text = title
+        if self.normalize:
+            # normalize_for_matching() of plain ASCII is its lower-case copy
+            text = title.lower() if title.isascii() else normalize_for_matching(title)
+        if self._ranked is not None:
+            for pattern, requires, rule in self._ranked:
+                if pattern in text:
+                    for keyword in requires:
+                        if keyword not in text:
+                            break
+                    else:
+                        return rule
+            if self.fuzzy is None:
+                return None
+        found = self.find_keywords(text)
+        best = self._resolve(found)
+        if best is None and self.fuzzy is not None:
+            best = self._resolve(found.union(self.fuzzy.scores(title)))
+        return best
+
+    def _resolve(self, found):
+        best = None
+        for keyword_id in found:
+            for rule in self._rules_by_keyword.get(keyword_id, ()):
+                if best is not None and rule.sort_key() >= best.sort_key():
+                    break
+                if all(required in found for required in self._rule_requires[rule.index]):
+                    best = rule
+                    break
+        return best
+
+    def __len__(self):
+        return len(self.rules)
+
+
+def _build_automaton(keywords):
+    goto = [{}]
+    output = [[]]
+    for keyword_id, keyword in enumerate(keywords):
+        state = 0
+        for char in keyword:
+            next_state = goto[state].get(char)
+            if next_state is None:
+                next_state = len(goto)
+                goto[state][char] = next_state
+                goto.append({})
+                output.append([])
+            state = next_state
+        output[state].append(keyword_id)
+
+    # Breadth-first pass computing failure links, folded into a full transition table
+    # so that scanning costs a single dict lookup per character
+    transitions = [None] * len(goto)
+    transitions[0] = goto[0]
+    fail = [0] * len(goto)
+    queue = deque(goto[0].values())
+    while queue:
+        state = queue.popleft()
+        transitions[state] = {**transitions[fail[state]], **goto[state]}
+        for char, next_state in goto[state].items():
+            queue.append(next_state)
+            fail[next_state] = transitions[fail[state]].get(char, 0)
+            output[next_state] = output[next_state] + output[fail[next_state]]
+
+    return transitions, [tuple(ids) for ids in output]
+
+
+def rules_version(rules):
+    """
+    Compute a stable fingerprint of a rule table.
+
+    Parameters:
+    rules (list): A list of rule dictionaries.
+
+    Returns:
+    str: A short hex digest that changes whenever any rule changes.
+    """
+    # Imported here so that startup only pays for them when a cache key is needed
+    import hashlib
+    import json
+
+    payload = json.dumps(rules, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+
+def matcher_version(rules, normalize=True, fuzzy_threshold=None):
+    """
+    Compute the fingerprint of a rule table compiled with the given options.
+
+    Parameters:
+    rules (list): A list of rule dictionaries.
+    normalize (bool): Whether titles are matched on normalized text. Default is True.
+    fuzzy_threshold (float): The fuzzy fallback threshold, or None. Default is None.
+
+    Returns:
+    str: The value RuleMatcher.version takes for these arguments.
+    """
+    version = rules_version(rules)
+    if normalize:
+        version = rules_version([version, "normalized", NORMALIZATION_VERSION])
+    if fuzzy_threshold is not None:
+        version = rules_version([version, "fuzzy", fuzzy_threshold])
+    return version
+
+
+def compile_rules(rules=None, normalize=True, fuzzy_threshold=None):
+    """
+    Compile a rule table into a matcher.
+
+    Parameters:
+    rules (list): A list of rule dictionaries. Default is TITLE_RULES.
+    normalize (bool): Match on normalized text (case, Unicode styling). Default is True.
+    fuzzy_threshold (float): Minimum confidence of the fuzzy fallback (e.g. fuzzy_classifier.DEFAULT_THRESHOLD),
+        or None for exact matching only. Default is None.
+
+    Returns:
+    RuleMatcher: The compiled matcher.
+    """
+    return RuleMatcher(TITLE_RULES if rules is None else rules, normalize, fuzzy_threshold)
+
+
+# Bump when RuleMatcher's attributes change so stale pickles are recompiled
+CACHE_FORMAT = 2
+
+
+def rule_cache_dir():
+    """
+    Locate the directory holding compiled rule tables.
+
+    Returns:
+    str: $PRODUCT_OPTIMIZER_CACHE_DIR if set, else product-optimizer under $XDG_CACHE_HOME (default ~/.cache).
+    """
+    directory = os.environ.get("PRODUCT_OPTIMIZER_CACHE_DIR")
+    if directory:
+        return directory
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "product-optimizer")
+
+
+def compile_rules_cached(rules=None, normalize=True, fuzzy_threshold=None, cache_dir=None):
+    """
+    Compile a rule table, reusing a compiled copy pickled on disk when one exists.
+
+    The cache file is keyed by the rule table fingerprint, so an edited table
+    is compiled afresh. Unreadable or stale cache files are recompiled, and a
+    cache directory that cannot be written is not an error.
+
+    Parameters:
+    rules (list): A list of rule dictionaries. Default is TITLE_RULES.
+    normalize (bool): Passed to compile_rules. Default is True.
+    fuzzy_threshold (float): Passed to compile_rules. Default is None.
+    cache_dir (str): Where compiled tables are kept. Default is rule_cache_dir().
+
+    Returns:
+    RuleMatcher: The compiled matcher.
+    """
+    import pickle
+
+    rules = TITLE_RULES if rules is None else rules
+    version = matcher_version(rules, normalize, fuzzy_threshold)
+    path = os.path.join(cache_dir or rule_cache_dir(), f"rules-{CACHE_FORMAT}-{version}.pickle")
+    try:
+        with open(path, "rb") as cache_file:
+            matcher = pickle.load(cache_file)
+        if isinstance(matcher, RuleMatcher) and matcher.version == version:
+            return matcher
+    except Exception:
+        pass
+
+    matcher = compile_rules(rules, normalize, fuzzy_threshold)
+    matcher._version = version
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(temporary, "wb") as cache_file:
+            pickle.dump(matcher, cache_file, pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+    except OSError:
+        if os.path.exists(temporary):
+            os.unlink(temporary)
+    return matcher
+
+
+def load_rules(path):
+    """
+    Compile a JSON rule table, reusing the on-disk compiled copy when it is current.
+
+    Parameters:
+    path (str): A JSON file holding a list of rule dictionaries.
+
+    Returns:
+    RuleMatcher: The compiled matcher.
+
+    Raises:
+    ValueError: If the file does not hold a JSON list.
+    """
+    import json
+
+    with open(path, encoding="utf-8") as rules_file:
+        rules = json.load(rules_file)
+    if not isinstance(rules, list):
+        raise ValueError(f"{path}: a rule table must be a JSON list of rules")
+    return compile_rules_cached(rules)
+
+
+_default_matcher = None
+
+
+def default_matcher():
+    """
+    Return the matcher for the built-in rule table, loading it on first use.
+
+    Deferring this keeps importing the engines cheap, and the table comes from
+    compile_rules_cached, so most processes unpickle it instead of compiling.
+
+    Returns:
+    RuleMatcher: The compiled TITLE_RULES matcher, shared by every caller.
+    """
+    global _default_matcher
+    if _default_matcher is None:
+        _default_matcher = compile_rules_cached()
+    return _default_matcher
+
+
+def __getattr__(name):
+    # DEFAULT_MATCHER is still importable by name, but built on first access
+    if name == "DEFAULT_MATCHER":
+        return default_matcher()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")